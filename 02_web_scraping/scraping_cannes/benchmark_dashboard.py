@@ -0,0 +1,118 @@
+"""
+Benchmark de la capa de datos del dashboard sobre datasets sintéticos
+(modules/synthetic_dataset.py), sin Streamlit ni ficheros intermedios.
+
+Para cada tamaño se genera el dataset en memoria con la misma semilla y se mide:
+    - tablas puente de países y productoras y matriz película × país
+    - calculate_kpis y get_coproduction_matrix sobre todo el dataset
+    - cubo preagregado (build_cube) e índice de sumas prefijas por año
+    - agrupamiento de nombres de productoras
+      (ProductionCompanyNormalizer.cluster_similar_companies) sobre una muestra
+      de nombres, con su pureza frente a productoras_canonicas
+
+Uso:
+    python benchmark_dashboard.py
+    python benchmark_dashboard.py --sizes 1k 10k 100k --cluster-sample 1000
+    python benchmark_dashboard.py --sizes 1m --json datos_generados/benchmark_dashboard.json
+"""
+import argparse
+import json
+import time
+from collections import Counter
+
+import numpy as np
+
+from company_normalizer import ProductionCompanyNormalizer
+from modules.cube import build_cube
+from modules.data_model import build_company_tables, build_country_matrix, build_country_tables, split_companies
+from modules.data_processing import build_year_index, get_coproduction_matrix
+from modules.kpis import calculate_kpis
+from modules.synthetic_dataset import SIZES, generate_dataset
+
+
+def timed(func, *args, **kwargs):
+    """Ejecuta func y devuelve (resultado, milisegundos)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, round((time.perf_counter() - start) * 1000, 1)
+
+
+def canonical_names(df):
+    """Nombre observado -> nombre canónico, de las películas sin nombres repetidos"""
+    mapping = {}
+    for observed, canonical in zip(df['productoras_normalizadas'], df['productoras_canonicas']):
+        observed, canonical = split_companies(observed), split_companies(canonical)
+        if len(observed) == len(canonical):
+            mapping.update(zip(observed, canonical))
+    return mapping
+
+
+def cluster_purity(clusters, mapping):
+    """Proporción de nombres cuyo grupo tiene como productora mayoritaria la suya"""
+    agreeing = total = 0
+    for members in clusters.values():
+        canonical = [mapping[name] for name in members if name in mapping]
+        if canonical:
+            agreeing += Counter(canonical).most_common(1)[0][1]
+            total += len(canonical)
+    return round(agreeing / total, 3) if total else None
+
+
+def run_size(label, args):
+    """Genera un dataset y devuelve los tiempos de cada etapa"""
+    df, generate_ms = timed(generate_dataset, SIZES[label], seed=args.seed)
+    df['film_id'] = np.arange(len(df))
+
+    def tables():
+        countries, film_country = build_country_tables(df)
+        _, film_company = build_company_tables(df)
+        return countries, film_country, film_company, build_country_matrix(film_country, len(df), len(countries))
+
+    (countries, film_country, film_company, country_matrix), tables_ms = timed(tables)
+    selected = countries['name'].tolist()
+    country_data = {'country_matrix': country_matrix, 'country_table': countries}
+
+    _, kpis_ms = timed(calculate_kpis, df, selected, 'France', film_company, **country_data)
+    _, coproduction_ms = timed(get_coproduction_matrix, df, selected, **country_data)
+    _, cube_ms = timed(lambda: build_year_index(build_cube(df, countries, film_country, film_company)))
+
+    mapping = canonical_names(df)
+    rng = np.random.default_rng(args.seed)
+    names = sorted(mapping)
+    sample = [names[i] for i in sorted(rng.choice(len(names), size=min(args.cluster_sample, len(names)), replace=False))]
+    clusters, cluster_ms = timed(ProductionCompanyNormalizer().cluster_similar_companies, sample, args.threshold)
+
+    return {
+        "size": label, "films": len(df), "countries": len(countries), "generate_ms": generate_ms,
+        "tables_ms": tables_ms, "kpis_ms": kpis_ms, "coproduction_ms": coproduction_ms, "cube_ms": cube_ms,
+        "cluster_names": len(sample), "cluster_ms": cluster_ms, "clusters": len(clusters),
+        "canonical": len({mapping[name] for name in sample}), "purity": cluster_purity(clusters, mapping)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la capa de datos del dashboard con datasets sintéticos")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["1k", "10k"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cluster-sample", type=int, default=2000,
+                        help="Nombres de productora a agrupar (el agrupamiento es cuadrático)")
+    parser.add_argument("--threshold", type=int, default=85, help="Umbral de similitud del agrupamiento")
+    parser.add_argument("--json", default=None, help="Fichero donde guardar los resultados en JSON")
+    args = parser.parse_args()
+
+    rows = [run_size(label, args) for label in args.sizes]
+
+    columns = ["size", "films", "generate_ms", "tables_ms", "kpis_ms", "coproduction_ms", "cube_ms",
+               "cluster_names", "cluster_ms", "clusters", "canonical", "purity"]
+    print("\n" + " ".join(f"{c:>15}" for c in columns))
+    for row in rows:
+        print(" ".join(f"{str(row[c]):>15}" for c in columns))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": rows}, f, indent=1)
+        print(f"\n💾 Resultados guardados en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
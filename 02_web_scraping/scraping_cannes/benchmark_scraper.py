@@ -0,0 +1,125 @@
+"""
+Benchmark de las descargas del scraper contra el servidor local de
+modules/mock_sites.py (sin tocar Wikipedia ni IMDb).
+
+Para cada modo de descarga (secuencial, hilos, async) se levanta el servidor
+con la misma latencia, errores 429/503 y límite de ancho de banda, se piden
+todas las páginas del sitio y se mide:
+    - rendimiento (páginas/s y MB/s)
+    - latencia por página (p50, p95, p99 y máximo)
+    - reintentos y errores
+    - corrección: cada página descargada es idéntica a la servida y los
+      países/productoras extraídos de las páginas de IMDb coinciden con los
+      esperados
+
+Uso:
+    python benchmark_scraper.py
+    python benchmark_scraper.py --films-per-year 50 --latency lognormal:0.1:0.6 --error-rate 0.05
+    python benchmark_scraper.py --from-archive --json datos_generados/benchmark_scraper.json
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from modules.fetch_modes import FETCH_MODES, DEFAULT_CONCURRENCY, fetch_urls
+from modules.imdb_page import parse_imdb_title_page
+from modules.mock_sites import MockSiteServer, build_fixture_site, fixtures_from_archive, mock_url
+from modules.page_archive import body_digest
+
+HEADERS = {"User-Agent": "cannes-scraper-benchmark"}
+
+
+def check_extraction(results, films, base_url):
+    """Proporción de páginas de título de IMDb cuya extracción coincide con lo esperado"""
+    expected = {mock_url(f"https://www.imdb.com/title/{film['imdb_id']}/", base_url): film for film in films}
+    checked = ok = 0
+    for result in results:
+        film = expected.get(result["url"])
+        if film is None or result["body"] is None:
+            continue
+        checked += 1
+        page = parse_imdb_title_page(result["body"])
+        ok += page["countries"] == film["countries"] and page["companies"] == film["companies"]
+    return ok / checked if checked else None
+
+
+def run_mode(mode, pages, films, args):
+    """Descarga todo el sitio en un modo y devuelve sus métricas"""
+    server = MockSiteServer(
+        pages, latency=args.latency, error_rate=args.error_rate,
+        bandwidth=args.bandwidth, seed=args.seed
+    )
+    with server:
+        urls = [mock_url(url, server.base_url) for url in pages]
+        expected = {mock_url(url, server.base_url): (status, body_digest(body)) for url, (status, body) in pages.items()}
+
+        start = time.perf_counter()
+        results = fetch_urls(urls, mode=mode, headers=HEADERS, concurrency=args.concurrency)
+        wall = time.perf_counter() - start
+
+    latencies = np.array([r["elapsed"] for r in results]) * 1000
+    correct = sum(
+        r["body"] is not None and (r["status"], body_digest(r["body"])) == expected[r["url"]]
+        for r in results
+    )
+    downloaded = sum(len(r["body"].encode("utf-8")) for r in results if r["body"] is not None)
+    return {
+        "mode": mode,
+        "pages": len(results),
+        "wall_s": round(wall, 3),
+        "pages_per_s": round(len(results) / wall, 1),
+        "mb_per_s": round(downloaded / wall / 1e6, 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 1),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 1),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 1),
+        "max_ms": round(float(latencies.max()), 1),
+        "retries": sum(r["attempts"] - 1 for r in results),
+        "injected_errors": server.stats["injected_errors"],
+        "errors": sum(r["error"] is not None for r in results),
+        "correct": round(correct / len(results), 4),
+        "extraction_ok": check_extraction(results, films, server.base_url)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de descargas contra el servidor local")
+    parser.add_argument("--modes", nargs="+", choices=list(FETCH_MODES), default=list(FETCH_MODES))
+    parser.add_argument("--films-per-year", type=int, default=20)
+    parser.add_argument("--page-padding", type=int, default=50_000, help="Bytes de relleno por página sintética")
+    parser.add_argument("--from-archive", action="store_true", help="Usar las páginas grabadas en el archivo de páginas")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--latency", default="lognormal:0.05:0.5", help="none | const:S | uniform:MIN:MAX | lognormal:MEDIANA:SIGMA")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Proporción de respuestas 429/503")
+    parser.add_argument("--bandwidth", type=float, default=None, help="Límite de bytes/s por respuesta")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, help="Fichero donde guardar los resultados en JSON")
+    args = parser.parse_args()
+
+    if args.from_archive:
+        pages, films = fixtures_from_archive(), []
+    else:
+        pages, films = build_fixture_site(args.films_per_year, page_padding=args.page_padding, seed=args.seed)
+    print(f"🧪 {len(pages)} páginas, latencia {args.latency}, errores {args.error_rate:.0%}, concurrencia {args.concurrency}")
+
+    rows = []
+    for mode in args.modes:
+        try:
+            rows.append(run_mode(mode, pages, films, args))
+        except ImportError as e:
+            print(f"⚠️ {mode}: {e}")
+
+    columns = ["mode", "pages_per_s", "mb_per_s", "p50_ms", "p95_ms", "p99_ms", "max_ms", "retries", "errors", "correct", "extraction_ok"]
+    print("\n" + " ".join(f"{c:>13}" for c in columns))
+    for row in rows:
+        print(" ".join(f"{str(row[c]):>13}" for c in columns))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": rows}, f, indent=1)
+        print(f"\n💾 Resultados guardados en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
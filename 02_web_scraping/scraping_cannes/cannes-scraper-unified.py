@@ -17,7 +17,7 @@ El script realiza las siguientes tareas:
 7. Guarda el resultado en un archivo Excel.
 8. Maneja errores y excepciones durante el proceso de scraping y enriquecimiento.
 9. Utiliza un normalizador de nombres de productoras para evitar duplicados y errores de escritura.
-10. Añade emojis de banderas para los países de origen de las películas.
+10. Resuelve los países de origen a códigos ISO alfa-3 (las banderas se derivan de ellos).
 11. Permite la configuración de años a extraer y URLs base para Wikipedia.
 12. Utiliza BeautifulSoup para el scraping de datos y pandas para la manipulación de datos.
 nECESITA instalar las librerías: requests, pandas, beautifulsoup4, openpyxl y company_normalizer
@@ -30,12 +30,27 @@ Fecha: Abril 2025
 import requests
 from bs4 import BeautifulSoup
 import pandas as pd
+import argparse
 import time
 import re
 import os
+from concurrent.futures import ProcessPoolExecutor
 from urllib.parse import quote
 from pathlib import Path
 from company_normalizer import ProductionCompanyNormalizer  # Importamos el normalizador (definido en segundo archivo)
+from modules.data_model import build_company_tables_from_lists, build_country_tables_from_lists
+from modules.countries import get_resolver, country_label
+from modules.imdb_offline import resolve_imdb_ids_offline
+from modules.imdb_page import parse_imdb_title_page
+from modules.negative_cache import NegativeCache, NOT_FOUND, PARSE_FAILURE, failure_reason
+from modules.page_archive import PageArchive, body_digest
+from modules.parse_cache import ParseCache, MISSING
+from modules.mock_sites import mock_url
+from modules.instrumentation import Tracer, install_connect_timer, pop_connect_time
+from modules.pipeline_logging import get_logger, setup_logging, shutdown_logging, Progress
+
+# Mensajes del pipeline: por película en DEBUG, etapas en INFO (ver modules/pipeline_logging.py)
+log = get_logger("scraper")
 
 # Constantes
 YEARS = list(range(2015, 2024))
@@ -45,50 +60,91 @@ HEADERS = {
     "Accept-Language": "en-US,en;q=0.9"
 }
 
-# Lista de países con emojis de banderas
-COUNTRY_EMOJIS = {
-    "Spain": "🇪🇸 Spain",
-    "España": "🇪🇸 Spain",
-    "France": "🇫🇷 France",
-    "Francia": "🇫🇷 France",
-    "USA": "🇺🇸 USA",
-    "United States": "🇺🇸 USA",
-    "Estados Unidos": "🇺🇸 USA",
-    "Italy": "🇮🇹 Italy",
-    "Italia": "🇮🇹 Italy",
-    "Japan": "🇯🇵 Japan",
-    "Japón": "🇯🇵 Japan",
-    "South Korea": "🇰🇷 South Korea",
-    "Corea del Sur": "🇰🇷 South Korea",
-    "United Kingdom": "🇬🇧 United Kingdom",
-    "Reino Unido": "🇬🇧 United Kingdom",
-    "UK": "🇬🇧 United Kingdom",
-    "Mexico": "🇲🇽 Mexico",
-    "México": "🇲🇽 Mexico",
-    "Canada": "🇨🇦 Canada",
-    "Canadá": "🇨🇦 Canada",
-    "Denmark": "🇩🇰 Denmark",
-    "Dinamarca": "🇩🇰 Denmark",
-    "Switzerland": "🇨🇭 Switzerland",
-    "Suiza": "🇨🇭 Switzerland",
-    "Turkey": "🇹🇷 Turkey",
-    "Turquía": "🇹🇷 Turkey",
-    "Iran": "🇮🇷 Iran",
-    "Irán": "🇮🇷 Iran",
-    "Germany": "🇩🇪 Germany",
-    "Alemania": "🇩🇪 Germany",
-    "Austria": "🇦🇹 Austria",
-    "Belgium": "🇧🇪 Belgium",
-    "Bélgica": "🇧🇪 Belgium",
-    "Brazil": "🇧🇷 Brazil",
-    "Brasil": "🇧🇷 Brazil",
-    "China": "🇨🇳 China",
-    "Russia": "🇷🇺 Russia",
-    "Rusia": "🇷🇺 Russia",
-    "Sweden": "🇸🇪 Sweden",
-    "Suecia": "🇸🇪 Sweden"
+# Columna de texto de cada fuente de productoras -> columna con la lista de esa fuente
+COMPANY_LIST_COLUMNS = {
+    "production_company_wiki": "production_company_wiki_list",
+    "production_company_wiki_page": "production_company_wiki_page_list",
+    "imdb_production_companies": "imdb_production_companies_list"
 }
 
+# Resolvedor de países: índice de alias (pycountry + variantes en inglés/español)
+# construido una sola vez, con búsqueda exacta O(1) y pasada Aho-Corasick para texto libre
+COUNTRY_RESOLVER = get_resolver()
+
+# Archivo append-only con cada respuesta descargada (datos_generados/archivo_paginas)
+PAGE_ARCHIVE = PageArchive()
+# Modo offline (comando reextract): las páginas se sirven desde el archivo, sin red ni pausas
+OFFLINE = {"enabled": False, "pages": {}}
+# Servidor local de pruebas (python -m modules.mock_sites) en lugar de Wikipedia e IMDb,
+# p. ej. CANNES_MOCK_URL=http://127.0.0.1:8765: sin archivo de páginas ni pausas
+MOCK_BASE_URL = os.environ.get("CANNES_MOCK_URL")
+# Tiempos por etapa y por petición (resumen y traza JSON al final de main)
+TRACER = Tracer()
+# Resultados de los extractores por (extractor, versión, hash del contenido), en
+# datos_generados/parse_cache.sqlite: las páginas sin cambios no se vuelven a parsear
+PARSE_CACHE = ParseCache()
+
+def fetch_page(url):
+    """
+    GET de una página con las cabeceras del scraper.
+    
+    Online, cada respuesta se añade a PAGE_ARCHIVE; en modo offline la página se
+    sirve desde el archivo. En ambos casos se devuelve un requests.Response y,
+    como en cualquier modo se llama a raise_for_status, un estado HTTP de error
+    lanza requests.exceptions.HTTPError.
+    """
+    if OFFLINE["enabled"]:
+        record = OFFLINE["pages"].get(url)
+        if record is None:
+            TRACER.count("archive_miss")
+            raise requests.exceptions.ConnectionError(f"{url} no está en el archivo de páginas")
+        TRACER.count("archive_hit")
+        TRACER.record_request(
+            url, extractor_for_url(url), record["status"],
+            connect=0.0, ttfb=0.0, download=0.0, size=len(record["body"]), source="archive"
+        )
+        response = requests.Response()
+        response.url = url
+        response.status_code = record["status"]
+        response._content = record["body"].encode("utf-8")
+        response.encoding = "utf-8"
+        response.raise_for_status()
+        return response
+    
+    request_url = mock_url(url, MOCK_BASE_URL) if MOCK_BASE_URL else url
+    
+    # stream=True separa el tiempo hasta las cabeceras (TTFB) de la descarga del cuerpo
+    pop_connect_time()
+    start = time.perf_counter()
+    response = requests.get(request_url, headers=HEADERS, timeout=10, stream=True)
+    headers_at = time.perf_counter()
+    body = response.content
+    end = time.perf_counter()
+    connect = pop_connect_time()
+    TRACER.record_request(
+        url, extractor_for_url(url), response.status_code,
+        connect=connect, ttfb=headers_at - start - connect, download=end - headers_at, size=len(body)
+    )
+    
+    if not MOCK_BASE_URL:
+        PAGE_ARCHIVE.append(url, response.text, response.status_code)
+    response.raise_for_status()
+    return response
+
+def polite_pause(seconds):
+    """Pausa entre peticiones para no sobrecargar el servidor (no se aplica offline ni contra el servidor local)"""
+    if not OFFLINE["enabled"] and not MOCK_BASE_URL:
+        TRACER.wait(seconds)
+        time.sleep(seconds)
+
+def format_country_codes(codes):
+    """Devuelve los códigos ISO como cadena 'ESP, FRA' para guardarlos en el Excel"""
+    return ", ".join(codes)
+
+def format_country_emoji(codes):
+    """Etiquetas con bandera ('🇪🇸 Spain, 🇫🇷 France') derivadas de los códigos ISO"""
+    return ", ".join(country_label(code) for code in codes)
+
 def clean_movie_title(title):
     """
     Limpia el título de la película eliminando texto entre paréntesis 
@@ -105,151 +161,226 @@ def clean_movie_title(title):
     
     return clean_title
 
-def extract_films_and_companies_from_wiki():
+def cell_entries(cell):
+    """
+    Entradas de una celda de Wikipedia (enlaces, líneas <br>, elementos de lista).
+    
+    Los límites vienen del marcado, no de las comas: "Le Pacte, S.A." sigue
+    siendo una sola productora.
+    """
+    entries = (text.strip(" ,;/·") for text in cell.stripped_strings)
+    return list(dict.fromkeys(entry for entry in entries if entry))
+
+def extract_wiki_year_page(html):
+    """
+    Filas de las tablas de películas de la página de Wikipedia de un año del festival.
+    
+    Args:
+        html: HTML de https://en.wikipedia.org/wiki/<año>_Cannes_Film_Festival
+        
+    Returns:
+        dict con 'tables' (nº de tablas wikitable), 'valid_tables' (tablas con
+        títulos de películas) y 'films' (lista de dicts con title, director,
+        countries, production_company_wiki (lista de productoras) y film_wiki_url)
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    tables = soup.find_all("table", class_="wikitable")
+    
+    films = []
+    tablas_validas = 0
+    
+    for table in tables:
+        headers = [th.get_text(strip=True).lower() for th in table.find_all("th")]
+        
+        # Verificar si la tabla contiene datos de películas
+        if not any("film" in h or "title" in h for h in headers):
+            continue
+        
+        tablas_validas += 1
+        
+        for row in table.find_all("tr")[1:]:
+            cols = row.find_all(["td", "th"])
+            if len(cols) < 2:
+                continue
+            
+            # Extraer título de la película
+            film_elem = cols[0]
+            film = film_elem.get_text(strip=True)
+            
+            # Intentar extraer enlace a Wikipedia para la película
+            film_link = film_elem.find("a")
+            film_wiki_url = ""
+            if film_link and "href" in film_link.attrs:
+                href = film_link["href"]
+                if href.startswith("/wiki/"):
+                    film_wiki_url = f"https://en.wikipedia.org{href}"
+                    
+            # Si no hay enlace directo, construir uno basado en el título
+            if not film_wiki_url:
+                film_url = film.replace(" ", "_")
+                film_wiki_url = f"https://en.wikipedia.org/wiki/{film_url}"
+            
+            # Extraer director
+            director = cols[1].get_text(strip=True) if len(cols) > 1 else ""
+            
+            # Buscar columna de países si existe
+            countries = ""
+            for i, h in enumerate(headers):
+                if "country" in h and i < len(cols):
+                    countries = cols[i].get_text(strip=True)
+            
+            # Extraer productoras si existe una columna relevante en la tabla de la lista
+            # ("Production country" es la columna de países, no de productoras)
+            production_company_table = []
+            for i, h in enumerate(headers):
+                if ("production" in h or "studio" in h) and "country" not in h and i < len(cols):
+                    production_company_table = cell_entries(cols[i])
+            
+            films.append({
+                "title": film,
+                "director": director,
+                "countries": countries,
+                "production_company_wiki": production_company_table,
+                "film_wiki_url": film_wiki_url
+            })
+    
+    return {"tables": len(tables), "valid_tables": tablas_validas, "films": films}
+
+def extract_wiki_infobox(html):
+    """
+    Productora del infobox de la página de Wikipedia de una película.
+    
+    Returns:
+        list con las productoras ([] si el infobox no tiene esa fila) o None si
+        la página no tiene infobox
+    """
+    wiki_soup = BeautifulSoup(html, "html.parser")
+    infobox = wiki_soup.find("table", class_="infobox vevent")
+    if not infobox:
+        return None
+    
+    for info_row in infobox.find_all("tr"):
+        th = info_row.find("th")
+        td = info_row.find("td")
+        if th and td:
+            label = th.get_text(strip=True).lower()
+            if "production" in label or "studio" in label or "productora" in label:
+                return cell_entries(td)
+    return []
+
+def extract_films_and_companies_from_wiki(negative_cache=None):
     """
     Extrae la lista de películas del Festival de Cannes entre 2015-2023 desde Wikipedia
     y obtiene información de productoras directamente de cada página de película en una sola pasada.
     
+    Args:
+        negative_cache: NegativeCache con las páginas de película sin productora conocidas
+            (se omiten sin hacer la petición)
+    
     Returns:
         DataFrame con información básica de las películas y sus productoras
     """
-    print("🌐 Iniciando extracción unificada de películas y productoras de Wikipedia...")
+    log.info("🌐 Iniciando extracción unificada de películas y productoras de Wikipedia...")
+    
+    if negative_cache is None:
+        negative_cache = NegativeCache(path=None)
     
     data = []
+    # El total crece a medida que se conocen las películas de cada año
+    progress = Progress(0, "Wikipedia", log)
     
     for year in YEARS:
-        print(f"\nProcesando {year}...")
+        log.info("Procesando %s...", year)
         wiki_title = f"{year}_Cannes_Film_Festival"
         url = BASE_WIKI_URL.format(wiki_title)
         
         try:
-            response = requests.get(url, headers=HEADERS, timeout=10)
-            response.raise_for_status()  # Levantar excepción si hay error HTTP
+            response = fetch_page(url)
             
         except requests.exceptions.RequestException as e:
-            print(f"❌ Error al acceder a {url}: {e}")
+            log.warning("❌ Error al acceder a %s: %s", url, e, extra={"url": url, "year": year})
             continue
         
-        soup = BeautifulSoup(response.text, "html.parser")
-        tables = soup.find_all("table", class_="wikitable")
+        page = run_extractor("wiki_year", response.text)
+        progress.add_total(len(page["films"]))
         
-        if not tables:
-            print(f"⚠️ No se encontraron tablas relevantes en {url}")
+        if not page["tables"]:
+            log.warning("⚠️ No se encontraron tablas relevantes en %s", url, extra={"url": url, "year": year})
             continue
         
-        tablas_validas = 0
-        
-        for table in tables:
-            headers = [th.get_text(strip=True).lower() for th in table.find_all("th")]
+        for film_row in page["films"]:
+            film = film_row["title"]
+            film_wiki_url = film_row["film_wiki_url"]
             
-            # Verificar si la tabla contiene datos de películas
-            if not any("film" in h or "title" in h for h in headers):
-                continue
+            # Resolver los países a códigos ISO alfa-3 con el índice de alias
+            country_codes = COUNTRY_RESOLVER.resolve_list(film_row["countries"])
             
-            tablas_validas += 1
+            # FASE NUEVA: Obtener productoras directamente de la página de la película
+            production_company_wiki_page = []
+            dead_reason = negative_cache.is_dead("wiki_infobox", film_wiki_url) if film_wiki_url else None
+            if dead_reason:
+                log.debug("⏭️ %s (%s): página sin productora conocida (%s), se omite", film, year, dead_reason,
+                          extra={"film": film, "year": year, "reason": dead_reason})
+            elif film_wiki_url:
+                log.debug("🔎 Accediendo a la página de %s (%s)", film, year, extra={"film": film, "year": year})
+                try:
+                    # Realizar solicitud a la página de la película
+                    wiki_response = fetch_page(film_wiki_url)
+                    
+                    # Buscar en el infobox
+                    infobox_companies = run_extractor("wiki_infobox", wiki_response.text)
+                    
+                    if infobox_companies is None:
+                        negative_cache.record("wiki_infobox", film_wiki_url, PARSE_FAILURE)
+                    elif infobox_companies:
+                        production_company_wiki_page = infobox_companies
+                        negative_cache.forget("wiki_infobox", film_wiki_url)
+                        log.debug("✅ Productora encontrada: %s", ", ".join(production_company_wiki_page),
+                                  extra={"film": film, "year": year, "companies": production_company_wiki_page})
+                    else:
+                        negative_cache.record("wiki_infobox", film_wiki_url, NOT_FOUND)
+                    
+                    # Pausa breve para no sobrecargar Wikipedia
+                    polite_pause(1)
+                    
+                except Exception as e:
+                    log.warning("❌ Error al acceder a la página de la película %s: %s", film_wiki_url, e,
+                                extra={"film": film, "year": year, "url": film_wiki_url})
+                    negative_cache.record("wiki_infobox", film_wiki_url, failure_reason(e))
             
-            for row in table.find_all("tr")[1:]:
-                cols = row.find_all(["td", "th"])
-                if len(cols) < 2:
-                    continue
-                
-                # Extraer título de la película
-                film_elem = cols[0]
-                film = film_elem.get_text(strip=True)
-                
-                # Intentar extraer enlace a Wikipedia para la película
-                film_link = film_elem.find("a")
-                film_wiki_url = ""
-                if film_link and "href" in film_link.attrs:
-                    href = film_link["href"]
-                    if href.startswith("/wiki/"):
-                        film_wiki_url = f"https://en.wikipedia.org{href}"
-                        
-                # Si no hay enlace directo, construir uno basado en el título
-                if not film_wiki_url:
-                    film_url = film.replace(" ", "_")
-                    film_wiki_url = f"https://en.wikipedia.org/wiki/{film_url}"
-                
-                # Extraer director
-                director = cols[1].get_text(strip=True) if len(cols) > 1 else ""
-                
-                # Buscar columna de países si existe
-                countries = ""
-                for i, h in enumerate(headers):
-                    if "country" in h and i < len(cols):
-                        countries = cols[i].get_text(strip=True)
-                
-                # Identificar país (España, Francia o USA)
-                country_flag = ""
-                for country_key, emoji_country in COUNTRY_EMOJIS.items():
-                    if country_key in countries:
-                        if not country_flag:  # Añadimos el primero que encontremos
-                            country_flag = emoji_country
-                        else:  # Si ya hay uno, añadimos coma y el nuevo
-                            country_flag += f", {emoji_country}"
-                
-                # Extraer productoras si existe una columna relevante en la tabla de la lista
-                production_company_table = ""
-                for i, h in enumerate(headers):
-                    if ("production" in h or "studio" in h) and i < len(cols):
-                        production_company_table = cols[i].get_text(strip=True)
-                
-                # FASE NUEVA: Obtener productoras directamente de la página de la película
-                production_company_wiki_page = ""
-                if film_wiki_url:
-                    print(f"🔎 Accediendo a la página de {film} ({year})")
-                    try:
-                        # Realizar solicitud a la página de la película
-                        wiki_response = requests.get(film_wiki_url, headers=HEADERS, timeout=10)
-                        wiki_response.raise_for_status()
-                        
-                        # Parsear y buscar en el infobox
-                        wiki_soup = BeautifulSoup(wiki_response.text, "html.parser")
-                        infobox = wiki_soup.find("table", class_="infobox vevent")
-                        
-                        if infobox:
-                            for info_row in infobox.find_all("tr"):
-                                th = info_row.find("th")
-                                td = info_row.find("td")
-                                if th and td:
-                                    label = th.get_text(strip=True).lower()
-                                    if "production" in label or "studio" in label or "productora" in label:
-                                        production_company_wiki_page = td.get_text(separator=", ", strip=True)
-                                        print(f"✅ Productora encontrada: {production_company_wiki_page}")
-                                        break
-                        
-                        # Pausa breve para no sobrecargar Wikipedia
-                        time.sleep(1)
-                        
-                    except Exception as e:
-                        print(f"❌ Error al acceder a la página de la película {film_wiki_url}: {e}")
-                
-                # Añadir datos a la lista
-                data.append({
-                    "year": year,
-                    "title": film,
-                    "director": director,
-                    "countries": countries,
-                    "section": "Official Selection (Wikipedia)",
-                    "country_emoji": country_flag,
-                    "production_company_wiki": production_company_table,
-                    "production_company_wiki_page": production_company_wiki_page,
-                    "film_wiki_url": film_wiki_url
-                })
-        
-        if tablas_validas == 0:
-            print(f"⚠️ No se encontró ninguna tabla con títulos de películas en {url}")
+            # Añadir datos a la lista
+            data.append({
+                "year": year,
+                "title": film,
+                "director": film_row["director"],
+                "countries": film_row["countries"],
+                "section": "Official Selection (Wikipedia)",
+                "country_codes": format_country_codes(country_codes),
+                "country_emoji": format_country_emoji(country_codes),
+                "production_company_wiki": ", ".join(film_row["production_company_wiki"]),
+                "production_company_wiki_page": ", ".join(production_company_wiki_page),
+                # Listas por fuente: son las que se usan para la tabla puente
+                COMPANY_LIST_COLUMNS["production_company_wiki"]: film_row["production_company_wiki"],
+                COMPANY_LIST_COLUMNS["production_company_wiki_page"]: production_company_wiki_page,
+                "film_wiki_url": film_wiki_url
+            })
+            progress.update()
+        
+        if page["valid_tables"] == 0:
+            log.warning("⚠️ No se encontró ninguna tabla con títulos de películas en %s", url, extra={"url": url, "year": year})
         
         # Pausa para no sobrecargar el servidor
-        time.sleep(1)
+        polite_pause(1)
+    
+    progress.close()
     
     # Crear DataFrame con todos los datos recopilados
     if data:
         films_df = pd.DataFrame(data)
-        print(f"✅ Se extrajeron datos de {len(films_df)} películas con sus productoras")
+        log.info("✅ Se extrajeron datos de %d películas con sus productoras", len(films_df))
         return films_df
     else:
-        print("❌ No se encontraron datos de películas")
+        log.error("❌ No se encontraron datos de películas")
         return pd.DataFrame()
     """
     Enriquece el DataFrame con las productoras extraídas de las páginas de Wikipedia
@@ -306,17 +437,76 @@ def extract_films_and_companies_from_wiki():
     
     return df
 
-def search_imdb_id(title, year=None):
+def imdb_search_key(title, year=None):
+    """Clave de una búsqueda en IMDb para la caché negativa"""
+    return f"{clean_movie_title(title).lower()}|{year or ''}"
+
+def extract_imdb_search(html):
+    """
+    Candidatos de una búsqueda de IMDb, en el orden de la página.
+    
+    Returns:
+        Lista de dicts con imdb_id, title y year (None si no aparecen)
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    candidates = []
+    
+    for result in soup.select("li.find-title-result"):
+        # Extraer título y enlace
+        title_elem = result.select_one(".ipc-metadata-list-summary-item__t")
+        link = title_elem if title_elem is not None and title_elem.get("href") else result.select_one("a[href*='/title/']")
+        imdb_id_match = re.search(r'/title/(tt\d+)/', link.get("href", "")) if link is not None else None
+        
+        # Extraer año si está disponible
+        year_match = re.search(r'\((\d{4})\)', result.text)
+        
+        candidates.append({
+            "imdb_id": imdb_id_match.group(1) if imdb_id_match else None,
+            "title": title_elem.text.strip() if title_elem is not None else None,
+            "year": int(year_match.group(1)) if year_match else None
+        })
+    
+    return candidates
+
+def pick_imdb_candidate(candidates, clean_title, year=None):
+    """
+    ID de IMDb del candidato que coincide con el título (y el año ±1); si ninguno
+    coincide, el del primer resultado.
+    """
+    for candidate in candidates:
+        result_title = candidate["title"]
+        result_year = candidate["year"]
+        if not result_title or not candidate["imdb_id"]:
+            continue
+        
+        # Verificar coincidencia - usar el título limpio para comparación
+        if (not year or not result_year or abs(int(year) - result_year) <= 1) and \
+           (result_title.lower() in clean_title.lower() or clean_title.lower() in result_title.lower()):
+            return candidate["imdb_id"]
+    
+    # Si no encontramos coincidencia exacta, probar con el primer resultado
+    if candidates:
+        return candidates[0]["imdb_id"]
+    return None
+
+def search_imdb_id(title, year=None, negative_cache=None):
     """
     Busca una película en IMDb y devuelve su ID.
     
     Args:
         title: Título de la película
         year: Año de la película (opcional)
+        negative_cache: NegativeCache donde consultar/registrar las búsquedas sin resultado
         
     Returns:
         ID de IMDb o None si no se encuentra
     """
+    if negative_cache is None:
+        negative_cache = NegativeCache(path=None)
+    cache_key = imdb_search_key(title, year)
+    if negative_cache.is_dead("imdb_search", cache_key):
+        return None
+    
     # Limpiar el título para eliminar texto adicional
     clean_title = clean_movie_title(title)
     
@@ -328,343 +518,511 @@ def search_imdb_id(title, year=None):
     search_url = f"https://www.imdb.com/find/?q={encoded_query}&s=tt&exact=true&ref_=fn_tt_ex"
     
     try:
-        response = requests.get(search_url, headers=HEADERS, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
+        response = fetch_page(search_url)
         
-        # Buscar resultados de películas
-        results = soup.select("li.find-title-result")
+        imdb_id = pick_imdb_candidate(run_extractor("imdb_search", response.text), clean_title, year)
+        if imdb_id:
+            negative_cache.forget("imdb_search", cache_key)
+            return imdb_id
         
-        for result in results:
-            # Extraer título y año
-            title_elem = result.select_one(".ipc-metadata-list-summary-item__t")
-            if not title_elem:
-                continue
-                
-            result_title = title_elem.text.strip()
-            
-            # Extraer año si está disponible
-            year_match = re.search(r'\((\d{4})\)', result.text)
-            result_year = int(year_match.group(1)) if year_match else None
-            
-            # Verificar coincidencia - usar el título limpio para comparación
-            if (not year or not result_year or abs(int(year) - result_year) <= 1) and \
-               (result_title.lower() in clean_title.lower() or clean_title.lower() in result_title.lower()):
-                
-                # Extraer ID de IMDb
-                link = title_elem.get("href", "")
-                imdb_id_match = re.search(r'/title/(tt\d+)/', link)
-                if imdb_id_match:
-                    return imdb_id_match.group(1)
-        
-        # Si no encontramos coincidencia exacta, probar con el primer resultado
-        if results:
-            first_result = results[0]
-            link = first_result.select_one("a[href*='/title/']")
-            if link:
-                imdb_id_match = re.search(r'/title/(tt\d+)/', link.get("href", ""))
-                if imdb_id_match:
-                    return imdb_id_match.group(1)
-                    
+        negative_cache.record("imdb_search", cache_key, NOT_FOUND)
         return None
         
     except Exception as e:
-        print(f"Error buscando '{clean_title}' en IMDb: {e}")
+        log.warning("Error buscando '%s' en IMDb: %s", clean_title, e, extra={"film": title, "year": year})
+        negative_cache.record("imdb_search", cache_key, failure_reason(e))
         return None
 
-def scrape_imdb_for_production_companies(imdb_id):
+def extract_imdb_companies(html):
+    """
+    Productoras de la página /companycredits de IMDb.
+    
+    Returns:
+        Lista de nombres de compañías o None si la página no tiene la sección
+        de productoras
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    
+    # Buscar la sección "Production Companies"
+    production_section = None
+    
+    # Método 1: buscar por encabezado
+    for header in soup.find_all(["h2", "h3", "h4"]):
+        if "Production" in header.text and "Companies" in header.text:
+            production_section = header.find_next("ul")
+            break
+            
+    # Método 2: buscar por ID o clase específica
+    if not production_section:
+        production_section = soup.select_one("#production")
+        
+    # Método 3: buscar por la estructura general
+    if not production_section:
+        sections = soup.select(".ipc-metadata-list")
+        for section in sections:
+            header = section.select_one(".ipc-metadata-list-item__label")
+            if header and "Production compan" in header.text.lower():
+                production_section = section
+                break
+    
+    if not production_section:
+        return None
+    
+    # Extraer compañías
+    production_companies = []
+    company_items = production_section.select("li")
+    
+    if not company_items:  # Estructura alternativa
+        company_items = production_section.select(".ipc-metadata-list-item")
+    
+    for item in company_items:
+        company_link = item.select_one("a")
+        if company_link:
+            production_companies.append(company_link.text.strip())
+    
+    return production_companies
+
+def scrape_imdb_for_production_companies(imdb_id, negative_cache=None):
     """
     Extrae información de compañías productoras desde IMDb.
     
     Args:
         imdb_id: ID de IMDb de la película
+        negative_cache: NegativeCache donde consultar/registrar las páginas sin productoras
         
     Returns:
         Lista de nombres de compañías productoras
     """
     if not imdb_id:
         return []
+    if negative_cache is None:
+        negative_cache = NegativeCache(path=None)
+    if negative_cache.is_dead("imdb_companies", imdb_id):
+        return []
         
     url = f"https://www.imdb.com/title/{imdb_id}/companycredits"
     
     try:
-        response = requests.get(url, headers=HEADERS, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
+        response = fetch_page(url)
         
-        production_companies = []
+        production_companies = run_extractor("imdb_companies", response.text)
         
-        # Buscar la sección "Production Companies"
-        production_section = None
-        
-        # Método 1: buscar por encabezado
-        for header in soup.find_all(["h2", "h3", "h4"]):
-            if "Production" in header.text and "Companies" in header.text:
-                production_section = header.find_next("ul")
-                break
-                
-        # Método 2: buscar por ID o clase específica
-        if not production_section:
-            production_section = soup.select_one("#production")
-            
-        # Método 3: buscar por la estructura general
-        if not production_section:
-            sections = soup.select(".ipc-metadata-list")
-            for section in sections:
-                header = section.select_one(".ipc-metadata-list-item__label")
-                if header and "Production compan" in header.text.lower():
-                    production_section = section
-                    break
-        
-        # Extraer compañías
-        if production_section:
-            company_items = production_section.select("li")
-            
-            if not company_items:  # Estructura alternativa
-                company_items = production_section.select(".ipc-metadata-list-item")
-            
-            for item in company_items:
-                company_link = item.select_one("a")
-                if company_link:
-                    company_name = company_link.text.strip()
-                    production_companies.append(company_name)
+        if production_companies is None:
+            negative_cache.record("imdb_companies", imdb_id, PARSE_FAILURE)
+            return []
+        if production_companies:
+            negative_cache.forget("imdb_companies", imdb_id)
+        else:
+            negative_cache.record("imdb_companies", imdb_id, NOT_FOUND)
         
         return production_companies
         
     except Exception as e:
-        print(f"Error obteniendo productoras para {imdb_id}: {e}")
+        log.warning("Error obteniendo productoras para %s: %s", imdb_id, e, extra={"imdb_id": imdb_id})
+        negative_cache.record("imdb_companies", imdb_id, failure_reason(e))
         return []
 
-def scrape_imdb_for_countries(imdb_id):
+def parse_imdb_countries_html(soup):
+    """
+    Países de origen según los selectores HTML de la página principal de IMDb
+    (alternativa cuando la página no trae el JSON embebido).
+    
+    Args:
+        soup: BeautifulSoup de la página principal del título
+        
+    Returns:
+        Lista de países
+    """
+    countries = []
+    
+    # Método 1: Buscar en los metadatos principales
+    metadata_blocks = soup.select(".ipc-metadata-list")
+    for block in metadata_blocks:
+        header = block.select_one(".ipc-metadata-list-item__label")
+        if header and ("Countries of origin" in header.text or "Country of origin" in header.text):
+            country_elements = block.select(".ipc-metadata-list-item__list-content-item")
+            for element in country_elements:
+                countries.append(element.text.strip())
+            break
+    
+    # Método 2: Buscar en la sección "Details" de la página principal
+    if not countries:
+        details_section = soup.select_one("[data-testid='title-details-section']")
+        if details_section:
+            country_item = details_section.find(lambda tag: tag.name == "li" and "Country" in tag.text)
+            if country_item:
+                country_links = country_item.select("a")
+                for link in country_links:
+                    countries.append(link.text.strip())
+    
+    return countries
+
+def extract_imdb_technical(html):
+    """Países de origen de la página /technical/ de IMDb"""
+    details_soup = BeautifulSoup(html, "html.parser")
+    countries = []
+    
+    for item in details_soup.select(".technical-list li"):
+        label = item.select_one("h4")
+        if label and "Country" in label.text:
+            value = item.select_one("div")
+            if value:
+                for country in value.text.split(","):
+                    countries.append(country.strip())
+    
+    return countries
+
+def scrape_imdb_technical_countries(imdb_id, negative_cache=None):
     """
-    Extrae información de países desde IMDb.
+    Países de origen desde la página /technical/ de IMDb (último recurso).
     
     Args:
         imdb_id: ID de IMDb de la película
+        negative_cache: NegativeCache donde consultar/registrar las páginas inexistentes
         
     Returns:
         Lista de países
     """
-    if not imdb_id:
+    if negative_cache is None:
+        negative_cache = NegativeCache(path=None)
+    if negative_cache.is_dead("imdb_technical", imdb_id):
         return []
+    
+    countries = []
+    details_page = f"https://www.imdb.com/title/{imdb_id}/technical/"
+    try:
+        details_response = fetch_page(details_page)
+        countries = run_extractor("imdb_technical", details_response.text)
+        negative_cache.forget("imdb_technical", imdb_id)
+    except Exception as e:
+        log.warning("Error obteniendo detalles técnicos para %s: %s", imdb_id, e, extra={"imdb_id": imdb_id})
+        negative_cache.record("imdb_technical", imdb_id, failure_reason(e))
+    
+    return countries
+
+def extract_imdb_title(html):
+    """
+    Título, año, países y productoras de la página principal de un título de IMDb.
+    
+    Lee el JSON embebido (modules/imdb_page.py) y sólo monta el árbol HTML si
+    faltan los países.
+    
+    Returns:
+        dict con title, year, countries (lista) y companies (lista)
+    """
+    page = parse_imdb_title_page(html)
+    countries = page["countries"] or parse_imdb_countries_html(BeautifulSoup(html, "html.parser"))
+    return {
+        "title": page["title"],
+        "year": page["year"],
+        "countries": countries,
+        "companies": page["companies"]
+    }
+
+def scrape_imdb_title(imdb_id, negative_cache=None):
+    """
+    Extrae título, año, países y productoras de IMDb con una sola petición.
+    
+    Lee el JSON embebido (__NEXT_DATA__ / JSON-LD) de la página principal del
+    título (extract_imdb_title). Sólo si falta algún dato se recurre a
+    /technical/ (países) o /companycredits (productoras).
+    
+    Args:
+        imdb_id: ID de IMDb de la película
+        negative_cache: NegativeCache donde consultar/registrar las páginas fallidas
         
+    Returns:
+        dict con title, year, countries (lista) y companies (lista)
+    """
+    data = {"title": None, "year": None, "countries": [], "companies": []}
+    if not imdb_id:
+        return data
+    if negative_cache is None:
+        negative_cache = NegativeCache(path=None)
+    if negative_cache.is_dead("imdb_title", imdb_id):
+        return data
+    
     url = f"https://www.imdb.com/title/{imdb_id}/"
     
     try:
-        response = requests.get(url, headers=HEADERS, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        
-        countries = []
-        
-        # Método 1: Buscar en los metadatos principales
-        metadata_blocks = soup.select(".ipc-metadata-list")
-        for block in metadata_blocks:
-            header = block.select_one(".ipc-metadata-list-item__label")
-            if header and ("Countries of origin" in header.text or "Country of origin" in header.text):
-                country_elements = block.select(".ipc-metadata-list-item__list-content-item")
-                for element in country_elements:
-                    countries.append(element.text.strip())
-                break
-        
-        # Método 2: Buscar en la información técnica si está disponible
-        if not countries:
-            details_page = f"https://www.imdb.com/title/{imdb_id}/technical/"
-            try:
-                details_response = requests.get(details_page, headers=HEADERS, timeout=10)
-                details_response.raise_for_status()
-                details_soup = BeautifulSoup(details_response.text, "html.parser")
-                
-                for item in details_soup.select(".technical-list li"):
-                    label = item.select_one("h4")
-                    if label and "Country" in label.text:
-                        value = item.select_one("div")
-                        if value:
-                            for country in value.text.split(","):
-                                countries.append(country.strip())
-            except Exception as e:
-                print(f"Error obteniendo detalles técnicos para {imdb_id}: {e}")
-        
-        # Método 3: Buscar en la sección "Details" de la página principal
-        if not countries:
-            details_section = soup.select_one("[data-testid='title-details-section']")
-            if details_section:
-                country_item = details_section.find(lambda tag: tag.name == "li" and "Country" in tag.text)
-                if country_item:
-                    country_links = country_item.select("a")
-                    for link in country_links:
-                        countries.append(link.text.strip())
-        
-        return countries
-        
+        response = fetch_page(url)
     except Exception as e:
-        print(f"Error obteniendo países para {imdb_id}: {e}")
-        return []
+        log.warning("Error obteniendo la página de %s: %s", imdb_id, e, extra={"imdb_id": imdb_id})
+        negative_cache.record("imdb_title", imdb_id, failure_reason(e))
+        return data
+    
+    data.update(run_extractor("imdb_title", response.text))
+    negative_cache.forget("imdb_title", imdb_id)
+    
+    if not data["countries"] and not negative_cache.is_dead("imdb_countries", imdb_id):
+        data["countries"] = scrape_imdb_technical_countries(imdb_id, negative_cache)
+        if not data["countries"]:
+            # Ni el JSON ni los selectores encontraron el bloque de países
+            negative_cache.record("imdb_countries", imdb_id, PARSE_FAILURE)
+    if data["countries"]:
+        negative_cache.forget("imdb_countries", imdb_id)
+    
+    if not data["companies"]:
+        data["companies"] = scrape_imdb_for_production_companies(imdb_id, negative_cache)
+    
+    return data
+
+# Extractores de páginas: nombre -> (patrón de URL, función html -> resultado serializable, versión).
+# El orden importa: la página de un año del festival también es una página de Wikipedia.
+# Al cambiar lo que devuelve un extractor hay que subir su versión: sus resultados
+# guardados en PARSE_CACHE dejan de usarse y los de los demás se conservan
+EXTRACTORS = {
+    "wiki_year": (re.compile(r"wikipedia\.org/wiki/\d{4}_Cannes_Film_Festival$"), extract_wiki_year_page, 2),
+    "wiki_infobox": (re.compile(r"wikipedia\.org/wiki/"), extract_wiki_infobox, 2),
+    "imdb_search": (re.compile(r"imdb\.com/find"), extract_imdb_search, 1),
+    "imdb_companies": (re.compile(r"imdb\.com/title/tt\d+/companycredits"), extract_imdb_companies, 1),
+    "imdb_technical": (re.compile(r"imdb\.com/title/tt\d+/technical"), extract_imdb_technical, 1),
+    "imdb_title": (re.compile(r"imdb\.com/title/tt\d+/?$"), extract_imdb_title, 1),
+}
+
+def extractor_versions():
+    """Versión actual de cada extractor"""
+    return {name: version for name, (_, _, version) in EXTRACTORS.items()}
+
+def extractor_for_url(url):
+    """Nombre del extractor que corresponde a una URL (None si ninguno)"""
+    for name, (pattern, _, _) in EXTRACTORS.items():
+        if pattern.search(url):
+            return name
+    return None
+
+def run_extractor(name, html):
+    """
+    Resultado del extractor `name` para una página.
+    
+    Si el mismo contenido ya se extrajo con la misma versión del extractor
+    (en esta ejecución, en una anterior o en la fase paralela de reextract) se
+    devuelve el resultado guardado sin volver a parsear.
+    """
+    _, extract, version = EXTRACTORS[name]
+    start = time.perf_counter()
+    digest = body_digest(html)
+    result = PARSE_CACHE.get(name, version, digest)
+    cached = result is not MISSING
+    if not cached:
+        result = extract(html)
+        PARSE_CACHE.put(name, version, digest, result)
+    TRACER.record_parse(time.perf_counter() - start, cached)
+    return result
+
+def _extract_archived_page(job):
+    """Ejecuta un extractor sobre una página archivada (en un proceso de trabajo)"""
+    name, digest, body = job
+    return name, digest, EXTRACTORS[name][1](body)
+
+def reextract_archive(workers=None):
+    """
+    Vuelve a ejecutar los extractores sobre todas las páginas archivadas,
+    repartidas entre todos los núcleos, y deja los resultados en PARSE_CACHE.
+    
+    Sólo se parsean las páginas sin resultado para la versión actual de su
+    extractor: tras subir la versión de uno, sólo se repiten sus páginas.
+    
+    Args:
+        workers: Número de procesos (por defecto, uno por núcleo)
+        
+    Returns:
+        dict url -> último registro archivado (para servir las páginas offline)
+    """
+    pages = PAGE_ARCHIVE.latest()
+    versions = extractor_versions()
+    PARSE_CACHE.prune(versions)
+    
+    # Un trabajo por (extractor, contenido): las páginas repetidas se parsean una vez
+    jobs = {}
+    cached = 0
+    for url, record in pages.items():
+        name = extractor_for_url(url)
+        if not name or record["status"] != 200 or (name, record["digest"]) in jobs:
+            continue
+        if PARSE_CACHE.get(name, versions[name], record["digest"]) is not MISSING:
+            cached += 1
+            continue
+        jobs[(name, record["digest"])] = record["body"]
+    
+    log.info("🗄️ %d páginas archivadas: %d extracciones, %d ya en caché", len(pages), len(jobs), cached)
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            job_list = [(name, digest, body) for (name, digest), body in jobs.items()]
+            PARSE_CACHE.put_many(
+                (name, versions[name], digest, result)
+                for name, digest, result in executor.map(_extract_archived_page, job_list, chunksize=16)
+            )
+    
+    return pages
 
-def enrich_with_imdb_data(df):
+def enrich_with_imdb_data(df, negative_cache=None):
     """
     Enriquece el DataFrame con datos de IMDb: IDs, productoras y países.
     
     Args:
         df: DataFrame con los datos de las películas
+        negative_cache: NegativeCache con las búsquedas fallidas conocidas
+            (se omiten sin peticiones ni pausas)
         
     Returns:
         DataFrame actualizado con información de IMDb
     """
-    print("\n🎬 Enriqueciendo con datos de IMDb...")
+    log.info("🎬 Enriqueciendo con datos de IMDb...")
+    
+    if negative_cache is None:
+        negative_cache = NegativeCache(path=None)
     
     # Añadir columnas para IMDb si no existen
     if "imdb_id" not in df.columns:
         df["imdb_id"] = None
     if "imdb_production_companies" not in df.columns:
         df["imdb_production_companies"] = None
+    imdb_list_column = COMPANY_LIST_COLUMNS["imdb_production_companies"]
+    if imdb_list_column not in df.columns:
+        df[imdb_list_column] = [[] for _ in range(len(df))]
     if "imdb_countries" not in df.columns:
         df["imdb_countries"] = None
     
+    # Resolver en bloque los IDs con el índice local de los volcados de IMDb
+    # (python -m modules.imdb_offline <carpeta_volcados>); la búsqueda en vivo
+    # queda sólo para las películas que no se resuelven
+    missing = df["imdb_id"].isna() | (df["imdb_id"] == "")
+    offline_ids = resolve_imdb_ids_offline(df[missing])
+    if offline_ids is not None:
+        log.info("📦 IDs resueltos con el índice local: %d/%d", offline_ids.notna().sum(), missing.sum())
+    
     # Procesar cada película
+    progress = Progress(len(df), "IMDb", log)
     for i, row in df.iterrows():
         # Obtener el título original y mostrar también el título limpio
         original_title = row['title']
         clean_title = clean_movie_title(original_title)
         
-        print(f"\n📽️ Procesando {original_title} ({row['year']})...")
+        film_fields = {"film": original_title, "year": row["year"]}
+        log.debug("📽️ Procesando %s (%s)...", original_title, row["year"], extra=film_fields)
         if original_title != clean_title:
-            print(f"   → Título limpio para búsqueda: '{clean_title}'")
+            log.debug("   → Título limpio para búsqueda: '%s'", clean_title, extra=film_fields)
+        
+        search_key = imdb_search_key(original_title, row["year"])
         
         # Buscar ID de IMDb si no existe
         if pd.isna(df.at[i, "imdb_id"]) or df.at[i, "imdb_id"] == "":
-            imdb_id = search_imdb_id(original_title, row["year"])
+            imdb_id = offline_ids.get(i) if offline_ids is not None else None
+            if imdb_id:
+                # Resuelta con el índice local: la búsqueda fallida anterior ya no aplica
+                negative_cache.forget("imdb_search", search_key)
+            else:
+                dead_reason = negative_cache.is_dead("imdb_search", search_key)
+                if dead_reason:
+                    # Búsqueda fallida conocida: sin peticiones ni pausa
+                    log.debug("⏭️ Sin coincidencia conocida en IMDb (%s), se omite", dead_reason, extra=film_fields)
+                    progress.update()
+                    continue
+                imdb_id = search_imdb_id(original_title, row["year"], negative_cache)
             
             if imdb_id:
-                print(f"✅ ID de IMDb encontrado: {imdb_id}")
+                film_fields["imdb_id"] = imdb_id
+                log.debug("✅ ID de IMDb encontrado: %s", imdb_id, extra=film_fields)
                 df.at[i, "imdb_id"] = imdb_id
                 
+                # Productoras, países, título y año con una sola petición a la página del título
+                title_data = scrape_imdb_title(imdb_id, negative_cache)
+                if title_data["year"] and abs(int(title_data["year"]) - int(row["year"])) > 1:
+                    log.warning("⚠️ Año en IMDb (%s) distinto del de Cannes: revisar %s", title_data["year"], imdb_id, extra=film_fields)
+                
                 # Obtener productoras
-                companies = scrape_imdb_for_production_companies(imdb_id)
+                companies = title_data["companies"]
                 
                 if companies:
                     companies_str = ", ".join(companies)
-                    print(f"🏢 Productoras: {companies_str}")
+                    log.debug("🏢 Productoras: %s", companies_str, extra=film_fields)
                     df.at[i, "imdb_production_companies"] = companies_str
+                    df.at[i, imdb_list_column] = list(companies)
                 else:
-                    print("❌ No se encontraron productoras")
+                    log.debug("❌ No se encontraron productoras", extra=film_fields)
                 
                 # Obtener países
-                countries = scrape_imdb_for_countries(imdb_id)
+                countries = title_data["countries"]
                 
                 if countries:
-                    # Convertir a formato con emoji si es posible
-                    countries_with_emoji = []
-                    for country in countries:
-                        added = False
-                        for target, emoji_name in COUNTRY_EMOJIS.items():
-                            if target in country:
-                                countries_with_emoji.append(emoji_name)
-                                added = True
-                                break
-                        
-                        # Si no encontramos emoji para el país, lo añadimos tal cual
-                        if not added:
-                            countries_with_emoji.append(country)
+                    # Resolver a códigos ISO con el índice de alias
+                    imdb_codes = COUNTRY_RESOLVER.resolve_list(countries)
                     
                     # Guardar países en formato string
                     countries_str = ", ".join(countries)
-                    emoji_countries_str = ", ".join(countries_with_emoji)
                     
-                    print(f"🌍 Países: {countries_str}")
+                    log.debug("🌍 Países: %s", countries_str, extra=film_fields)
                     df.at[i, "imdb_countries"] = countries_str
                     
-                    # Actualizar columna country_emoji si está vacía o incompleta
-                    if pd.isna(df.at[i, "country_emoji"]) or df.at[i, "country_emoji"] == "":
-                        df.at[i, "country_emoji"] = emoji_countries_str
-                    # Si ya tiene datos, añadir solo los que faltan
-                    else:
-                        existing = set(df.at[i, "country_emoji"].split(", "))
-                        new = set(emoji_countries_str.split(", "))
-                        combined = existing.union(new)
-                        df.at[i, "country_emoji"] = ", ".join(combined)
+                    # Añadir a los códigos existentes sólo los que faltan
+                    existing = COUNTRY_RESOLVER.resolve_list(df.at[i, "country_codes"])
+                    combined = list(dict.fromkeys(existing + imdb_codes))
+                    df.at[i, "country_codes"] = format_country_codes(combined)
+                    df.at[i, "country_emoji"] = format_country_emoji(combined)
                         
                 else:
-                    print("❌ No se encontraron datos de países")
+                    log.debug("❌ No se encontraron datos de países", extra=film_fields)
             else:
-                print("❌ No se encontró ID de IMDb")
+                log.debug("❌ No se encontró ID de IMDb", extra=film_fields)
+        else:
+            # ID indicado a mano: no hace falta buscarla
+            negative_cache.forget("imdb_search", search_key)
         
         # Esperar para no sobrecargar el servidor
-        time.sleep(2)
+        polite_pause(2)
+        progress.update()
     
+    progress.close()
     return df
 
 def consolidate_production_companies(df, normalizer):
     """
-    Consolida todas las fuentes de compañías productoras en una sola columna
-    y las normaliza.
+    Consolida todas las fuentes de compañías productoras en una sola lista por
+    película y las normaliza.
+    
+    Se trabaja con las listas de cada fuente (COMPANY_LIST_COLUMNS), nunca
+    dividiendo cadenas por comas: un nombre como "Films Boutique, Inc." es una
+    sola productora. Las columnas de texto productoras_consolidadas y
+    productoras_normalizadas sólo se generan para mostrarlas.
     
     Args:
         df: DataFrame con los datos
         normalizer: Instancia de ProductionCompanyNormalizer
         
     Returns:
-        DataFrame actualizado con columna consolidada y normalizada
+        tuple: (DataFrame actualizado con columna consolidada y normalizada,
+                tabla companies, tabla film_company)
     """
-    print("\n🔄 Consolidando y normalizando nombres de productoras...")
+    log.info("🔄 Consolidando y normalizando nombres de productoras...")
     
-    # Columnas que pueden contener información de productoras
-    company_columns = [
-        'production_company_wiki', 
-        'production_company_wiki_page', 
-        'imdb_production_companies'
-    ]
-    
-    # Verificar qué columnas existen en el DataFrame
-    available_columns = [col for col in company_columns if col in df.columns]
+    # Verificar qué fuentes existen en el DataFrame
+    available_columns = [col for col in COMPANY_LIST_COLUMNS.values() if col in df.columns]
+    df['film_id'] = range(len(df))
     
     if not available_columns:
-        print("❌ No se encontraron columnas con datos de productoras")
-        return df
-        
-    # Crear columna consolidada
-    df['productoras_consolidadas'] = None
+        log.error("❌ No se encontraron columnas con datos de productoras")
+        companies, film_company = build_company_tables_from_lists([], [])
+        return df, companies, film_company
     
-    # Consolidar productoras de todas las fuentes
-    for i, row in df.iterrows():
-        all_companies = set()
-        
-        for col in available_columns:
-            if not pd.isna(row[col]) and row[col] != "":
-                companies = [c.strip() for c in str(row[col]).split(',')]
-                all_companies.update([c for c in companies if c])
-        
-        if all_companies:
-            df.at[i, 'productoras_consolidadas'] = ", ".join(all_companies)
+    # Consolidar productoras de todas las fuentes (sin duplicados, en orden de aparición)
+    consolidated = [
+        list(dict.fromkeys(
+            company.strip()
+            for col in available_columns
+            for company in (row[col] if isinstance(row[col], list) else [])
+            if company and company.strip()
+        ))
+        for _, row in df[available_columns].iterrows()
+    ]
+    df['productoras_consolidadas'] = [", ".join(companies) or None for companies in consolidated]
     
     # Normalizar cada compañía productora
-    df['productoras_normalizadas'] = None
-    
-    for i, row in df.iterrows():
-        if pd.isna(row['productoras_consolidadas']) or row['productoras_consolidadas'] == "":
-            continue
-            
-        # Dividir por comas y normalizar cada compañía
-        companies = [c.strip() for c in str(row['productoras_consolidadas']).split(',')]
-        normalized_companies = [normalizer.normalize(c) for c in companies if c]
-        
-        # Eliminar duplicados
-        normalized_companies = list(dict.fromkeys(normalized_companies))
-        
-        # Unir de nuevo con comas
-        df.at[i, 'productoras_normalizadas'] = ", ".join(normalized_companies)
+    normalized = [list(dict.fromkeys(normalizer.normalize(c) for c in companies)) for companies in consolidated]
     
     # Agrupar compañías similares en toda la base de datos
-    print("🔄 Agrupando compañías similares en todo el dataset...")
-    
-    # Extraer todas las compañías únicas
-    all_companies = set()
-    for value in df['productoras_normalizadas'].dropna():
-        if isinstance(value, str):
-            companies = [c.strip() for c in value.split(',')]
-            all_companies.update([c for c in companies if c])
-    
-    # Agrupar compañías similares
+    log.info("🔄 Agrupando compañías similares en todo el dataset...")
+    all_companies = sorted({company for companies in normalized for company in companies if company})
     clusters = normalizer.cluster_similar_companies(all_companies)
     
     # Crear mapa de reemplazo
@@ -674,51 +1032,134 @@ def consolidate_production_companies(df, normalizer):
             if variant != canonical:
                 replacement_map[variant] = canonical
     
-    # Aplicar reemplazos a la columna normalizada
-    for i, row in df.iterrows():
-        if pd.isna(df.at[i, 'productoras_normalizadas']):
-            continue
-            
-        companies = [c.strip() for c in df.at[i, 'productoras_normalizadas'].split(',')]
-        replaced_companies = [replacement_map.get(c, c) for c in companies]
-        
-        # Eliminar duplicados que pudieron surgir de la normalización
-        replaced_companies = list(dict.fromkeys(replaced_companies))
+    # Aplicar reemplazos a cada lista (eliminando duplicados surgidos al agrupar)
+    company_lists = [
+        list(dict.fromkeys(replacement_map.get(c, c) for c in companies if c)) for companies in normalized
+    ]
+    df['productoras_normalizadas'] = [", ".join(companies) or None for companies in company_lists]
+    
+    # Tablas normalizadas: dimensión de productoras y puente película-productora
+    companies, film_company = build_company_tables_from_lists(df['film_id'], company_lists)
+    log.info("🏢 %d productoras únicas en %d relaciones película-productora", len(companies), len(film_company))
+    
+    # Las listas por fuente ya están en la tabla puente; el Excel guarda sólo el texto
+    df = df.drop(columns=available_columns)
+    
+    return df, companies, film_company
+
+def build_country_bridge(df):
+    """
+    Construye la dimensión de países y la tabla puente película-país a partir de los
+    códigos ISO alfa-3 ya resueltos al extraer (Wikipedia + IMDb).
+    
+    Args:
+        df: DataFrame con 'film_id' y 'country_codes' (o 'countries'/'imdb_countries' en
+            datasets antiguos)
         
-        df.at[i, 'productoras_normalizadas'] = ", ".join(replaced_companies)
+    Returns:
+        tuple: (tabla countries, tabla film_country)
+    """
+    country_lists = []
+    for _, row in df.iterrows():
+        if "country_codes" in df.columns:
+            codes = COUNTRY_RESOLVER.resolve_list(row["country_codes"])
+        else:
+            codes = COUNTRY_RESOLVER.resolve_list(row.get("countries")) + COUNTRY_RESOLVER.resolve_list(row.get("imdb_countries"))
+        country_lists.append(list(dict.fromkeys(codes)))
     
-    return df
+    countries, film_country = build_country_tables_from_lists(df["film_id"], country_lists)
+    log.info("🌍 %d países únicos en %d relaciones película-país", len(countries), len(film_country))
+    return countries, film_country
 
 def main():
     """Función principal que coordina todo el proceso."""
+    parser = argparse.ArgumentParser(description="Extracción de películas de Cannes desde Wikipedia e IMDb")
+    parser.add_argument(
+        "command", nargs="?", choices=["scrape", "reextract"], default="scrape",
+        help="scrape: descarga las páginas (por defecto); reextract: vuelve a extraer desde el archivo de páginas, sin red"
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Procesos para reextract (por defecto, uno por núcleo)")
+    parser.add_argument("--log-level", default="INFO", help="Nivel de la consola (DEBUG muestra cada película)")
+    parser.add_argument("--log-json", default=None, help="Fichero JSON Lines con todos los mensajes (incluidos los DEBUG)")
+    parser.add_argument(
+        "--profile", nargs="?", const="cprofile", choices=["cprofile", "pyinstrument"], default=None,
+        help="Perfilar cada etapa (cProfile por defecto); los perfiles se guardan en datos_generados/trazas"
+    )
+    args = parser.parse_args()
+    setup_logging(args.log_level, args.log_json)
+    # Medir la conexión de urllib3 sólo al ejecutar el scraper, no al importarlo
+    install_connect_timer()
+    TRACER.profile = args.profile
+    
+    if args.command == "reextract":
+        start = time.time()
+        with TRACER.stage("reextract_archive"):
+            OFFLINE["pages"] = reextract_archive(args.workers)
+        OFFLINE["enabled"] = True
+        log.info("⚡ Extracción paralela completada en %.1fs", time.time() - start)
+        # Sin caché negativa persistente: los extractores nuevos vuelven a probar todas las páginas
+        negative_cache = NegativeCache(path=None)
+    elif MOCK_BASE_URL:
+        # Contra el servidor local no se toca la caché negativa real
+        negative_cache = NegativeCache(path=None)
+    else:
+        # Búsquedas fallidas de ejecuciones anteriores (datos_generados/negative_cache.json)
+        negative_cache = NegativeCache()
+    
     try:
-        print("🚀 Iniciando proceso unificado de extracción de datos de Cannes...")
+        log.info("🚀 Iniciando proceso unificado de extracción de datos de Cannes...")
         
         # Paso 1: Extracción unificada desde Wikipedia (películas + productoras)
-        films_df = extract_films_and_companies_from_wiki()
+        with TRACER.stage("extract_films_and_companies_from_wiki"):
+            films_df = extract_films_and_companies_from_wiki(negative_cache)
         
         if films_df.empty:
-            print("❌ No se pudieron extraer datos. Fin del proceso.")
+            log.error("❌ No se pudieron extraer datos. Fin del proceso.")
             return
         
         # Paso 2: Enriquecer con datos de IMDb (IDs, productoras y países)
-        films_df = enrich_with_imdb_data(films_df)
+        with TRACER.stage("enrich_with_imdb_data"):
+            films_df = enrich_with_imdb_data(films_df, negative_cache)
         
         # Paso 3: Normalizar productoras
         normalizer = ProductionCompanyNormalizer()
-        films_df = consolidate_production_companies(films_df, normalizer)
+        with TRACER.stage("consolidate_production_companies"):
+            films_df, companies, film_company = consolidate_production_companies(films_df, normalizer)
+        
+        # Paso 4: Tabla puente película-país con códigos ISO alfa-3
+        with TRACER.stage("build_country_bridge"):
+            countries, film_country = build_country_bridge(films_df)
         
         # Crear directorio para datos si no existe
         output_dir = Path("datos_generados")
         output_dir.mkdir(parents=True, exist_ok=True)
         
         # Guardar resultados
-        output_file = output_dir / "cannes_dataset_unificado.xlsx"
-        films_df.to_excel(output_file, index=False)
-        print(f"\n✅ Proceso completado. Datos guardados en '{output_file.resolve()}'")
+        # Contra el servidor local no se sobrescribe el dataset real
+        output_file = output_dir / ("cannes_dataset_mock.xlsx" if MOCK_BASE_URL else "cannes_dataset_unificado.xlsx")
+        with TRACER.stage("save_excel"), pd.ExcelWriter(output_file) as writer:
+            films_df.to_excel(writer, sheet_name="films", index=False)
+            companies.to_excel(writer, sheet_name="companies", index=False)
+            film_company.to_excel(writer, sheet_name="film_company", index=False)
+            countries.to_excel(writer, sheet_name="countries", index=False)
+            film_country.to_excel(writer, sheet_name="film_country", index=False)
+        log.info("✅ Proceso completado. Datos guardados en '%s'", output_file.resolve())
         
     except Exception as e:
-        print(f"\n❌ Error en el procesamiento: {e}")
+        log.exception("❌ Error en el procesamiento: %s", e)
+    
+    finally:
+        negative_cache.save()
+        stats = negative_cache.stats()
+        log.info("🗂️ Caché negativa: %d búsquedas omitidas, entradas %s", stats["skipped"], stats["entries"])
+        parse_stats = PARSE_CACHE.stats()
+        log.info("🧩 Caché de extracción: %d páginas reutilizadas, %d parseadas", parse_stats["hits"], parse_stats["misses"])
+        PARSE_CACHE.close()
+        
+        TRACER.count("negative_cache_skip", stats["skipped"])
+        log.info("⏱️ Tiempos del pipeline\n%s", TRACER.summary())
+        log.info("📝 Traza guardada en %s", TRACER.save())
+        shutdown_logging()
 
 
 
@@ -11,18 +11,12 @@ if not os.path.exists(modules_dir):
 sys.path.append(modules_dir)
 
 # Importar módulos
-from modules.data_processing import load_data, filter_data, get_countries_from_string
-from modules.visualizations import (
-    create_country_evolution_chart, 
-    create_country_proportion_chart,
-    create_coproduction_distribution_chart, 
-    create_average_countries_chart,
-    create_top_companies_chart,
-    create_choropleth_map,
-    create_coproduction_heatmap,
-    create_network_graph
+from modules.data_processing import top_countries, list_sections, search_films
+from modules.countries import country_label
+from modules.views import (
+    DEFAULT_COUNTRIES, default_year_range, load_view_data, make_view_context,
+    get_filtered_df, get_kpis, get_figure, lazy_tabs, tab_is_open
 )
-from modules.kpis import calculate_kpis
 
 # Configuración de la página
 st.set_page_config(
@@ -67,7 +61,9 @@ mostrando tendencias a lo largo del tiempo, con un enfoque especial en la partic
 """)
 
 # Cargar los datos
-df, all_countries = load_data()
+data = load_view_data()
+df, all_countries = data['df'], data['all_countries']
+countries = data['countries']
 
 
 # Barra lateral - Filtros
@@ -78,7 +74,7 @@ min_year, max_year = int(df["year"].min()), int(df["year"].max())
 year_range = st.sidebar.slider(
     "Rango de años:",
     min_year, max_year, 
-    (max(min_year, max_year-10), max_year)  # Por defecto últimos 10 años
+    default_year_range(min_year, max_year)  # Por defecto últimos 10 años
 )
 
 # Filtros avanzados en un expander
@@ -87,35 +83,39 @@ with st.sidebar.expander("Filtros avanzados"):
     selected_countries = st.multiselect(
         "Países a incluir en análisis:",
         sorted(all_countries),
-        default=["Spain", "France", "United States", "Italy", "United Kingdom", "Germany"]
+        default=DEFAULT_COUNTRIES
     )
     
     # Filtro por sección si existe la columna
     if 'section' in df.columns:
-        sections = ['Todas'] + sorted(df['section'].dropna().unique().tolist())
+        sections = ['Todas'] + list_sections(data['dataset'])
         selected_section = st.selectbox("Sección:", sections)
     else:
         selected_section = "Todas"
 
-# Aplicar filtros
-filtered_df = filter_data(df, year_range, selected_section)
+# Aplicar filtros: los resultados (DataFrame filtrado, KPIs y figuras) se cachean
+# por versión del dataset y filtro normalizado, en memoria y las figuras en disco
+view = make_view_context(data, year_range, selected_section, selected_countries)
 
 # Pestaña de KPIs con enfoque en España
-tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
+# Sólo se calcula el contenido de la pestaña visible; las figuras que se repiten
+# entre pestañas (mapa, heatmap) salen de la caché de vistas
+tab1, tab2, tab3, tab4, tab5, tab6 = lazy_tabs([
     "📊 KPIs y Resumen", 
     "🇪🇸 España en Cannes",
     "📈 Evolución Temporal", 
     "🌍 Distribución Geográfica", 
     "🔄 Co-producciones",
     "📋 Datos Detallados"
-])
+], key="dashboard_tab")
 
 # Tab 1: KPIs y Resumen
-with tab1:
+def render_summary_tab():
+    """Pestaña de KPIs, mapa y heatmap"""
     st.header("Principales métricas")
     
     # Cálculo de KPIs
-    kpis = calculate_kpis(filtered_df, selected_countries)
+    kpis = get_kpis(view)
     
     # Mostrar KPIs en una fila
     col1, col2, col3, col4 = st.columns(4)
@@ -154,25 +154,28 @@ with tab1:
     
     # Mapa coroplético
     st.subheader("Mapa de participación global")
-    choropleth_map = create_choropleth_map(filtered_df)
+    choropleth_map = get_figure(view, "choropleth_map")
     st.plotly_chart(choropleth_map, use_container_width=True, key="choropleth_map")
     
     # Heatmap de co-producciones
     st.subheader("Heatmap de co-producciones")
     if selected_countries:
-        coproduction_heatmap = create_coproduction_heatmap(filtered_df, selected_countries)
+        coproduction_heatmap = get_figure(view, "coproduction_heatmap")
         st.plotly_chart(coproduction_heatmap, use_container_width=True, key="coproduction_heatmap_tab_matriz")
     else:
         st.info("Selecciona países en los filtros para ver el heatmap de co-producciones")
 
 # Tab 2: España en Cannes
-with tab2:
+def render_spain_tab():
+    """Pestaña de la participación española"""
     st.header("Análisis de la participación española")
     
+    filtered_df = get_filtered_df(view)
+    
     # Verificar si España está en los datos
     if "Spain" in all_countries:
         # KPIs específicos de España
-        spain_kpis = calculate_kpis(filtered_df, ["Spain"], focus_country="Spain")
+        spain_kpis = get_kpis(view, focus_country="Spain")
         
         col1, col2, col3 = st.columns(3)
         
@@ -202,7 +205,7 @@ with tab2:
         
         # Evolución temporal de España
         st.subheader("Evolución de la participación española")
-        spain_evolution = create_country_evolution_chart(filtered_df, ["Spain"])
+        spain_evolution = get_figure(view, "country_evolution", countries=["Spain"])
         st.plotly_chart(spain_evolution, use_container_width=True, key="spain_evolution")
         
         # Principales co-productores con España
@@ -210,13 +213,13 @@ with tab2:
         
         # Red de co-producciones
         st.subheader("Red de co-producciones con España")
-        network_graph = create_network_graph(filtered_df, focus_country="Spain")
+        network_graph = get_figure(view, "network_graph", countries=[], focus_country="Spain")
         st.plotly_chart(network_graph, use_container_width=True,key="spain_network_graph")
         
         # Productoras españolas
         st.subheader("Principales productoras españolas")
         if "productoras_consolidadas_normalized" in filtered_df.columns:
-            spain_companies = create_top_companies_chart(filtered_df, "Spain")
+            spain_companies = get_figure(view, "top_companies", focus_country="Spain")
             st.plotly_chart(spain_companies, use_container_width=True, key="spain_companies")
         else:
             st.warning("No se encontraron datos de productoras en el dataset")
@@ -224,7 +227,8 @@ with tab2:
         st.warning("No se encontraron datos para España en el período seleccionado")
 
 # Tab 3: Evolución Temporal
-with tab3:
+def render_evolution_tab():
+    """Pestaña de evolución temporal por país"""
     st.header("Evolución de participación por país a lo largo del tiempo")
     
     # Preparar datos para evolución temporal
@@ -232,29 +236,31 @@ with tab3:
         col1, col2 = st.columns(2)
         
         with col1:
-            evolution_chart = create_country_evolution_chart(filtered_df, selected_countries)
+            evolution_chart = get_figure(view, "country_evolution")
             st.plotly_chart(evolution_chart, use_container_width=True, key="evolution_chart")
         
         with col2:
-            proportion_chart = create_country_proportion_chart(filtered_df, selected_countries)
+            proportion_chart = get_figure(view, "country_proportion")
             st.plotly_chart(proportion_chart, use_container_width=True, key="proportion_chart")
     
     else:
         st.warning("🔍 Por favor selecciona al menos un país para visualizar la evolución temporal.")
 
 # Tab 4: Distribución Geográfica
-with tab4:
+def render_geography_tab():
+    """Pestaña de distribución geográfica"""
     st.header("Representación geográfica")
     
     # Mapa coroplético de todos los países
-    choropleth_map = create_choropleth_map(filtered_df)
+    choropleth_map = get_figure(view, "choropleth_map")
     st.plotly_chart(choropleth_map, use_container_width=True, key="choropleth_map_all")
     
     # Top países en formato tabla
-    country_counts = filtered_df['countries_for_analysis'].apply(get_countries_from_string).explode().value_counts()
+    # Conteo por país consultado del índice por año; bandera y nombre sólo al mostrar
+    countries_ranking = top_countries(data['year_index'], countries, year_range, selected_section)
     top_countries_df = pd.DataFrame({
-        'País': country_counts.index,
-        'Películas': country_counts.values
+        'País': countries_ranking['iso3'].map(country_label),
+        'Películas': countries_ranking['films']
     })
     
     col1, col2 = st.columns([3, 2])
@@ -277,24 +283,25 @@ with tab4:
         st.info("Visualización de distribución por continentes - Pendiente de implementar")
 
 # Tab 5: Co-producciones
-with tab5:
+def render_coproductions_tab():
+    """Pestaña de co-producciones"""
     st.header("Análisis de Co-producciones")
     
     col1, col2 = st.columns(2)
     
     with col1:
-        coproduction_distribution = create_coproduction_distribution_chart(filtered_df)
+        coproduction_distribution = get_figure(view, "coproduction_distribution")
         st.plotly_chart(coproduction_distribution, use_container_width=True, key="coproduction_distribution")
     
     with col2:
-        avg_countries_chart = create_average_countries_chart(filtered_df)
+        avg_countries_chart = get_figure(view, "average_countries")
         st.plotly_chart(avg_countries_chart, use_container_width=True, key="avg_countries_chart")
     
     # Red de co-producciones entre países seleccionados
     st.subheader("Red de co-producciones")
     
     if selected_countries and len(selected_countries) > 1:
-        network_graph = create_network_graph(filtered_df, countries=selected_countries)
+        network_graph = get_figure(view, "network_graph")
         st.plotly_chart(network_graph, use_container_width=True, key="network_graph")
     else:
         st.info("Selecciona al menos 2 países para visualizar la red de co-producciones")
@@ -302,15 +309,18 @@ with tab5:
     # Heatmap de co-producciones
     st.subheader("Matriz de co-producciones")
     if selected_countries and len(selected_countries) > 1:
-        coproduction_heatmap = create_coproduction_heatmap(filtered_df, selected_countries)
+        coproduction_heatmap = get_figure(view, "coproduction_heatmap")
         st.plotly_chart(coproduction_heatmap, use_container_width=True, key="coproduction_heatmap")
     else:
         st.info("Selecciona al menos 2 países para visualizar la matriz de co-producciones")
 
 # Tab 6: Datos Detallados
-with tab6:
+def render_data_tab():
+    """Pestaña con el detalle de las películas"""
     st.header("Películas en la selección")
     
+    filtered_df = get_filtered_df(view)
+    
     # Seleccionar columnas relevantes para mostrar
     display_columns = ['title', 'director', 'year', 'countries_for_analysis']
     
@@ -325,10 +335,7 @@ with tab6:
     # Filtro específico para buscar películas
     search_term = st.text_input("Buscar película por título o director:")
     if search_term:
-        search_results = filtered_df[
-            filtered_df['title'].str.contains(search_term, case=False, na=False) | 
-            filtered_df['director'].str.contains(search_term, case=False, na=False)
-        ]
+        search_results = search_films(view['dataset'], view['year_range'], view['selected_section'], search_term)
         st.dataframe(
             search_results[display_columns].sort_values(['year', 'title'], ascending=[False, True]),
             hide_index=True,
@@ -356,6 +363,15 @@ with tab6:
             }
         )
 
+for tab, render in zip(
+    (tab1, tab2, tab3, tab4, tab5, tab6),
+    (render_summary_tab, render_spain_tab, render_evolution_tab,
+     render_geography_tab, render_coproductions_tab, render_data_tab)
+):
+    with tab:
+        if tab_is_open(tab):
+            render()
+
 # Footer
 st.markdown("---")
 st.caption("Datos extraídos de IMDb y Wikipedia. Análisis de películas en el Festival de Cannes.")
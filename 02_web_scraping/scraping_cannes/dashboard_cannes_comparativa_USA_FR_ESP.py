@@ -2,7 +2,7 @@ import pandas as pd
 import plotly.express as px
 import streamlit as st
 import os
-from collections import Counter
+from modules.data_model import build_company_tables, top_companies
 
 # Obtener la ruta del directorio donde está el script
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -70,13 +70,12 @@ if "productoras_consolidadas_normalized" in df.columns:
     # Filtrar datos relevantes y crear lista de productoras
     df_top = df_filtered[df_filtered["productoras_consolidadas_normalized"].notna() & 
                          df_filtered[["España", "Francia", "EEUU"]].any(axis=1)].copy()
-    df_top["Productoras lista"] = df_top["productoras_consolidadas_normalized"].str.split(", ")
+    # Tablas normalizadas: dimensión de productoras y puente película-productora
+    companies, film_company = build_company_tables(df_top, "productoras_consolidadas_normalized")
 
     def top_productoras(df, pais):
-        todas = []
-        for _, row in df[df[pais] == 1].iterrows():
-            todas.extend(row["Productoras lista"])
-        return Counter(todas).most_common(10)
+        top = top_companies(companies, film_company, df.index[df[pais] == 1], top_n=10)
+        return list(zip(top["name"], top["films"]))
 
     for pais in ["España", "Francia", "EEUU"]:
         top = top_productoras(df_top, pais)
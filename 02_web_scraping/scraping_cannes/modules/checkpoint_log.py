@@ -0,0 +1,108 @@
+"""
+Registro de checkpoints append-only (JSON Lines) para procesos largos.
+
+En lugar de reescribir en cada guardado el conjunto completo de IDs
+procesados y el Excel de salida (coste O(n) por guardado, O(n²) por
+ejecución), cada elemento procesado añade una línea con su resultado. Las
+escrituras se agrupan: fsync cada `fsync_every` líneas o `fsync_interval`
+segundos, así que el coste por elemento es constante.
+
+Al reanudar, load() reproduce el registro (la última línea de cada clave
+manda; una línea final truncada por una interrupción se ignora). Al
+terminar, compact() reescribe el registro con una línea por clave.
+"""
+import json
+import os
+import tempfile
+import time
+
+
+class CheckpointLog:
+    """Resultados por clave en un fichero JSON Lines que sólo se amplía."""
+
+    def __init__(self, path, key="id", fsync_every=20, fsync_interval=5.0):
+        self.path = path
+        self.key = key
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._file = None
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def load(self):
+        """
+        Reproduce el registro.
+
+        Returns:
+            dict clave -> último registro guardado para esa clave
+        """
+        records = {}
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Línea a medio escribir al interrumpirse la ejecución
+                    continue
+                records[record[self.key]] = record
+        return records
+
+    def _open(self):
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+            # Si la última línea quedó a medias, empezar en una línea nueva
+            if self._file.tell() > 0:
+                with open(self.path, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        self._file.write("\n")
+        return self._file
+
+    def append(self, record):
+        """Añade el resultado de un elemento (debe incluir la clave)"""
+        f = self._open()
+        f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._pending += 1
+        if self._pending >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        """Vuelca a disco las líneas pendientes"""
+        if self._file is None or not self._pending:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        """Vuelca lo pendiente y cierra el fichero"""
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def compact(self):
+        """
+        Reescribe el registro con una sola línea por clave (fichero temporal + os.replace).
+
+        Returns:
+            int: Número de claves
+        """
+        self.close()
+        records = self.load()
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for record in records.values():
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        return len(records)
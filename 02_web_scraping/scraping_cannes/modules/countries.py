@@ -0,0 +1,352 @@
+"""
+Dimensión canónica de países (ISO-3166 alfa-3 vía pycountry).
+
+Los países se resuelven una sola vez a su código alfa-3; el nombre para mostrar
+y el emoji de la bandera se derivan del código sólo al pintar.
+
+La resolución usa un índice de alias precalculado (todos los nombres de pycountry,
+sus traducciones al español y los alias propios): búsqueda exacta O(1) por token y,
+para texto libre, una pasada Aho-Corasick que respeta los límites de palabra
+(así "UK" no coincide dentro de "Ukraine") y descarta topónimos que sólo
+contienen un país ("New Jersey").
+"""
+import gettext
+import re
+import unicodedata
+from collections import deque
+from functools import lru_cache
+
+import pycountry
+
+# Alias en inglés/español y nombres antiguos que pycountry no reconoce
+COUNTRY_ALIASES = {
+    "usa": "USA",
+    "us": "USA",
+    "estados unidos": "USA",
+    "uk": "GBR",
+    "reino unido": "GBR",
+    "great britain": "GBR",
+    "england": "GBR",
+    "russia": "RUS",
+    "rusia": "RUS",
+    "españa": "ESP",
+    "francia": "FRA",
+    "italia": "ITA",
+    "japón": "JPN",
+    "corea del sur": "KOR",
+    "méxico": "MEX",
+    "canadá": "CAN",
+    "dinamarca": "DNK",
+    "suiza": "CHE",
+    "turkey": "TUR",
+    "turquía": "TUR",
+    "irán": "IRN",
+    "alemania": "DEU",
+    "west germany": "DEU",
+    "bélgica": "BEL",
+    "brasil": "BRA",
+    "suecia": "SWE",
+    "czech republic": "CZE",
+    "ivory coast": "CIV",
+    "cape verde": "CPV",
+    "cabo verde": "CPV",
+    "macau": "MAC",
+    "holland": "NLD",
+    "swaziland": "SWZ",
+    "palestine": "PSE",
+    "syrian": "SYR",
+    "macedonia": "MKD",
+    "republic of macedonia": "MKD",
+    "democratic republic of the congo": "COD",
+    "dr congo": "COD",
+    "kosovo": "XKX",
+    "soviet union": "SUN",
+    "ussr": "SUN",
+    "czechoslovakia": "CSK",
+    "yugoslavia": "YUG",
+    "fr yugoslavia": "SCG",
+    "serbia and montenegro": "SCG",
+    "east germany": "DDR",
+}
+
+# Alias demasiado ambiguos para buscarlos dentro de texto libre
+FREE_TEXT_EXCLUDED = {"us"}
+
+# Topónimos que contienen el nombre de un país sin serlo ("New Jersey" no es
+# Jersey). En texto libre compiten como una coincidencia más: si ganan (por
+# empezar antes o ser más largos) ocupan su tramo de texto y no devuelven país
+NON_COUNTRY_PLACES = {
+    "new jersey",
+    "new mexico",
+    "new guinea",
+}
+
+# Separadores entre países en las celdas de Wikipedia/IMDb
+COUNTRY_SEPARATORS = re.compile(r"\s*[,;/\n]\s*")
+
+# Nombres cortos para mostrar cuando el de pycountry es demasiado formal
+# (ningún nombre para mostrar puede llevar comas: se usan como separador)
+DISPLAY_NAMES = {
+    "BES": "Caribbean Netherlands",
+    "FSM": "Micronesia",
+    "SHN": "Saint Helena",
+    "VGB": "British Virgin Islands",
+    "VIR": "US Virgin Islands",
+    "BUR": "Burma",
+    "FXX": "Metropolitan France",
+    "HVO": "Upper Volta",
+    "VDR": "North Vietnam",
+    "YMD": "South Yemen",
+    "ZAR": "Zaire",
+    "RUS": "Russia",
+    "TUR": "Turkey",
+    "PSE": "Palestine",
+    "BOL": "Bolivia",
+    "TZA": "Tanzania",
+    "MDA": "Moldova",
+    "COD": "DR Congo",
+    "XKX": "Kosovo",
+    "SUN": "Soviet Union",
+    "CSK": "Czechoslovakia",
+    "YUG": "Yugoslavia",
+    "SCG": "Serbia and Montenegro",
+    "DDR": "East Germany",
+}
+
+# Códigos sin entrada en pycountry.countries (históricos o de uso común)
+EXTRA_ALPHA_2 = {
+    "XKX": "XK",
+}
+
+
+def _pycountry_record(iso3):
+    """Devuelve el registro de pycountry (actual o histórico) para un código alfa-3"""
+    record = pycountry.countries.get(alpha_3=iso3)
+    if record is None:
+        record = pycountry.historic_countries.get(alpha_3=iso3)
+    return record
+
+
+def normalize_alias(text):
+    """Normaliza un nombre para el índice: sin acentos, minúsculas y sólo letras/dígitos"""
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", text.lower()).split())
+
+
+def _name_variants(name):
+    """Variantes de un nombre de pycountry ('Korea, Republic of' -> 'Republic of Korea')"""
+    variants = [name]
+    if ", " in name:
+        head, tail = name.split(", ", 1)
+        variants.append(f"{tail} {head}")
+    return variants
+
+
+class CountryResolver:
+    """Resuelve nombres de países (en inglés o español) a códigos ISO alfa-3."""
+    
+    def __init__(self, extra_aliases=None):
+        # Índice alias normalizado -> código alfa-3 (búsqueda exacta O(1))
+        self.alias_index = {}
+        # Subconjunto de alias seguros para buscar dentro de texto libre
+        self.free_text_aliases = {}
+        # Topónimos que no son países (ver NON_COUNTRY_PLACES)
+        self.non_country_places = {normalize_alias(place) for place in NON_COUNTRY_PLACES}
+        
+        try:
+            spanish = gettext.translation("iso3166-1", pycountry.LOCALES_DIR, languages=["es"])
+        except OSError:
+            spanish = gettext.NullTranslations()
+        
+        records = [(c, True) for c in pycountry.countries] + [(c, False) for c in pycountry.historic_countries]
+        for record, is_current in records:
+            names = [getattr(record, attr, None) for attr in ("name", "official_name", "common_name")]
+            names = [n for n in names if n]
+            if is_current:
+                names += [spanish.gettext(n) for n in names]
+            for name in names:
+                for variant in _name_variants(name):
+                    self._add(variant, record.alpha_3, free_text=True, overwrite=is_current)
+            # Los códigos sólo se aceptan como token exacto
+            self._add(record.alpha_3, record.alpha_3, free_text=False, overwrite=False)
+            if is_current:
+                self._add(record.alpha_2, record.alpha_3, free_text=False, overwrite=False)
+        
+        for alias, iso3 in {**COUNTRY_ALIASES, **(extra_aliases or {})}.items():
+            self._add(alias, iso3, free_text=normalize_alias(alias) not in FREE_TEXT_EXCLUDED, overwrite=True)
+        
+        self._build_automaton()
+    
+    def _add(self, alias, iso3, free_text, overwrite):
+        """Añade un alias al índice"""
+        key = normalize_alias(alias)
+        if not key:
+            return
+        if overwrite or key not in self.alias_index:
+            self.alias_index[key] = iso3
+        if free_text and (overwrite or key not in self.free_text_aliases):
+            self.free_text_aliases[key] = iso3
+    
+    def _build_automaton(self):
+        """Construye el autómata Aho-Corasick sobre los alias de texto libre y NON_COUNTRY_PLACES"""
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [None]  # alias más largo que termina en cada nodo
+        
+        for alias in list(self.free_text_aliases) + sorted(self.non_country_places - set(self.free_text_aliases)):
+            node = 0
+            for char in alias:
+                if char not in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(None)
+                    self._goto[node][char] = len(self._goto) - 1
+                node = self._goto[node][char]
+            self._output[node] = alias
+        
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+    
+    def resolve(self, name):
+        """
+        Búsqueda exacta de un nombre en el índice.
+        
+        Returns:
+            Código alfa-3 o None si no se reconoce
+        """
+        if not isinstance(name, str):
+            return None
+        return self.alias_index.get(normalize_alias(name))
+    
+    def find_in_text(self, text):
+        """
+        Busca países dentro de texto libre con Aho-Corasick.
+        
+        Sólo acepta coincidencias completas de palabra y, si se solapan, la más
+        larga más a la izquierda ("Equatorial Guinea" antes que "Guinea"). Un
+        topónimo de NON_COUNTRY_PLACES que gana así no aporta ningún país.
+        
+        Returns:
+            Lista de códigos alfa-3 únicos en orden de aparición
+        """
+        if not isinstance(text, str) or not text.strip():
+            return []
+        
+        # Separar palabras pegadas por get_text(strip=True): "FranceBelgium"
+        text = re.sub(r"(?<=[a-záéíóúñ])(?=[A-Z])", " ", text)
+        text = normalize_alias(text)
+        
+        matches = []
+        node = 0
+        for end, char in enumerate(text, start=1):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            
+            # Recorrer la cadena de fallos para recoger todos los alias que acaban aquí
+            state = node
+            while state:
+                alias = self._output[state]
+                if alias:
+                    start = end - len(alias)
+                    if (start == 0 or text[start - 1] == " ") and (end == len(text) or text[end] == " "):
+                        matches.append((start, end, alias))
+                state = self._fail[state]
+        
+        # Elegir coincidencias sin solapes: la más a la izquierda y, en empate, la más larga
+        matches.sort(key=lambda m: (m[0], -(m[1] - m[0])))
+        codes = []
+        last_end = -1
+        for start, end, alias in matches:
+            if start < last_end:
+                continue
+            last_end = end
+            iso3 = self.free_text_aliases.get(alias)
+            if iso3 is not None and iso3 not in codes:
+                codes.append(iso3)
+        return codes
+    
+    def resolve_list(self, value):
+        """
+        Convierte una celda de países ('Spain, France', lista o texto libre) en códigos alfa-3.
+        
+        Cada token se busca primero de forma exacta; los que no se reconocen se
+        analizan como texto libre.
+        """
+        if isinstance(value, (list, tuple)):
+            tokens = [str(v) for v in value]
+        elif not isinstance(value, str):
+            return []
+        else:
+            tokens = COUNTRY_SEPARATORS.split(value)
+        
+        codes = []
+        for token in tokens:
+            iso3 = self.resolve(token)
+            found = [iso3] if iso3 else self.find_in_text(token)
+            for code in found:
+                if code not in codes:
+                    codes.append(code)
+        return codes
+
+
+@lru_cache(maxsize=1)
+def get_resolver():
+    """Resolvedor compartido (el índice se construye una sola vez)"""
+    return CountryResolver()
+
+
+def resolve_country(name):
+    """
+    Resuelve un nombre de país (inglés o español) a su código ISO alfa-3.
+
+    Returns:
+        Código alfa-3 o None si no se reconoce
+    """
+    return get_resolver().resolve(name)
+
+
+@lru_cache(maxsize=None)
+def country_name(iso3):
+    """Nombre para mostrar de un código alfa-3"""
+    if iso3 in DISPLAY_NAMES:
+        return DISPLAY_NAMES[iso3]
+    record = _pycountry_record(iso3)
+    if record is None:
+        return iso3
+    return getattr(record, "common_name", None) or record.name
+
+
+@lru_cache(maxsize=None)
+def flag_emoji(iso3):
+    """Emoji de bandera de un código alfa-3 (cadena vacía si no existe)"""
+    alpha_2 = EXTRA_ALPHA_2.get(iso3)
+    if alpha_2 is None:
+        record = pycountry.countries.get(alpha_3=iso3)
+        alpha_2 = record.alpha_2 if record is not None else None
+    if not alpha_2:
+        return ""
+    return "".join(chr(0x1F1E6 + ord(c) - ord("A")) for c in alpha_2.upper())
+
+
+def country_label(iso3):
+    """Etiqueta 'bandera + nombre' para mostrar un país"""
+    flag = flag_emoji(iso3)
+    return f"{flag} {country_name(iso3)}" if flag else country_name(iso3)
+
+
+def resolve_countries(value):
+    """
+    Convierte una cadena 'Spain, France' (o una lista) en códigos alfa-3 únicos.
+
+    Los nombres que no se reconocen se descartan.
+    """
+    return get_resolver().resolve_list(value)
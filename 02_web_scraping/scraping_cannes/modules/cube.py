@@ -0,0 +1,154 @@
+"""
+Cubo OLAP preagregado del dataset de Cannes (año × sección × país × productora).
+
+Se construye una sola vez al cargar los datos. Las consultas de filtrado y
+agregación (rango de años + sección) no recorren el cubo directamente: pasan
+por el índice de sumas prefijas construido sobre él (build_year_index y las
+funciones year_range_* de data_processing), con un coste que no depende del
+número de películas.
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+ALL_SECTIONS = "Todas"
+NO_SECTION = "Sin sección"
+
+
+def build_cube(df, countries, film_country, film_company=None):
+    """
+    Construye el cubo preagregado.
+
+    Args:
+        df: DataFrame de películas con 'film_id', 'year' y opcionalmente 'section'
+        countries: Dimensión de países (country_id, iso3, name)
+        film_country: Tabla puente película-país
+        film_company: Tabla puente película-productora (opcional)
+
+    Returns:
+        dict con las dimensiones y los arrays agregados:
+            years, sections, country_names: ejes del cubo
+            films [Y, S]: películas
+            films_with_countries [Y, S]: películas con algún país
+            coproduction_films [Y, S]: películas con más de un país
+            country_links [Y, S]: suma de países por película (para medias)
+            country_films [Y, S, C]: películas por país
+            country_coproduction_films [Y, S, C]: co-producciones (más de un país) por país
+            countries_per_film [Y, S, K]: películas con dato de país según su nº de países
+            coproduction_pairs [Y][S]: matriz dispersa C × C de co-producciones
+            company_films: Serie (year_idx, section_idx, country_id, company_id) -> películas
+            company_films_total: Serie (year_idx, section_idx, company_id) -> películas
+    """
+    years = np.sort(df['year'].unique())
+    if 'section' in df.columns:
+        section_values = df['section'].fillna(NO_SECTION)
+    else:
+        section_values = pd.Series(NO_SECTION, index=df.index)
+    sections = sorted(section_values.unique().tolist())
+
+    n_years, n_sections, n_countries = len(years), len(sections), len(countries)
+
+    # Coordenadas (año, sección) de cada película indexadas por film_id
+    max_film_id = int(df['film_id'].max()) + 1 if len(df) else 0
+    film_year = np.full(max_film_id, -1, dtype=np.int32)
+    film_section = np.full(max_film_id, -1, dtype=np.int32)
+    film_ids = df['film_id'].to_numpy()
+    film_year[film_ids] = np.searchsorted(years, df['year'].to_numpy())
+    film_section[film_ids] = pd.Categorical(section_values, categories=sections).codes
+
+    # Sólo los pares de películas presentes en df
+    film_country = film_country[film_country['film_id'] < max_film_id]
+    film_country = film_country[film_year[film_country['film_id'].to_numpy()] >= 0]
+    pair_film = film_country['film_id'].to_numpy()
+    pair_country = film_country['country_id'].to_numpy()
+    pair_year = film_year[pair_film]
+    pair_section = film_section[pair_film]
+
+    num_countries = np.bincount(pair_film, minlength=max_film_id)[film_ids]
+    year_idx, section_idx = film_year[film_ids], film_section[film_ids]
+    film_cells = year_idx * n_sections + section_idx
+
+    def _count(mask=None, weights=None):
+        """Cuenta películas por celda (año, sección)"""
+        cells = film_cells
+        if mask is not None:
+            cells = cells[mask]
+            weights = weights[mask] if weights is not None else None
+        counts = np.bincount(cells, weights=weights, minlength=n_years * n_sections)
+        return counts.reshape(n_years, n_sections).astype(np.int32)
+
+    cube = {
+        'years': years,
+        'sections': sections,
+        'country_names': countries['name'].tolist(),
+        'country_iso3': countries['iso3'].tolist(),
+        'films': _count(),
+        'films_with_countries': _count(num_countries > 0),
+        'coproduction_films': _count(num_countries > 1),
+        'country_links': _count(weights=num_countries),
+    }
+
+    # Películas por (año, sección, país)
+    cells = (pair_year * n_sections + pair_section) * n_countries + pair_country
+    cube['country_films'] = np.bincount(
+        cells, minlength=n_years * n_sections * n_countries
+    ).reshape(n_years, n_sections, n_countries).astype(np.int32)
+
+    # Co-producciones por (año, sección, país)
+    is_coproduction = np.bincount(pair_film, minlength=max_film_id)[pair_film] > 1
+    cube['country_coproduction_films'] = np.bincount(
+        cells[is_coproduction], minlength=n_years * n_sections * n_countries
+    ).reshape(n_years, n_sections, n_countries).astype(np.int32)
+
+    # Distribución del número de países por película (sólo películas con país)
+    max_countries = int(num_countries.max()) + 1 if len(num_countries) else 1
+    has_countries = num_countries > 0
+    cube['countries_per_film'] = np.bincount(
+        film_cells[has_countries] * max_countries + num_countries[has_countries],
+        minlength=n_years * n_sections * max_countries
+    ).reshape(n_years, n_sections, max_countries).astype(np.int32)
+
+    # Pares de co-producción por (año, sección): Xᵀ·X de las películas de cada celda
+    indicator = sparse.csr_matrix(
+        (np.ones(len(pair_film), dtype=np.int32), (pair_film, pair_country)),
+        shape=(max_film_id, n_countries)
+    )
+    order = np.argsort(film_cells, kind='stable')
+    bounds = np.searchsorted(film_cells[order], np.arange(n_years * n_sections + 1))
+    pairs = [[None] * n_sections for _ in range(n_years)]
+    for y in range(n_years):
+        for s in range(n_sections):
+            cell = y * n_sections + s
+            X = indicator[film_ids[order[bounds[cell]:bounds[cell + 1]]]]
+            C = (X.T @ X).tocsr()
+            C = (C - sparse.diags(C.diagonal(), dtype=C.dtype)).tocsr()
+            C.eliminate_zeros()
+            pairs[y][s] = C
+    cube['coproduction_pairs'] = pairs
+
+    # Productoras por (año, sección, país) y por (año, sección)
+    if film_company is not None and len(film_company):
+        film_company = film_company[film_company['film_id'] < max_film_id]
+        film_company = film_company[film_year[film_company['film_id'].to_numpy()] >= 0]
+        fc = pd.DataFrame({
+            'year_idx': film_year[film_company['film_id'].to_numpy()],
+            'section_idx': film_section[film_company['film_id'].to_numpy()],
+            'film_id': film_company['film_id'].to_numpy(),
+            'company_id': film_company['company_id'].to_numpy()
+        })
+        cube['company_films_total'] = fc.groupby(['year_idx', 'section_idx', 'company_id']).size()
+        with_country = fc.merge(
+            pd.DataFrame({'film_id': pair_film, 'country_id': pair_country}), on='film_id'
+        )
+        cube['company_films'] = with_country.groupby(
+            ['year_idx', 'section_idx', 'country_id', 'company_id']
+        ).size()
+    else:
+        empty_total = pd.MultiIndex.from_arrays([[], [], []], names=['year_idx', 'section_idx', 'company_id'])
+        empty = pd.MultiIndex.from_arrays(
+            [[], [], [], []], names=['year_idx', 'section_idx', 'country_id', 'company_id']
+        )
+        cube['company_films_total'] = pd.Series([], index=empty_total, dtype=np.int64)
+        cube['company_films'] = pd.Series([], index=empty, dtype=np.int64)
+
+    return cube
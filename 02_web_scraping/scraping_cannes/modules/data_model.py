@@ -0,0 +1,202 @@
+"""
+Modelo de datos normalizado del dataset de Cannes.
+
+En lugar de guardar las productoras como cadenas 'A, B, C' que cada consumidor
+vuelve a dividir, se construyen una vez dos tablas:
+
+- companies: dimensión de productoras (company_id entero, name canónico)
+- film_company: tabla puente (film_id, company_id)
+
+Con los países se hace lo mismo:
+
+- countries: dimensión de países (country_id entero, iso3, name)
+- film_country: tabla puente (film_id, country_id)
+
+Las agregaciones por productora o por país pasan a ser agrupaciones sobre enteros.
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from .countries import country_name, resolve_countries
+
+
+def split_companies(value):
+    """
+    Convierte una cadena 'A, B, C' en ['A', 'B', 'C'] (sin vacíos).
+
+    Sólo para columnas de texto de datasets sin hojas companies/film_company:
+    un nombre con coma ("Le Pacte, S.A.") se parte en dos. El scraper construye
+    la tabla puente desde las listas de cada fuente.
+    """
+    if pd.isna(value):
+        return []
+    return [c.strip() for c in str(value).split(',') if c.strip()]
+
+
+def _explode_to_codes(film_ids, value_lists):
+    """
+    Convierte listas paralelas (película -> valores) en pares (film_id, código entero).
+
+    Returns:
+        tuple: (film_ids por par, códigos por par, valores únicos ordenados)
+    """
+    film_ids = np.asarray(film_ids, dtype=np.int64)
+    lengths = np.fromiter((len(v) for v in value_lists), dtype=np.int64, count=len(value_lists))
+
+    exploded = pd.DataFrame({
+        'film_id': np.repeat(film_ids, lengths),
+        'value': [value for values in value_lists for value in values]
+    }).drop_duplicates()
+
+    # IDs ordenados alfabéticamente para que sean estables entre ejecuciones
+    codes, uniques = pd.factorize(exploded['value'], sort=True)
+    return exploded['film_id'].to_numpy(dtype=np.int32), codes.astype(np.int32), uniques
+
+
+def build_company_tables_from_lists(film_ids, company_lists):
+    """
+    Construye la dimensión de productoras y la tabla puente a partir de listas.
+
+    Args:
+        film_ids: Secuencia de IDs enteros de película
+        company_lists: Secuencia paralela con la lista de productoras de cada película
+            (listas de nombres, que no se vuelven a dividir por comas)
+
+    Returns:
+        tuple: (companies, film_company)
+            companies: DataFrame con columnas company_id, name
+            film_company: DataFrame con columnas film_id, company_id
+    """
+    company_lists = [
+        [str(c).strip() for c in companies if str(c).strip()] if isinstance(companies, (list, tuple)) else []
+        for companies in company_lists
+    ]
+    pair_films, codes, names = _explode_to_codes(film_ids, company_lists)
+
+    companies = pd.DataFrame({
+        'company_id': np.arange(len(names), dtype=np.int32),
+        'name': names
+    })
+    film_company = pd.DataFrame({'film_id': pair_films, 'company_id': codes})
+
+    return companies, film_company
+
+
+def build_company_tables(df, company_column='productoras_normalizadas', film_id_column='film_id'):
+    """
+    Construye las tablas companies y film_company desde una columna de texto
+    'A, B, C' (datasets antiguos, ver split_companies).
+
+    Si el DataFrame no tiene columna de ID de película se usa su índice.
+    """
+    if company_column not in df.columns:
+        return build_company_tables_from_lists([], [])
+
+    film_ids = df[film_id_column] if film_id_column in df.columns else df.index
+    return build_company_tables_from_lists(film_ids, df[company_column].map(split_companies).tolist())
+
+
+def build_country_tables_from_lists(film_ids, code_lists):
+    """
+    Construye la dimensión de países y la tabla puente a partir de códigos alfa-3.
+
+    Args:
+        film_ids: Secuencia de IDs enteros de película
+        code_lists: Secuencia paralela con la lista de códigos alfa-3 de cada película
+
+    Returns:
+        tuple: (countries, film_country)
+            countries: DataFrame con columnas country_id, iso3, name
+            film_country: DataFrame con columnas film_id, country_id
+    """
+    code_lists = [list(codes) if isinstance(codes, (list, tuple)) else [] for codes in code_lists]
+    pair_films, codes, iso3_codes = _explode_to_codes(film_ids, code_lists)
+
+    countries = pd.DataFrame({
+        'country_id': np.arange(len(iso3_codes), dtype=np.int16),
+        'iso3': iso3_codes,
+        'name': [country_name(iso3) for iso3 in iso3_codes]
+    })
+    film_country = pd.DataFrame({'film_id': pair_films, 'country_id': codes.astype(np.int16)})
+
+    return countries, film_country
+
+
+def build_country_tables(df, country_column='countries_for_analysis', film_id_column='film_id'):
+    """
+    Resuelve una columna de texto 'Spain, France' a la dimensión de países y la tabla puente.
+
+    Si el DataFrame no tiene columna de ID de película se usa su índice.
+    """
+    if country_column not in df.columns:
+        return build_country_tables_from_lists([], [])
+
+    film_ids = df[film_id_column] if film_id_column in df.columns else df.index
+    return build_country_tables_from_lists(film_ids, df[country_column].map(resolve_countries).tolist())
+
+
+def build_country_matrix(film_country, n_films, n_countries):
+    """
+    Construye en una sola pasada la matriz indicadora película × país.
+
+    La fila i corresponde al film_id i y la columna j al country_id j. Se guarda
+    como scipy.sparse CSR booleana: con ~1.5 países por película ocupa una
+    fracción de las columnas int64 que se creaban antes.
+
+    Returns:
+        scipy.sparse.csr_matrix de forma (n_films, n_countries) y dtype bool
+    """
+    data = np.ones(len(film_country), dtype=bool)
+    rows = film_country['film_id'].to_numpy()
+    cols = film_country['country_id'].to_numpy()
+    return sparse.csr_matrix((data, (rows, cols)), shape=(n_films, n_countries), dtype=bool)
+
+
+def coproduction_matrix(indicator):
+    """
+    Motor de co-producciones: C = Xᵀ·X con la diagonal a cero.
+
+    C[i, j] es el número de películas en las que participan a la vez los países
+    i y j. Funciona igual con la matriz dispersa de build_country_matrix (o un
+    subconjunto de sus filas/columnas) que con un array denso de 0/1.
+
+    Args:
+        indicator: Matriz película × país (scipy.sparse o array booleano)
+
+    Returns:
+        scipy.sparse.csr_matrix simétrica de enteros (países × países)
+    """
+    X = sparse.csr_matrix(indicator, dtype=np.int32)
+    C = (X.T @ X).tocsr()
+    C = (C - sparse.diags(C.diagonal(), dtype=C.dtype)).tocsr()
+    C.eliminate_zeros()
+    return C
+
+
+def top_companies(companies, film_company, film_ids=None, top_n=10):
+    """
+    Devuelve las productoras con más películas.
+
+    Args:
+        companies: Dimensión de productoras
+        film_company: Tabla puente película-productora
+        film_ids: IDs de película a considerar (None = todas)
+        top_n: Número de productoras a devolver (None = todas)
+
+    Returns:
+        DataFrame con columnas company_id, name, films
+    """
+    if film_ids is not None:
+        film_company = film_company[film_company['film_id'].isin(film_ids)]
+
+    counts = np.bincount(film_company['company_id'].to_numpy(), minlength=len(companies))
+    # Orden por número de películas y, en empate, por nombre
+    order = np.lexsort((companies['company_id'].to_numpy(), -counts))
+    order = order[counts[order] > 0]
+    if top_n is not None:
+        order = order[:top_n]
+
+    result = companies.iloc[order].copy()
+    result['films'] = counts[order]
+    return result.reset_index(drop=True)
@@ -1,8 +1,17 @@
 import pandas as pd
+import numpy as np
 import os
 import re
 from collections import Counter
 import streamlit as st
+from scipy import sparse
+from .cube import build_cube
+from .countries import get_resolver, resolve_countries
+from .dataset_handle import DatasetHandle, cache_by_handle
+from .data_model import (
+    build_company_tables, build_country_tables, build_country_tables_from_lists, build_country_matrix,
+    coproduction_matrix, top_companies
+)
 
 def extract_flag_emoji(country_text):
     """Extrae el emoji de bandera de un texto de país"""
@@ -12,10 +21,10 @@ def extract_flag_emoji(country_text):
     return match.group(1) if match else ""
 
 def get_countries_from_string(country_string):
-    """Convierte una cadena como 'France, USA' en ['France', 'USA']"""
+    """Convierte una cadena como 'France, United States' en ['France', 'United States']"""
     if pd.isna(country_string) or country_string.strip() == "":
         return []
-    return [c.strip().title() for c in country_string.split(',') if c.strip()]
+    return [c.strip() for c in country_string.split(',') if c.strip()]
 
 def count_countries(df, country_column):
     """Cuenta la frecuencia de cada país en el DataFrame"""
@@ -24,56 +33,106 @@ def count_countries(df, country_column):
         all_countries.extend(get_countries_from_string(countries))
     return Counter(all_countries)
 
+# CANNES_DATA_FILE permite cargar otro fichero con el mismo esquema (.xlsx, .csv
+# o .parquet; p. ej. un dataset sintético de modules/synthetic_dataset.py para
+# pruebas de escala)
+DATA_FILE = os.environ.get("CANNES_DATA_FILE") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "datos_generados/cannes_dataset_unificado.xlsx"
+)
+
+def read_dataset(path):
+    """Lee la tabla de películas según la extensión (.xlsx, .csv o .parquet)"""
+    if path.endswith(".csv"):
+        return pd.read_csv(path)
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_excel(path)
+
+def _read_extra_sheets(*sheet_names):
+    """Lee hojas adicionales del Excel (tablas normalizadas) si existen todas"""
+    if not DATA_FILE.endswith(".xlsx"):
+        # CSV y Parquet sólo tienen la tabla de películas
+        return None
+    available = pd.ExcelFile(DATA_FILE).sheet_names
+    if not all(name in available for name in sheet_names):
+        return None
+    return tuple(pd.read_excel(DATA_FILE, sheet_name=name) for name in sheet_names)
+
 @st.cache_data
-def load_data():
-    """Carga y preprocesa los datos del dataset de Cannes"""
-    # Intentar cargar el archivo con datos expandidos
-    script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    file_path = os.path.join(script_dir, "datos_generados/cannes_dataset_unificado.xlsx")
-    
-    if os.path.exists(file_path):
-        st.sidebar.success("✅ Usando datos del archivo cannes_dataset_unificado.xlsx")
+def _load_raw_data():
+    """Lee el fichero del dataset una sola vez y añade las columnas básicas"""
+    if os.path.exists(DATA_FILE):
+        st.sidebar.success(f"✅ Usando datos del archivo {os.path.basename(DATA_FILE)}")
     else:
-        st.error("❌ No se encontró el archivo cannes_dataset_unificado.xlsx")
+        st.error(f"❌ No se encontró el archivo {os.path.basename(DATA_FILE)}")
         st.stop()
     
     # Cargar el DataFrame
-    df = pd.read_excel(file_path)
+    df = read_dataset(DATA_FILE)
     
     # Crear columna para análisis basada en los datos disponibles
     # Usando 'countries' como columna principal para el análisis
-    if 'countries' in df.columns:
-        df['countries_for_analysis'] = df['countries']
-    else:
+    if 'countries' not in df.columns:
         st.error("❌ No se encontró la columna 'countries' en el archivo.")
         st.stop()
     
     # Extraer año como entero
     df['year'] = df['year'].astype(int)
     
-    # Generar el conjunto de países únicos
-    unique_countries = set()
-    for countries in df['countries_for_analysis'].dropna():
-        unique_countries.update(get_countries_from_string(countries))
-    unique_countries = list(unique_countries)
+    # ID entero de película para las tablas puente
+    df['film_id'] = range(len(df))
     
-    # Crear todas las columnas de países de una vez
-    country_columns = {}
-    for country in unique_countries:
-        country_columns[country] = df['countries_for_analysis'].apply(
-            lambda x: 1 if country in get_countries_from_string(x) else 0
-        )
+    return df
+
+@st.cache_data
+def dataset_version():
+    """
+    Versión del dataset cargado (tamaño y fecha de modificación del fichero).
+
+    Se cachea junto a los loaders para que corresponda siempre a los datos en
+    memoria; forma parte de las claves de la caché de resultados.
+    """
+    if not os.path.exists(DATA_FILE):
+        return "missing"
+    stat = os.stat(DATA_FILE)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+@st.cache_data
+def load_country_tables():
+    """
+    Carga la dimensión de países (ISO alfa-3) y la tabla puente película-país.
     
-    # Convertir el diccionario a DataFrame
-    country_df = pd.DataFrame(country_columns)
+    Si el Excel ya incluye las hojas 'countries' y 'film_country' (generadas por el
+    scraper unificado) se usan tal cual; si no, se resuelven una sola vez desde la
+    columna 'countries'.
+    """
+    tables = _read_extra_sheets("countries", "film_country")
+    if tables is not None:
+        return tables
+    return build_country_tables(_load_raw_data(), 'countries')
+
+@st.cache_data
+def load_data():
+    """Carga y preprocesa los datos del dataset de Cannes"""
+    df = _load_raw_data()
+    countries, film_country = load_country_tables()
     
-    # Unir las columnas de países al DataFrame original
-    df = pd.concat([df, country_df], axis=1)
+    # Construir ya el índice de alias de países: los gráficos (p. ej. el mapa
+    # coroplético) sólo hacen búsquedas en él, sin recorrer pycountry
+    get_resolver()
     
-    # Añadir columna de total_countries per movie
-    df['num_countries'] = df['countries_for_analysis'].apply(
-        lambda x: 0 if pd.isna(x) else len(get_countries_from_string(x))
+    # Nombres canónicos de los países de cada película (derivados de la tabla puente)
+    names = countries['name'].to_numpy()
+    film_names = (
+        pd.Series(names[film_country['country_id'].to_numpy()], index=film_country['film_id'].to_numpy())
+        .groupby(level=0).agg(', '.join)
     )
+    df['countries_for_analysis'] = df['film_id'].map(film_names)
+    
+    # La matriz película × país se queda dispersa (load_country_matrix); aquí
+    # sólo se añade el número de países de cada película
+    df['num_countries'] = load_country_matrix().getnnz(axis=1)
     
     # Adaptación para las productoras
     if 'productoras_normalizadas' in df.columns:
@@ -82,10 +141,255 @@ def load_data():
         df['productoras_consolidadas_normalized'] = df['productoras_consolidadas']
     
     # Crear columna para indicar si hay datos de país disponibles
-    df['has_country_data'] = df['countries_for_analysis'].notna() & (df['countries_for_analysis'] != "")
+    df['has_country_data'] = df['num_countries'] > 0
     
+    unique_countries = countries['name'].tolist()
     return df, unique_countries
 
+@st.cache_resource
+def load_dataset_handle():
+    """
+    Dataset cargado envuelto en un DatasetHandle (hash de contenido calculado una vez).
+
+    Se guarda con st.cache_resource para no copiar el DataFrame en cada ejecución;
+    las funciones decoradas con cache_by_handle (list_sections, search_films) lo
+    reciben sin volver a hashearlo.
+    """
+    df, _ = load_data()
+    return DatasetHandle.from_frame(df, dataset_version())
+
+@cache_by_handle
+def list_sections(dataset):
+    """Secciones del festival presentes en el dataset, ordenadas ([] si no hay columna 'section')"""
+    if 'section' not in dataset.df.columns:
+        return []
+    return sorted(dataset.df['section'].dropna().unique().tolist())
+
+@cache_by_handle(max_entries=64)
+def search_films(dataset, year_range, selected_section, search_term):
+    """
+    Películas del filtro cuyo título o director contiene search_term (sin distinguir mayúsculas).
+    
+    La clave de caché es la del DatasetHandle más los parámetros, así que repetir
+    una búsqueda no vuelve a recorrer el DataFrame.
+    """
+    filtered_df = filter_data(dataset.df, year_range, selected_section)
+    matches = filtered_df['title'].str.contains(search_term, case=False, na=False, regex=False)
+    if 'director' in filtered_df.columns:
+        matches |= filtered_df['director'].str.contains(search_term, case=False, na=False, regex=False)
+    return filtered_df[matches]
+
+@st.cache_data
+def load_country_matrix():
+    """
+    Matriz indicadora película × país (scipy.sparse CSR booleana).
+    
+    Las filas se indexan por film_id y las columnas por country_id de load_country_tables,
+    de modo que los KPIs y gráficos pueden seleccionar filas con filtered_df['film_id'].
+    """
+    df = _load_raw_data()
+    countries, film_country = load_country_tables()
+    return build_country_matrix(film_country, len(df), len(countries))
+
+@st.cache_data
+def load_company_tables():
+    """
+    Carga la dimensión de productoras y la tabla puente película-productora.
+    
+    Si el Excel ya incluye las hojas 'companies' y 'film_company' (generadas por el
+    scraper unificado) se usan tal cual; si no, se construyen una sola vez desde
+    la columna de productoras.
+    """
+    tables = _read_extra_sheets("companies", "film_company")
+    if tables is not None:
+        return tables
+    
+    df, _ = load_data()
+    if 'productoras_consolidadas_normalized' not in df.columns:
+        return build_company_tables(df.iloc[0:0])
+    return build_company_tables(df, 'productoras_consolidadas_normalized')
+
+@st.cache_data
+def load_cube():
+    """
+    Cubo preagregado año × sección × país × productora (ver modules/cube.py).
+    
+    Se construye una vez al cargar los datos; los filtros de año y sección se
+    responden recortando y sumando el cubo en lugar de reagrupar filas.
+    """
+    df, _ = load_data()
+    countries, film_country = load_country_tables()
+    _, film_company = load_company_tables()
+    return build_cube(df, countries, film_country, film_company)
+
+def build_year_index(cube):
+    """
+    Índice de sumas prefijas por año sobre el cubo preagregado.
+    
+    Para cada agregado se guarda cum[k] = suma de los k primeros años (cum[0] = 0),
+    así el total de cualquier rango de años es cum[hi] - cum[lo] sin recorrer
+    películas ni años intermedios.
+    
+    Args:
+        cube (dict): Cubo devuelto por build_cube
+        
+    Returns:
+        dict: Índice con los ejes del cubo y los acumulados
+    """
+    def _cumsum(values):
+        """Acumulado por año con una fila inicial de ceros"""
+        zeros = np.zeros((1,) + values.shape[1:], dtype=np.int64)
+        return np.concatenate([zeros, np.cumsum(values, axis=0, dtype=np.int64)])
+    
+    def _sparse_cumsum(matrices):
+        """Acumulado por año de una lista de matrices dispersas"""
+        total = matrices[0] * 0 if matrices else sparse.csr_matrix((0, 0))
+        cumulative = [total]
+        for matrix in matrices:
+            total = (total + matrix).tocsr()
+            cumulative.append(total)
+        return cumulative
+    
+    n_sections = len(cube['sections'])
+    n_countries = len(cube['country_names'])
+    keys = [
+        'films', 'films_with_countries', 'coproduction_films', 'country_links',
+        'country_films', 'country_coproduction_films', 'countries_per_film'
+    ]
+    
+    # Productoras por año como matrices dispersas país × productora (y 1 × productora)
+    company_films = cube['company_films']
+    company_totals = cube['company_films_total']
+    n_companies = int(max(
+        company_films.index.get_level_values('company_id').max() if len(company_films) else -1,
+        company_totals.index.get_level_values('company_id').max() if len(company_totals) else -1
+    )) + 1
+    
+    def _company_matrices(counts, section, by_country):
+        """Una matriz dispersa por año con las productoras de una sección"""
+        matrices = []
+        year_values = counts.index.get_level_values('year_idx')
+        section_values = counts.index.get_level_values('section_idx')
+        for year in range(len(cube['years'])):
+            cell = counts[(year_values == year) & (section_values == section)]
+            rows = cell.index.get_level_values('country_id') if by_country else np.zeros(len(cell), dtype=int)
+            matrices.append(sparse.csr_matrix(
+                (cell.to_numpy(), (rows, cell.index.get_level_values('company_id'))),
+                shape=(n_countries if by_country else 1, n_companies), dtype=np.int64
+            ))
+        return matrices
+    
+    return {
+        'years': cube['years'],
+        'sections': cube['sections'],
+        'country_names': cube['country_names'],
+        'country_iso3': cube['country_iso3'],
+        'country_ids': {name: i for i, name in enumerate(cube['country_names'])},
+        'per_year': {key: cube[key] for key in keys},
+        'cum': {key: _cumsum(cube[key]) for key in keys},
+        'cum_pairs': [
+            _sparse_cumsum([cube['coproduction_pairs'][y][s] for y in range(len(cube['years']))])
+            for s in range(n_sections)
+        ],
+        'cum_company_films': [
+            _sparse_cumsum(_company_matrices(company_films, s, by_country=True)) for s in range(n_sections)
+        ],
+        'cum_company_totals': [
+            _sparse_cumsum(_company_matrices(company_totals, s, by_country=False)) for s in range(n_sections)
+        ],
+    }
+
+def _year_bounds(year_index, year_range):
+    """Posiciones [lo, hi) del rango de años en el eje del índice"""
+    years = year_index['years']
+    lo = np.searchsorted(years, year_range[0], side='left')
+    hi = np.searchsorted(years, year_range[1], side='right')
+    return lo, max(lo, hi)
+
+def _section_positions(year_index, selected_section='Todas'):
+    """Posiciones de las secciones incluidas en el filtro"""
+    if selected_section in (None, 'Todas'):
+        return list(range(len(year_index['sections'])))
+    return [i for i, s in enumerate(year_index['sections']) if s == selected_section]
+
+def year_range_total(year_index, key, year_range, selected_section='Todas'):
+    """
+    Total de un agregado para un rango de años: cum[hi] - cum[lo], sumado sobre las secciones.
+    
+    Returns:
+        np.ndarray con la forma del agregado sin los ejes de año y sección
+    """
+    lo, hi = _year_bounds(year_index, year_range)
+    cum = year_index['cum'][key]
+    return (cum[hi] - cum[lo])[_section_positions(year_index, selected_section)].sum(axis=0)
+
+def year_range_coproductions(year_index, year_range, selected_section='Todas'):
+    """Matriz dispersa país × país de co-producciones del rango de años"""
+    lo, hi = _year_bounds(year_index, year_range)
+    n_countries = len(year_index['country_names'])
+    total = sparse.csr_matrix((n_countries, n_countries), dtype=np.int64)
+    for s in _section_positions(year_index, selected_section):
+        total = total + year_index['cum_pairs'][s][hi] - year_index['cum_pairs'][s][lo]
+    return total.tocsr()
+
+def year_range_companies(year_index, year_range, selected_section='Todas', country_id=None):
+    """
+    Películas por productora del rango de años (de un país o de todos).
+    
+    Returns:
+        np.ndarray indexado por company_id
+    """
+    lo, hi = _year_bounds(year_index, year_range)
+    key = 'cum_company_totals' if country_id is None else 'cum_company_films'
+    row = 0 if country_id is None else country_id
+    total = 0
+    for s in _section_positions(year_index, selected_section):
+        cum = year_index[key][s]
+        total = total + (cum[hi][row] - cum[lo][row]).toarray().ravel()
+    return np.asarray(total)
+
+def year_range_per_year(year_index, key, year_range, selected_section='Todas'):
+    """Valores año a año de un agregado dentro del rango (para series temporales)"""
+    lo, hi = _year_bounds(year_index, year_range)
+    values = year_index['per_year'][key][lo:hi][:, _section_positions(year_index, selected_section)]
+    return year_index['years'][lo:hi], values.sum(axis=1)
+
+def top_countries(year_index, countries, year_range, selected_section='Todas'):
+    """
+    Ranking de países del filtro a partir del índice por año.
+    
+    Returns:
+        DataFrame con columnas country_id, iso3, name, films (orden descendente)
+    """
+    counts = year_range_total(year_index, 'country_films', year_range, selected_section)
+    order = np.argsort(-counts, kind='stable')
+    order = order[counts[order] > 0]
+    result = countries.iloc[order].copy()
+    result['films'] = counts[order]
+    return result.reset_index(drop=True)
+
+def top_companies_for_country(year_index, companies, year_range, selected_section='Todas',
+                              country_id=None, top_n=10):
+    """
+    Principales productoras del filtro (opcionalmente de un país) a partir del índice por año.
+    
+    Returns:
+        DataFrame con columnas company_id, name, films
+    """
+    counts = year_range_companies(year_index, year_range, selected_section, country_id)
+    order = np.argsort(-counts, kind='stable')
+    order = order[counts[order] > 0]
+    if top_n is not None:
+        order = order[:top_n]
+    result = companies.set_index('company_id').loc[order, ['name']].reset_index()
+    result['films'] = counts[order]
+    return result
+
+@st.cache_data
+def load_year_index():
+    """Índice de sumas prefijas por año construido una vez sobre el cubo"""
+    return build_year_index(load_cube())
+
 def filter_data(df, year_range, selected_section='Todas'):
     """Filtra el DataFrame según los criterios seleccionados"""
     filtered_df = df[(df["year"] >= year_range[0]) & (df["year"] <= year_range[1])]
@@ -96,43 +400,86 @@ def filter_data(df, year_range, selected_section='Todas'):
     
     return filtered_df
 
-def get_coproduction_matrix(df, countries):
-    """Crea una matriz de co-producciones entre países"""
-    matrix = pd.DataFrame(0, index=countries, columns=countries)
+def film_country_indicator(df, country_matrix=None, country_table=None):
+    """
+    Matriz indicadora película × país de las películas de df.
     
-    for _, row in df.iterrows():
-        movie_countries = get_countries_from_string(row['countries_for_analysis'])
-        movie_countries = [c for c in movie_countries if c in countries]
-        
-        if len(movie_countries) > 1:
-            for i in range(len(movie_countries)):
-                for j in range(i+1, len(movie_countries)):
-                    country1, country2 = movie_countries[i], movie_countries[j]
-                    matrix.loc[country1, country2] += 1
-                    matrix.loc[country2, country1] += 1
+    Si se pasan country_matrix y country_table (ver load_country_matrix y
+    load_country_tables) y df tiene 'film_id', las filas se toman de esa matriz
+    por film_id. Si no, la matriz se construye desde la columna
+    'countries_for_analysis' de df, de modo que el resultado depende sólo de df.
+    
+    Returns:
+        tuple: (scipy.sparse.csr_matrix booleana len(df) × países, pd.Index con el
+            nombre del país de cada columna)
+    """
+    if country_matrix is not None and country_table is not None and 'film_id' in df.columns:
+        return country_matrix[df['film_id'].to_numpy()], pd.Index(country_table['name'])
+    if 'countries_for_analysis' not in df.columns:
+        return sparse.csr_matrix((len(df), 0), dtype=bool), pd.Index([])
+    country_table, film_country = build_country_tables_from_lists(
+        np.arange(len(df)), df['countries_for_analysis'].map(resolve_countries).tolist()
+    )
+    return build_country_matrix(film_country, len(df), len(country_table)), pd.Index(country_table['name'])
+
+def country_indicator(df, countries, country_matrix=None, country_table=None):
+    """
+    Submatriz de film_country_indicator con los países indicados, en ese orden.
+    
+    Un país sin películas da una columna vacía; nunca se densifica la matriz completa.
+    
+    Returns:
+        scipy.sparse.csr_matrix booleana (len(df) × len(countries))
+    """
+    indicator, names = film_country_indicator(df, country_matrix, country_table)
+    positions = pd.Series(np.arange(len(names)), index=names).reindex(countries)
+    present = positions.notna().to_numpy()
+    selector = sparse.csr_matrix(
+        (np.ones(int(present.sum()), dtype=np.int32), (positions[present].astype(int).to_numpy(), np.flatnonzero(present))),
+        shape=(len(names), len(countries))
+    )
+    return (indicator.astype(np.int32) @ selector).astype(bool).tocsr()
+
+def country_columns(df, countries, country_matrix=None, country_table=None):
+    """Columnas 0/1 sólo de los países indicados (para agrupar por año, filtrar...)"""
+    indicator = country_indicator(df, countries, country_matrix, country_table)
+    return pd.DataFrame(indicator.toarray().astype(int), index=df.index, columns=list(countries))
+
+def get_coproduction_matrix(df, countries, country_matrix=None, country_table=None):
+    """
+    Crea una matriz de co-producciones entre países.
     
-    return matrix
+    Se calcula con el motor Xᵀ·X (data_model.coproduction_matrix) sobre la
+    submatriz dispersa de los países pedidos (ver country_indicator).
+    """
+    coproductions = coproduction_matrix(country_indicator(df, countries, country_matrix, country_table))
+    return pd.DataFrame(coproductions.toarray(), index=countries, columns=countries)
 
-def get_country_production_companies(df, country, top_n=10):
-    """Obtiene las principales productoras de un país"""
+def get_country_production_companies(df, country, top_n=10, companies=None, film_company=None,
+                                     country_matrix=None, country_table=None):
+    """
+    Obtiene las principales productoras de un país.
+    
+    Si se pasan las tablas companies/film_company (ver load_company_tables) el conteo
+    es una agrupación por ID entero; si no, se construyen a partir del DataFrame.
+    country_matrix/country_table se usan igual que en film_country_indicator.
+    """
     if "productoras_consolidadas_normalized" not in df.columns:
         return pd.DataFrame(columns=["Productora", "Películas"])
     
     # Filtrar películas del país
-    country_films = df[df[country] == 1]
+    country_films = df[country_indicator(df, [country], country_matrix, country_table).toarray().ravel()]
     
-    # Extraer todas las productoras
-    all_companies = []
-    for companies in country_films["productoras_consolidadas_normalized"].dropna():
-        all_companies.extend([c.strip() for c in str(companies).split(',')])
+    if companies is None or film_company is None:
+        companies, film_company = build_company_tables(country_films, "productoras_consolidadas_normalized")
     
-    # Contar frecuencias
-    company_counter = Counter(all_companies)
+    film_ids = country_films["film_id"] if "film_id" in country_films.columns else country_films.index
+    top = top_companies(companies, film_company, film_ids, top_n)
     
     # Crear DataFrame
     companies_df = pd.DataFrame({
-        "Productora": [company for company, _ in company_counter.most_common(top_n)],
-        "Películas": [count for _, count in company_counter.most_common(top_n)]
+        "Productora": top["name"].tolist(),
+        "Películas": top["films"].tolist()
     })
     
     return companies_df
@@ -0,0 +1,91 @@
+"""
+Manejador inmutable del dataset para las funciones cacheadas con st.cache_data.
+
+Si una función cacheada recibe un DataFrame, Streamlit tiene que hashear el
+DataFrame completo en cada llamada sólo para obtener la clave, y con datos
+grandes eso cuesta más que el propio cálculo. DatasetHandle calcula el hash
+del contenido una sola vez al crearse; las funciones cacheadas reciben el
+manejador y Streamlit usa ese hash precalculado (búsqueda O(1)).
+"""
+import hashlib
+from dataclasses import dataclass, field
+
+import pandas as pd
+import streamlit as st
+
+
+def content_hash(df):
+    """
+    Hash estable del contenido de un DataFrame (valores, índice, columnas y tipos).
+
+    Las columnas con objetos no hashables (listas, dicts) se hashean por su repr.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(list(df.columns)).encode())
+    digest.update(repr([str(dtype) for dtype in df.dtypes]).encode())
+    digest.update(pd.util.hash_pandas_object(df.index, index=False).to_numpy().tobytes())
+    for column in df.columns:
+        values = df[column]
+        try:
+            hashed = pd.util.hash_pandas_object(values, index=False)
+        except TypeError:
+            hashed = pd.util.hash_pandas_object(values.map(repr), index=False)
+        digest.update(hashed.to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True, eq=False)
+class DatasetHandle:
+    """
+    Referencia inmutable a un DataFrame con su hash de contenido y su versión.
+
+    Dos manejadores son iguales si su contenido coincide. El DataFrame no debe
+    modificarse después de crear el manejador: para cambiar los datos se crea
+    uno nuevo con DatasetHandle.from_frame.
+    """
+    df: pd.DataFrame = field(repr=False)
+    content_hash: str
+    version: str = ""
+
+    @classmethod
+    def from_frame(cls, df, version=""):
+        """Crea el manejador calculando el hash del contenido una sola vez"""
+        return cls(df=df, content_hash=content_hash(df), version=str(version))
+
+    @property
+    def cache_key(self):
+        """Clave corta para cachés: versión y hash del contenido"""
+        return f"{self.version}:{self.content_hash}"
+
+    def __hash__(self):
+        return hash(self.content_hash)
+
+    def __eq__(self, other):
+        if not isinstance(other, DatasetHandle):
+            return NotImplemented
+        return self.content_hash == other.content_hash
+
+    def __len__(self):
+        return len(self.df)
+
+
+# Streamlit hashea el manejador por su clave precalculada, no por el DataFrame
+HANDLE_HASH_FUNCS = {DatasetHandle: lambda handle: handle.cache_key}
+
+
+def cache_by_handle(func=None, **cache_kwargs):
+    """
+    Equivalente a st.cache_data para funciones que reciben un DatasetHandle.
+
+    Uso:
+        @cache_by_handle(ttl=3600)
+        def f(dataset, min_weight=1): ...
+    """
+    hash_funcs = {**HANDLE_HASH_FUNCS, **cache_kwargs.pop('hash_funcs', {})}
+
+    def decorator(f):
+        return st.cache_data(f, hash_funcs=hash_funcs, **cache_kwargs)
+
+    if func is not None:
+        return decorator(func)
+    return decorator
@@ -0,0 +1,145 @@
+"""
+Descarga de una lista de URLs en tres modos: secuencial, con hilos y asíncrono.
+
+Los tres modos devuelven el mismo resultado por URL y reintentan las
+respuestas 429/503 respetando Retry-After, así que pueden compararse entre sí
+(ver benchmark_scraper.py, que los mide contra el servidor local de
+modules/mock_sites.py).
+
+El modo asíncrono necesita aiohttp (opcional: pip install aiohttp).
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+RETRY_STATUSES = (429, 503)
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 0.5
+DEFAULT_CONCURRENCY = 8
+TIMEOUT = 10
+
+
+def _retry_delay(headers, attempt):
+    """Espera antes de reintentar: Retry-After si viene, si no backoff exponencial"""
+    retry_after = headers.get("Retry-After")
+    if retry_after and retry_after.replace(".", "", 1).isdigit():
+        return float(retry_after)
+    return BACKOFF_SECONDS * (2 ** attempt)
+
+
+def _result(url, status, body, start, attempts, error=None):
+    """Resultado de una descarga (igual en los tres modos)"""
+    return {
+        "url": url,
+        "status": status,
+        "body": body,
+        "elapsed": time.perf_counter() - start,
+        "attempts": attempts,
+        "error": error
+    }
+
+
+def _fetch_with_session(session, url, headers):
+    """GET con reintentos para 429/503 usando una sesión de requests"""
+    start = time.perf_counter()
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            response = session.get(url, headers=headers, timeout=TIMEOUT)
+        except requests.exceptions.RequestException as e:
+            return _result(url, None, None, start, attempt + 1, str(e))
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            return _result(url, response.status_code, response.text, start, attempt + 1)
+        time.sleep(_retry_delay(response.headers, attempt))
+
+
+def fetch_sequential(urls, headers=None, concurrency=None):
+    """Descarga las URLs una detrás de otra con una sola sesión"""
+    with requests.Session() as session:
+        return [_fetch_with_session(session, url, headers) for url in urls]
+
+
+def fetch_threaded(urls, headers=None, concurrency=DEFAULT_CONCURRENCY):
+    """Descarga las URLs con un pool de hilos (una sesión por hilo)"""
+    # requests.Session no es segura entre hilos: una por hilo
+    local = threading.local()
+    sessions = []
+
+    def fetch(url):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+            sessions.append(local.session)
+        return _fetch_with_session(local.session, url, headers)
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(fetch, urls))
+    finally:
+        for session in sessions:
+            session.close()
+
+
+async def _fetch_async(session, semaphore, url, headers):
+    """GET asíncrono con reintentos para 429/503"""
+    async with semaphore:
+        # Como en los otros modos, la latencia se mide desde que la petición sale
+        start = time.perf_counter()
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                async with session.get(url, headers=headers) as response:
+                    body = await response.text()
+                    status = response.status
+                    response_headers = response.headers
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                return _result(url, None, None, start, attempt + 1, str(e))
+            if status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                return _result(url, status, body, start, attempt + 1)
+            await asyncio.sleep(_retry_delay(response_headers, attempt))
+
+
+async def _fetch_all_async(urls, headers, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    timeout = aiohttp.ClientTimeout(total=TIMEOUT)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        return await asyncio.gather(*(_fetch_async(session, semaphore, url, headers) for url in urls))
+
+
+def fetch_async(urls, headers=None, concurrency=DEFAULT_CONCURRENCY):
+    """Descarga las URLs con asyncio + aiohttp (como mucho `concurrency` a la vez)"""
+    if aiohttp is None:
+        raise ImportError("El modo async necesita aiohttp: pip install aiohttp")
+    return asyncio.run(_fetch_all_async(list(urls), headers, concurrency))
+
+
+FETCH_MODES = {
+    "sequential": fetch_sequential,
+    "threaded": fetch_threaded,
+    "async": fetch_async,
+}
+
+
+def fetch_urls(urls, mode="sequential", headers=None, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Descarga una lista de URLs en el modo indicado.
+
+    Args:
+        urls: Lista de URLs
+        mode: "sequential", "threaded" o "async"
+        headers: Cabeceras HTTP
+        concurrency: Peticiones simultáneas (no se usa en modo secuencial)
+
+    Returns:
+        Lista de dicts (url, status, body, elapsed, attempts, error) en el
+        orden de urls
+    """
+    if mode not in FETCH_MODES:
+        raise ValueError(f"Modo de descarga desconocido: {mode}")
+    return FETCH_MODES[mode](list(urls), headers=headers, concurrency=concurrency)
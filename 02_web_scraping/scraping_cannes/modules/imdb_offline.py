@@ -0,0 +1,338 @@
+"""
+Resolución de IDs de IMDb sin red a partir de los volcados no comerciales de IMDb.
+
+https://datasets.imdbws.com/ publica cada día, entre otros:
+
+- title.basics.tsv.gz: tconst, titleType, primaryTitle, originalTitle, startYear...
+- title.akas.tsv.gz: titleId, title (títulos alternativos por país/idioma)
+- title.crew.tsv.gz: tconst, directors (nconst separados por comas)
+- name.basics.tsv.gz: nconst, primaryName (opcional, para comparar directores)
+
+build_imdb_index() los lee una sola vez por bloques y guarda un índice en
+arrays .npy (título normalizado + año -> tconst, y directores por título).
+ImdbIndex los abre con memoria mapeada, de modo que cargarlo es instantáneo y
+resolver las ~500 películas del festival es una sola búsqueda vectorizada
+(np.searchsorted) sin ninguna petición HTTP. Las películas que no se resuelven
+(o son ambiguas) se dejan para la búsqueda en vivo.
+
+Uso:
+    python -m modules.imdb_offline /ruta/a/volcados [--out datos_generados/imdb_index]
+"""
+import argparse
+import os
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+IMDB_INDEX_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "datos_generados", "imdb_index"
+)
+
+# Tipos de título que pueden estar en la selección oficial
+TITLE_TYPES = {"movie": 0, "tvMovie": 1, "short": 2, "video": 3, "tvMiniSeries": 4}
+
+# Tolerancia de año entre Wikipedia (año del festival) e IMDb (año de estreno)
+YEAR_TOLERANCE = 1
+
+CHUNK_SIZE = 500_000
+
+INDEX_FILES = (
+    "title_hash", "title_year", "title_tconst", "title_type",
+    "crew_tconst", "crew_indptr", "crew_directors",
+    "name_hash", "name_nconst"
+)
+
+
+def normalize_title(title):
+    """
+    Normaliza un título para el índice: sin texto entre paréntesis, sin acentos,
+    en minúsculas y sólo letras/dígitos ('Marguerite & Julien(QP)' -> 'marguerite julien').
+    """
+    if not isinstance(title, str):
+        return ""
+    title = re.sub(r"\([^)]*\)", " ", title)
+    title = unicodedata.normalize("NFKD", title)
+    title = "".join(c for c in title if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", title.lower()).split())
+
+
+def hash_keys(values):
+    """Hash estable de 64 bits de cadenas ya normalizadas (vectorizado con pandas)"""
+    return pd.util.hash_array(np.asarray(values, dtype=object))
+
+
+def _id_number(ids, prefix):
+    """'tt0111161' -> 111161 ('\\N' o vacío -> -1)"""
+    numbers = pd.Series(ids, dtype=object).str.removeprefix(prefix)
+    return pd.to_numeric(numbers, errors="coerce").fillna(-1).to_numpy(dtype=np.int64)
+
+
+def _read_tsv(path, usecols):
+    """Lee un volcado de IMDb por bloques (TSV con '\\N' como nulo y sin comillas)"""
+    return pd.read_csv(
+        path, sep="\t", usecols=usecols, dtype=str, na_values="\\N", keep_default_na=False,
+        quoting=3, chunksize=CHUNK_SIZE
+    )
+
+
+def _lookup(sorted_ids, ids):
+    """Posición de cada id en sorted_ids y máscara de los que existen"""
+    pos = np.searchsorted(sorted_ids, ids)
+    pos = np.minimum(pos, max(len(sorted_ids) - 1, 0))
+    found = (sorted_ids[pos] == ids) if len(sorted_ids) else np.zeros(len(ids), dtype=bool)
+    return pos, found
+
+
+def build_imdb_index(dump_dir, out_dir=IMDB_INDEX_DIR):
+    """
+    Construye el índice en out_dir a partir de los volcados de dump_dir.
+
+    Returns:
+        dict con el número de títulos, claves de título y directores indexados
+    """
+    def dump(name):
+        for candidate in (f"{name}.tsv.gz", f"{name}.tsv"):
+            path = os.path.join(dump_dir, candidate)
+            if os.path.exists(path):
+                return path
+        return None
+
+    basics_path = dump("title.basics")
+    if basics_path is None:
+        raise FileNotFoundError(f"No se encontró title.basics.tsv(.gz) en {dump_dir}")
+
+    # Títulos principales y originales de los tipos relevantes
+    keys, years, tconsts, types = [], [], [], []
+    basics = []
+    for chunk in _read_tsv(basics_path, ["tconst", "titleType", "primaryTitle", "originalTitle", "startYear"]):
+        chunk = chunk[chunk["titleType"].isin(TITLE_TYPES)]
+        numbers = _id_number(chunk["tconst"], "tt")
+        year = pd.to_numeric(chunk["startYear"], errors="coerce").fillna(0).to_numpy(dtype=np.int16)
+        kind = chunk["titleType"].map(TITLE_TYPES).to_numpy(dtype=np.int8)
+        basics.append((numbers, year, kind))
+        for column in ("primaryTitle", "originalTitle"):
+            keys.append(chunk[column].map(normalize_title).to_numpy(dtype=object))
+            years.append(year)
+            tconsts.append(numbers)
+            types.append(kind)
+
+    # Año y tipo por tconst (ordenado) para los títulos alternativos
+    basics_tconst = np.concatenate([b[0] for b in basics]) if basics else np.array([], dtype=np.int64)
+    order = np.argsort(basics_tconst, kind="stable")
+    basics_tconst = basics_tconst[order]
+    basics_year = np.concatenate([b[1] for b in basics])[order] if basics else np.array([], dtype=np.int16)
+    basics_type = np.concatenate([b[2] for b in basics])[order] if basics else np.array([], dtype=np.int8)
+
+    # Títulos alternativos (sólo de títulos indexados; heredan su año y tipo)
+    akas_path = dump("title.akas")
+    if akas_path:
+        for chunk in _read_tsv(akas_path, ["titleId", "title"]):
+            numbers = _id_number(chunk["titleId"], "tt")
+            pos, known = _lookup(basics_tconst, numbers)
+            keys.append(chunk.loc[known, "title"].map(normalize_title).to_numpy(dtype=object))
+            years.append(basics_year[pos[known]])
+            tconsts.append(numbers[known])
+            types.append(basics_type[pos[known]])
+
+    titles = pd.DataFrame({
+        "key": np.concatenate(keys) if keys else np.array([], dtype=object),
+        "year": np.concatenate(years) if years else np.array([], dtype=np.int16),
+        "tconst": np.concatenate(tconsts) if tconsts else np.array([], dtype=np.int64),
+        "type": np.concatenate(types) if types else np.array([], dtype=np.int8),
+    })
+    titles = titles[titles["key"] != ""].drop_duplicates(["key", "tconst"])
+    titles["hash"] = hash_keys(titles["key"])
+    titles = titles.sort_values(["hash", "tconst"], kind="stable")
+
+    # Directores de los títulos indexados, como CSR ordenado por tconst
+    crew_tconst = np.array([], dtype=np.int64)
+    crew_indptr = np.zeros(1, dtype=np.int64)
+    crew_directors = np.array([], dtype=np.int64)
+    crew_path = dump("title.crew")
+    if crew_path:
+        pairs = []
+        for chunk in _read_tsv(crew_path, ["tconst", "directors"]):
+            chunk = chunk.dropna(subset=["directors"])
+            numbers = _id_number(chunk["tconst"], "tt")
+            _, known = _lookup(basics_tconst, numbers)
+            chunk = chunk[known].assign(tconst=numbers[known], directors=lambda c: c["directors"].str.split(","))
+            pairs.append(chunk.explode("directors"))
+        if pairs:
+            crew = pd.concat(pairs)
+            crew["nconst"] = _id_number(crew["directors"], "nm")
+            crew = crew.sort_values(["tconst", "nconst"], kind="stable")
+            crew_tconst, starts = np.unique(crew["tconst"].to_numpy(), return_index=True)
+            crew_indptr = np.append(starts, len(crew)).astype(np.int64)
+            crew_directors = crew["nconst"].to_numpy(dtype=np.int64)
+
+    # Nombres de los directores (para comparar con la columna 'director')
+    name_hash = np.array([], dtype=np.uint64)
+    name_nconst = np.array([], dtype=np.int64)
+    names_path = dump("name.basics")
+    if names_path and len(crew_directors):
+        wanted = np.unique(crew_directors)
+        names = []
+        for chunk in _read_tsv(names_path, ["nconst", "primaryName"]):
+            numbers = _id_number(chunk["nconst"], "nm")
+            _, known = _lookup(wanted, numbers)
+            names.append(pd.DataFrame({
+                "hash": hash_keys(chunk.loc[known, "primaryName"].map(normalize_title)),
+                "nconst": numbers[known]
+            }))
+        if names:
+            names = pd.concat(names).sort_values(["hash", "nconst"], kind="stable")
+            name_hash = names["hash"].to_numpy(dtype=np.uint64)
+            name_nconst = names["nconst"].to_numpy(dtype=np.int64)
+
+    os.makedirs(out_dir, exist_ok=True)
+    arrays = {
+        "title_hash": titles["hash"].to_numpy(dtype=np.uint64),
+        "title_year": titles["year"].to_numpy(dtype=np.int16),
+        "title_tconst": titles["tconst"].to_numpy(dtype=np.int64),
+        "title_type": titles["type"].to_numpy(dtype=np.int8),
+        "crew_tconst": crew_tconst.astype(np.int64),
+        "crew_indptr": crew_indptr,
+        "crew_directors": crew_directors,
+        "name_hash": name_hash,
+        "name_nconst": name_nconst,
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), array)
+
+    return {
+        "titles": len(basics_tconst),
+        "title_keys": len(titles),
+        "directors": len(np.unique(crew_directors)),
+    }
+
+
+class ImdbIndex:
+    """Índice título + año -> tconst abierto con memoria mapeada."""
+
+    def __init__(self, index_dir=IMDB_INDEX_DIR):
+        self.index_dir = index_dir
+        for name in INDEX_FILES:
+            setattr(self, name, np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode="r"))
+
+    @classmethod
+    def exists(cls, index_dir=IMDB_INDEX_DIR):
+        """True si el índice está construido en index_dir"""
+        return all(os.path.exists(os.path.join(index_dir, f"{name}.npy")) for name in INDEX_FILES)
+
+    def directors_of(self, tconst):
+        """nconst de los directores de un título"""
+        pos = np.searchsorted(self.crew_tconst, tconst)
+        if pos >= len(self.crew_tconst) or self.crew_tconst[pos] != tconst:
+            return set()
+        return set(self.crew_directors[self.crew_indptr[pos]:self.crew_indptr[pos + 1]].tolist())
+
+    def nconsts_named(self, name):
+        """nconst de las personas con ese nombre (normalizado)"""
+        key = normalize_title(name)
+        if not key or not len(self.name_hash):
+            return set()
+        h = hash_keys([key])[0]
+        lo = np.searchsorted(self.name_hash, h, side="left")
+        hi = np.searchsorted(self.name_hash, h, side="right")
+        return set(self.name_nconst[lo:hi].tolist())
+
+    def _pick(self, candidates, year, director):
+        """
+        Elige un tconst entre los candidatos (tconst, año, tipo) de un título.
+
+        Orden de desempate: coincidencia de director, año exacto y tipo 'movie'.
+        Si sigue habiendo más de un título posible se devuelve None.
+        """
+        if year is not None:
+            candidates = [c for c in candidates if c[1] and abs(int(c[1]) - int(year)) <= YEAR_TOLERANCE]
+        tconsts = list(dict.fromkeys(c[0] for c in candidates))
+        if len(tconsts) <= 1:
+            return tconsts[0] if tconsts else None
+
+        if director:
+            director_ids = self.nconsts_named(director)
+            if director_ids:
+                matches = [t for t in tconsts if self.directors_of(t) & director_ids]
+                if len(matches) == 1:
+                    return matches[0]
+                if matches:
+                    candidates = [c for c in candidates if c[0] in matches]
+
+        for keep in (
+            lambda c: year is not None and int(c[1]) == int(year),
+            lambda c: c[2] == TITLE_TYPES["movie"],
+        ):
+            narrowed = [c for c in candidates if keep(c)]
+            if narrowed:
+                candidates = narrowed
+            tconsts = list(dict.fromkeys(c[0] for c in candidates))
+            if len(tconsts) == 1:
+                return tconsts[0]
+        return None
+
+    def resolve_many(self, titles, years=None, directors=None):
+        """
+        Resuelve en bloque listas paralelas de títulos, años y directores.
+
+        Returns:
+            Lista de IDs 'tt…' (None si no hay coincidencia o es ambigua)
+        """
+        n = len(titles)
+        years = list(years) if years is not None else [None] * n
+        directors = list(directors) if directors is not None else [None] * n
+        keys = [normalize_title(t) for t in titles]
+        hashes = hash_keys(keys)
+
+        # Rango de filas del índice de cada título: una sola búsqueda vectorizada
+        starts = np.searchsorted(self.title_hash, hashes, side="left")
+        ends = np.searchsorted(self.title_hash, hashes, side="right")
+
+        results = []
+        for key, start, end, year, director in zip(keys, starts, ends, years, directors):
+            if not key or start == end:
+                results.append(None)
+                continue
+            year = None if year is None or pd.isna(year) else int(year)
+            candidates = list(zip(
+                self.title_tconst[start:end].tolist(),
+                self.title_year[start:end].tolist(),
+                self.title_type[start:end].tolist()
+            ))
+            tconst = self._pick(candidates, year, director if isinstance(director, str) else None)
+            results.append(f"tt{tconst:07d}" if tconst is not None else None)
+        return results
+
+
+def resolve_imdb_ids_offline(df, index_dir=IMDB_INDEX_DIR, title_column="title",
+                             year_column="year", director_column="director"):
+    """
+    IDs de IMDb de las películas de df resueltos con el índice local.
+
+    Returns:
+        pd.Series alineada con df.index (None donde no se resuelve), o None si
+        el índice no está construido
+    """
+    if not ImdbIndex.exists(index_dir):
+        return None
+    index = ImdbIndex(index_dir)
+    directors = df[director_column] if director_column in df.columns else None
+    ids = index.resolve_many(df[title_column].tolist(), df[year_column].tolist(), directors)
+    return pd.Series(ids, index=df.index, dtype=object)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construye el índice local de IDs de IMDb")
+    parser.add_argument("dump_dir", help="Carpeta con title.basics/title.akas/title.crew/name.basics (.tsv.gz)")
+    parser.add_argument("--out", default=IMDB_INDEX_DIR, help="Carpeta de salida del índice")
+    args = parser.parse_args()
+
+    stats = build_imdb_index(args.dump_dir, args.out)
+    print(f"✅ Índice IMDb: {stats['titles']} títulos, {stats['title_keys']} claves, "
+          f"{stats['directors']} directores -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Extractor de la página principal de un título de IMDb.
+
+La página /title/ttXXXXXXX/ incluye los datos de la película en JSON: el bloque
+JSON-LD (<script type="application/ld+json">) y el estado de Next.js
+(<script id="__NEXT_DATA__">). Leyendo ese JSON una sola vez se obtienen
+título, año, países de origen y productoras sin pedir /technical/ ni
+/companycredits; los selectores HTML sólo hacen falta si el JSON no trae
+algún dato.
+"""
+import json
+import re
+
+# Los bloques se localizan con expresiones regulares: no hace falta montar el
+# árbol HTML completo para leer dos <script>
+_NEXT_DATA_RE = re.compile(
+    r'<script[^>]*\bid=["\']__NEXT_DATA__["\'][^>]*>(.*?)</script>', re.DOTALL | re.IGNORECASE
+)
+_LD_JSON_RE = re.compile(
+    r'<script[^>]*\btype=["\']application/ld\+json["\'][^>]*>(.*?)</script>', re.DOTALL | re.IGNORECASE
+)
+
+
+def _load_json(text):
+    """json.loads que devuelve None si el bloque no es JSON válido"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def _text(node):
+    """Texto de un nodo {'text': ...} del JSON de IMDb (o de un str)"""
+    if isinstance(node, str):
+        return node
+    if isinstance(node, dict):
+        return node.get("text") or node.get("name")
+    return None
+
+
+def _unique(values):
+    """Valores no vacíos sin duplicados, en el orden original"""
+    return list(dict.fromkeys(v.strip() for v in values if v and v.strip()))
+
+
+def _parse_next_data(data):
+    """Título, año, países y productoras del estado __NEXT_DATA__"""
+    page_props = (data.get("props") or {}).get("pageProps") or {}
+    above = page_props.get("aboveTheFoldData") or {}
+    main = page_props.get("mainColumnData") or {}
+
+    title = _text(above.get("titleText")) or _text(above.get("originalTitleText"))
+    year = (above.get("releaseYear") or {}).get("year")
+
+    countries = []
+    for block in (main, above):
+        origin = block.get("countriesOfOrigin") or {}
+        countries = [_text(c) for c in origin.get("countries") or []]
+        if countries:
+            break
+
+    companies = []
+    for block in (above, main):
+        edges = (block.get("production") or {}).get("edges") or []
+        companies = [_text(((edge.get("node") or {}).get("company") or {}).get("companyText")) for edge in edges]
+        if companies:
+            break
+
+    return {
+        "title": title,
+        "year": year,
+        "countries": _unique(countries),
+        "companies": _unique(companies)
+    }
+
+
+def _parse_ld_json(data):
+    """Título, año y países del bloque JSON-LD (schema.org/Movie)"""
+    if isinstance(data, list):
+        data = next((d for d in data if isinstance(d, dict) and d.get("@type") == "Movie"), {})
+    origin = data.get("countryOfOrigin") or []
+    if isinstance(origin, dict):
+        origin = [origin]
+    published = str(data.get("datePublished") or "")
+    return {
+        "title": data.get("name"),
+        "year": int(published[:4]) if published[:4].isdigit() else None,
+        "countries": _unique(_text(c) for c in origin),
+        # JSON-LD sólo enlaza las productoras por URL (sin nombre)
+        "companies": []
+    }
+
+
+def parse_imdb_title_page(html):
+    """
+    Extrae los datos de una película de la página principal de IMDb.
+
+    Se combinan __NEXT_DATA__ (más completo) y JSON-LD: para cada campo se usa
+    el primer bloque que lo tenga.
+
+    Args:
+        html: HTML de https://www.imdb.com/title/<imdb_id>/
+
+    Returns:
+        dict: title, year, countries (lista), companies (lista) y sources
+        (bloques JSON encontrados); los campos ausentes quedan en None o []
+    """
+    result = {"title": None, "year": None, "countries": [], "companies": [], "sources": []}
+
+    parsed = []
+    match = _NEXT_DATA_RE.search(html)
+    data = _load_json(match.group(1)) if match else None
+    if isinstance(data, dict):
+        parsed.append(("next_data", _parse_next_data(data)))
+    for match in _LD_JSON_RE.finditer(html):
+        data = _load_json(match.group(1))
+        if isinstance(data, (dict, list)):
+            parsed.append(("ld_json", _parse_ld_json(data)))
+
+    for source, fields in parsed:
+        result["sources"].append(source)
+        for field, value in fields.items():
+            if value and not result[field]:
+                result[field] = value
+
+    return result
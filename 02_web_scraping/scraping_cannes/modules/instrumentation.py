@@ -0,0 +1,232 @@
+"""
+Instrumentación del pipeline de scraping: tiempos por etapa y por petición.
+
+Tracer registra:
+    - por etapa (extract_films_and_companies_from_wiki, enrich_with_imdb_data,
+      consolidate_production_companies...): tiempo real y de CPU
+    - por petición: espera en cola (pausas de cortesía), conexión, tiempo
+      hasta el primer byte (TTFB), descarga y parseo
+    - contadores (aciertos/fallos de las cachés, páginas servidas offline...)
+
+Al final se imprime una tabla resumen y se guarda una traza JSON en
+datos_generados/trazas/. Con profile="cprofile" (o "pyinstrument", si está
+instalado) cada etapa se perfila y el perfil se guarda junto a la traza.
+"""
+import cProfile
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import numpy as np
+
+from .pipeline_logging import get_logger
+
+log = get_logger(__name__)
+
+TRACE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "datos_generados", "trazas"
+)
+PHASES = ["queue_wait", "connect", "ttfb", "download", "parse"]
+
+# Tiempo de conexión (TCP + TLS) de la petición en curso en cada hilo
+_connect_time = threading.local()
+
+
+def install_connect_timer():
+    """
+    Mide el tiempo de conexión de urllib3 (lo que usa requests).
+
+    requests no separa la conexión del resto de la petición: se envuelve
+    connect() de las conexiones de urllib3 y el tiempo se acumula por hilo
+    (ver pop_connect_time). Las conexiones reutilizadas (keep-alive) suman 0.
+    """
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+
+    for cls in (HTTPConnection, HTTPSConnection):
+        original = cls.__dict__.get("connect")
+        if original is None or getattr(original, "_timed", False):
+            continue
+
+        def timed_connect(self, _original=original):
+            start = time.perf_counter()
+            try:
+                return _original(self)
+            finally:
+                _connect_time.value = getattr(_connect_time, "value", 0.0) + time.perf_counter() - start
+
+        timed_connect._timed = True
+        cls.connect = timed_connect
+
+
+def pop_connect_time():
+    """Tiempo de conexión acumulado en este hilo desde la última llamada"""
+    value = getattr(_connect_time, "value", 0.0)
+    _connect_time.value = 0.0
+    return value
+
+
+def _ensure_dir(directory):
+    """Crea el directorio de salida (fuera del repositorio vía .gitignore)"""
+    if not os.path.isdir(directory):
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, ".gitignore"), "w") as f:
+            f.write("*\n")
+
+
+class Tracer:
+    """Tiempos por etapa y por petición de una ejecución del pipeline."""
+
+    def __init__(self, profile=None, trace_dir=TRACE_DIR):
+        # profile: None, "cprofile" o "pyinstrument"
+        self.profile = profile
+        self.trace_dir = trace_dir
+        self.run_id = time.strftime("%Y%m%d-%H%M%S")
+        self.stages = []
+        self.requests = []
+        self.counters = Counter()
+        self.profiles = []
+        self._pending_wait = 0.0
+        self._last_request = None
+        self._lock = threading.Lock()
+
+    def _profiler(self):
+        """Perfilador de una etapa según self.profile (None si no se perfila)"""
+        if self.profile == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                log.warning("⚠️ pyinstrument no está instalado (pip install pyinstrument); se usa cProfile")
+                self.profile = "cprofile"
+            else:
+                return Profiler()
+        if self.profile == "cprofile":
+            return cProfile.Profile()
+        return None
+
+    def _save_profile(self, name, profiler):
+        """Guarda el perfil de una etapa (.prof de cProfile o .html de pyinstrument)"""
+        _ensure_dir(self.trace_dir)
+        if isinstance(profiler, cProfile.Profile):
+            path = os.path.join(self.trace_dir, f"perfil-{self.run_id}-{name}.prof")
+            profiler.dump_stats(path)
+        else:
+            path = os.path.join(self.trace_dir, f"perfil-{self.run_id}-{name}.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+        self.profiles.append(path)
+
+    @contextmanager
+    def stage(self, name):
+        """Mide (y perfila, si se pidió) una etapa del pipeline"""
+        profiler = self._profiler()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        requests_before = len(self.requests)
+        if isinstance(profiler, cProfile.Profile):
+            profiler.enable()
+        elif profiler is not None:
+            profiler.start()
+        try:
+            yield
+        finally:
+            if isinstance(profiler, cProfile.Profile):
+                profiler.disable()
+            elif profiler is not None:
+                profiler.stop()
+            if profiler is not None:
+                self._save_profile(name, profiler)
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            self.stages.append({
+                "stage": name,
+                "wall_s": wall,
+                "cpu_s": cpu,
+                "requests": len(self.requests) - requests_before
+            })
+
+    def wait(self, seconds):
+        """Registra una espera programada (se imputa a la siguiente petición como cola)"""
+        with self._lock:
+            self._pending_wait += seconds
+
+    def record_request(self, url, kind, status, connect, ttfb, download, size, source="network"):
+        """
+        Registra una petición con sus fases (en segundos).
+
+        source="archive" marca las páginas servidas desde el archivo (modo
+        offline): no tienen fases de red, pero su parseo se imputa a ellas y no
+        a la última petición real.
+        """
+        with self._lock:
+            record = {
+                "url": url, "kind": kind, "status": status, "source": source,
+                "queue_wait": self._pending_wait, "connect": connect, "ttfb": ttfb,
+                "download": download, "parse": 0.0, "bytes": size
+            }
+            self._pending_wait = 0.0
+            self.requests.append(record)
+            self._last_request = record
+
+    def record_parse(self, seconds, cached):
+        """Registra el parseo de una página (se imputa a la última petición)"""
+        with self._lock:
+            self.count(f"parse_cache_{'hit' if cached else 'miss'}")
+            if self._last_request is not None:
+                self._last_request["parse"] += seconds
+
+    def count(self, name, amount=1):
+        """Suma a un contador"""
+        self.counters[name] += amount
+
+    def summary(self):
+        """Tabla resumen (texto) de etapas, peticiones por tipo y contadores"""
+        lines = [f"{'Etapa':<40}{'Real (s)':>10}{'CPU (s)':>10}{'CPU %':>8}{'Peticiones':>12}"]
+        for stage in self.stages:
+            cpu_pct = 100 * stage["cpu_s"] / stage["wall_s"] if stage["wall_s"] else 0
+            lines.append(
+                f"{stage['stage']:<40}{stage['wall_s']:>10.2f}{stage['cpu_s']:>10.2f}{cpu_pct:>7.0f}%{stage['requests']:>12}"
+            )
+
+        if self.requests:
+            lines.append("")
+            lines.append(f"{'Peticiones (media ms)':<26}{'n':>6}" + "".join(f"{p:>12}" for p in PHASES) + f"{'p95 ttfb':>10}{'KB':>8}")
+            def label(r):
+                return (r["kind"] or "otras") + (" (archivo)" if r.get("source") == "archive" else "")
+
+            kinds = sorted({label(r) for r in self.requests})
+            for kind in kinds:
+                group = [r for r in self.requests if label(r) == kind]
+                means = [1000 * np.mean([r[p] for r in group]) for p in PHASES]
+                p95 = 1000 * np.percentile([r["ttfb"] for r in group], 95)
+                kb = np.mean([r["bytes"] for r in group]) / 1024
+                lines.append(f"{kind:<26}{len(group):>6}" + "".join(f"{m:>12.1f}" for m in means) + f"{p95:>10.1f}{kb:>8.0f}")
+
+        if self.counters:
+            lines.append("")
+            lines.append("Contadores: " + ", ".join(f"{k}={v}" for k, v in sorted(self.counters.items())))
+        if self.profiles:
+            lines.append("Perfiles: " + ", ".join(self.profiles))
+        return "\n".join(lines)
+
+    def save(self, path=None):
+        """
+        Guarda la traza en JSON (por defecto datos_generados/trazas/traza-<fecha>.json).
+
+        Returns:
+            str: Ruta del fichero
+        """
+        if path is None:
+            _ensure_dir(self.trace_dir)
+            path = os.path.join(self.trace_dir, f"traza-{self.run_id}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "run_id": self.run_id,
+                "stages": self.stages,
+                "requests": self.requests,
+                "counters": dict(self.counters),
+                "profiles": self.profiles
+            }, f, ensure_ascii=False, indent=1)
+        return path
@@ -1,40 +1,160 @@
+import numpy as np
 import pandas as pd
+from scipy import sparse
 from typing import List, Dict, Any, Optional
-from .data_processing import get_countries_from_string
+from .data_processing import (
+    film_country_indicator, year_range_total, year_range_coproductions,
+    year_range_companies, year_range_per_year
+)
+from .data_model import build_company_tables, coproduction_matrix
 
 
-def calculate_kpis(df: pd.DataFrame, countries: List[str], focus_country: Optional[str] = None) -> Dict[str, Any]:
+def calculate_kpis_from_year_index(year_index: Dict[str, Any], year_range, countries: List[str],
+                                   focus_country: Optional[str] = None,
+                                   selected_section: str = 'Todas') -> Dict[str, Any]:
+    """
+    Calcula los mismos KPIs que calculate_kpis a partir del índice de sumas prefijas.
+    
+    Cada total de rango es cum[hi] - cum[lo], de modo que el coste no depende
+    del número de películas ni de la amplitud del rango de años.
+    
+    Args:
+        year_index (Dict[str, Any]): Índice devuelto por build_year_index
+        year_range: Tupla (año inicial, año final)
+        countries (List[str]): Lista de países seleccionados para el análisis
+        focus_country (Optional[str]): País específico para calcular métricas adicionales
+        selected_section (str): Sección seleccionada ('Todas' para no filtrar)
+        
+    Returns:
+        Dict[str, Any]: Diccionario con los KPIs calculados
+    """
+    def total(key):
+        return year_range_total(year_index, key, year_range, selected_section)
+    
+    kpis = {}
+    country_ids = year_index['country_ids']
+    country_names = year_index['country_names']
+    
+    films = int(total('films'))
+    films_with_countries = int(total('films_with_countries'))
+    coproduction_films = int(total('coproduction_films'))
+    films_per_country = total('country_films')
+    
+    kpis['total_films'] = films
+    kpis['total_countries'] = int((films_per_country > 0).sum())
+    kpis['avg_countries_per_film'] = (
+        total('country_links') / films_with_countries
+    ) if films_with_countries > 0 else 0
+    kpis['coproduction_percentage'] = (coproduction_films / films * 100) if films > 0 else 0
+    
+    if focus_country:
+        focus_id = country_ids.get(focus_country)
+        country_films = int(films_per_country[focus_id]) if focus_id is not None else 0
+        country_coproductions = int(total('country_coproduction_films')[focus_id]) if focus_id is not None else 0
+        
+        kpis['country_films'] = country_films
+        kpis['country_percentage'] = (country_films / films * 100) if films > 0 else 0
+        kpis['country_coproductions'] = country_coproductions
+        kpis['country_coproduction_percentage'] = (
+            country_coproductions / country_films * 100
+        ) if country_films > 0 else 0
+        
+        if country_films > 0:
+            focus_row = year_range_coproductions(year_index, year_range, selected_section)[focus_id].toarray().ravel()
+            coproducer_counts = pd.Series(focus_row, index=country_names)
+            coproducer_counts = coproducer_counts[coproducer_counts > 0].sort_values(ascending=False, kind='stable')
+            kpis['top_coproducers'] = coproducer_counts.head(5).to_dict()
+        else:
+            kpis['top_coproducers'] = {}
+    
+    if countries:
+        kpis['country_films_counts'] = {
+            country: int(films_per_country[country_ids[country]]) if country in country_ids else 0
+            for country in countries
+        }
+    
+    distribution = total('countries_per_film')
+    kpis['coproduction_distribution'] = {
+        n: int(count) for n, count in enumerate(distribution) if count > 0
+    }
+    
+    years, yearly_films = year_range_per_year(year_index, 'films', year_range, selected_section)
+    _, yearly_coproductions = year_range_per_year(year_index, 'coproduction_films', year_range, selected_section)
+    _, yearly_links = year_range_per_year(year_index, 'country_links', year_range, selected_section)
+    _, yearly_with_countries = year_range_per_year(year_index, 'films_with_countries', year_range, selected_section)
+    kpis['yearly_stats'] = {
+        int(year): {
+            'total': int(yearly_films[i]),
+            'coproductions': int(yearly_coproductions[i]),
+            'avg_countries': (yearly_links[i] / yearly_with_countries[i]) if yearly_with_countries[i] > 0 else np.nan
+        }
+        for i, year in enumerate(years) if yearly_films[i] > 0
+    }
+    
+    kpis['total_production_companies'] = int(
+        (year_range_companies(year_index, year_range, selected_section) > 0).sum()
+    )
+    
+    return kpis
+
+
+def calculate_kpis(df: pd.DataFrame, countries: List[str], focus_country: Optional[str] = None,
+                   film_company: Optional[pd.DataFrame] = None,
+                   year_index: Optional[Dict[str, Any]] = None, year_range=None,
+                   selected_section: str = 'Todas', country_matrix: Optional[sparse.spmatrix] = None,
+                   country_table: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
     """
     Calcula los KPIs principales del análisis del Festival de Cannes.
     
+    Todos los indicadores por país se obtienen de una única matriz indicadora
+    película × país (ver film_country_indicator): las filas de country_matrix
+    de las películas de df si se pasa, o la construida desde df si no.
+    Si se pasan year_index y year_range, los KPIs se responden con sumas prefijas
+    (ver calculate_kpis_from_year_index) y df no se recorre.
+    
     Args:
         df (pd.DataFrame): DataFrame con los datos filtrados
         countries (List[str]): Lista de países seleccionados para el análisis
         focus_country (Optional[str]): País específico para calcular métricas adicionales
+        film_company (Optional[pd.DataFrame]): Tabla puente película-productora ya construida
+        year_index (Optional[Dict[str, Any]]): Índice de sumas prefijas por año
+        year_range: Tupla (año inicial, año final) del filtro aplicado a df
+        selected_section (str): Sección del filtro aplicado a df
+        country_matrix (Optional[sparse.spmatrix]): Matriz película × país ya construida (load_country_matrix)
+        country_table (Optional[pd.DataFrame]): Dimensión de países de esa matriz (load_country_tables)
         
     Returns:
         Dict[str, Any]: Diccionario con los KPIs calculados
     """
+    if year_index is not None and year_range is not None:
+        return calculate_kpis_from_year_index(year_index, year_range, countries, focus_country, selected_section)
+    
     # Inicializar diccionario de KPIs
     kpis = {}
     
     # Total de películas en el dataset filtrado
     kpis['total_films'] = len(df)
     
-    # Convertir los países a formato lista para facilitar análisis
-    if not df.empty and 'countries_for_analysis' in df.columns:
-        # Obtener todos los países únicos mencionados
-        all_countries = set()
-        for countries_str in df['countries_for_analysis'].dropna():
-            countries_list = get_countries_from_string(countries_str)
-            all_countries.update(countries_list)
-        
-        kpis['total_countries'] = len(all_countries)
-        
-        # Calcular número de países por película
-        countries_per_film = df['countries_for_analysis'].dropna().apply(
-            lambda x: len(get_countries_from_string(x))
-        )
+    has_country_column = 'countries_for_analysis' in df.columns or (
+        country_matrix is not None and 'film_id' in df.columns
+    )
+    
+    # Matriz indicadora de las películas filtradas y número de países por película
+    indicator, indicator_countries = film_country_indicator(df, country_matrix, country_table)
+    
+    films_countries = indicator.getnnz(axis=1)
+    has_countries = films_countries > 0
+    is_coproduction = films_countries > 1
+    
+    # Número de países por película (sólo películas con dato de país)
+    countries_per_film = pd.Series(films_countries[has_countries])
+    
+    # Películas por país = suma de cada columna de la matriz
+    films_per_country = pd.Series(np.asarray(indicator.sum(axis=0)).ravel(), index=indicator_countries)
+    
+    if not df.empty and has_country_column:
+        # Países únicos mencionados
+        kpis['total_countries'] = int((films_per_country > 0).sum())
         
         # Media de países por película
         kpis['avg_countries_per_film'] = countries_per_film.mean() if not countries_per_film.empty else 0
@@ -50,10 +170,13 @@ def calculate_kpis(df: pd.DataFrame, countries: List[str], focus_country: Option
     
     # Si se especifica un país de enfoque, calcular KPIs adicionales
     if focus_country:
+        if focus_country in indicator_countries:
+            focus_column = indicator[:, indicator_countries.get_loc(focus_country)].toarray().ravel()
+        else:
+            focus_column = np.zeros(len(df), dtype=bool)
+        
         # Películas que incluyen al país de enfoque
-        country_films = df['countries_for_analysis'].dropna().apply(
-            lambda x: focus_country in get_countries_from_string(x)
-        ).sum()
+        country_films = int(focus_column.sum())
         
         kpis['country_films'] = country_films
         
@@ -61,9 +184,7 @@ def calculate_kpis(df: pd.DataFrame, countries: List[str], focus_country: Option
         kpis['country_percentage'] = (country_films / len(df) * 100) if len(df) > 0 else 0
         
         # Co-producciones del país de enfoque (películas donde participa junto con otros países)
-        country_coproductions = df['countries_for_analysis'].dropna().apply(
-            lambda x: focus_country in get_countries_from_string(x) and len(get_countries_from_string(x)) > 1
-        ).sum()
+        country_coproductions = int((focus_column & is_coproduction).sum())
         
         kpis['country_coproductions'] = country_coproductions
         
@@ -72,28 +193,23 @@ def calculate_kpis(df: pd.DataFrame, countries: List[str], focus_country: Option
             country_coproductions / country_films * 100
         ) if country_films > 0 else 0
         
-        # Principales países co-productores con el país de enfoque
-        coproducer_countries = []
-        for countries_str in df['countries_for_analysis'].dropna():
-            countries_list = get_countries_from_string(countries_str)
-            if focus_country in countries_list and len(countries_list) > 1:
-                coproducer_countries.extend([c for c in countries_list if c != focus_country])
+        # Principales países co-productores con el país de enfoque (fila del motor Xᵀ·X)
+        if country_films > 0:
+            coproductions = coproduction_matrix(indicator)
+            focus_row = coproductions[indicator_countries.get_loc(focus_country)].toarray().ravel()
+            coproducer_counts = pd.Series(focus_row, index=indicator_countries)
+            coproducer_counts = coproducer_counts[coproducer_counts > 0].sort_values(ascending=False, kind='stable')
+        else:
+            coproducer_counts = pd.Series(dtype=int)
         
         # Top co-productores
-        coproducer_counts = pd.Series(coproducer_countries).value_counts()
         kpis['top_coproducers'] = coproducer_counts.head(5).to_dict() if not coproducer_counts.empty else {}
     
     # Añadir KPIs para todos los países seleccionados
     if countries:
-        country_films_counts = {}
-        for country in countries:
-            # Contar películas por país
-            count = df['countries_for_analysis'].dropna().apply(
-                lambda x: country in get_countries_from_string(x)
-            ).sum()
-            country_films_counts[country] = count
-        
-        kpis['country_films_counts'] = country_films_counts
+        kpis['country_films_counts'] = {
+            country: int(films_per_country.get(country, 0)) for country in countries
+        }
     
     # Calcular distribución de co-producciones por número de países
     coproduction_distribution = countries_per_film.value_counts().sort_index().to_dict()
@@ -101,33 +217,36 @@ def calculate_kpis(df: pd.DataFrame, countries: List[str], focus_country: Option
     
     # Calcular evolución anual de co-producciones si hay datos de año
     if 'year' in df.columns:
-        yearly_stats = df.groupby('year').apply(
-            lambda x: {
-                'total': len(x),
-                'coproductions': (x['countries_for_analysis'].dropna().apply(
-                    lambda y: len(get_countries_from_string(y)) > 1
-                )).sum(),
-                'avg_countries': x['countries_for_analysis'].dropna().apply(
-                    lambda y: len(get_countries_from_string(y))
-                ).mean()
+        per_film = pd.DataFrame({
+            'year': df['year'].to_numpy(),
+            'coproduction': is_coproduction & has_countries,
+            'num_countries': np.where(has_countries, films_countries, np.nan)
+        })
+        yearly = per_film.groupby('year').agg(
+            total=('year', 'size'),
+            coproductions=('coproduction', 'sum'),
+            avg_countries=('num_countries', 'mean')
+        )
+        kpis['yearly_stats'] = {
+            year: {
+                'total': int(row.total),
+                'coproductions': int(row.coproductions),
+                'avg_countries': row.avg_countries
             }
-        ).to_dict()
-        
-        kpis['yearly_stats'] = yearly_stats
+            for year, row in yearly.iterrows()
+        }
     
     # Si hay datos de productoras, añadir análisis
     if 'productoras_normalizadas' in df.columns or 'productoras_consolidadas_normalized' in df.columns:
         # Usar la columna correcta según la disponibilidad
         prod_column = 'productoras_consolidadas_normalized' if 'productoras_consolidadas_normalized' in df.columns else 'productoras_normalizadas'
         
-        # Total de productoras únicas
-        all_production_companies = set()
-        for companies_str in df[prod_column].dropna():
-            # Asumiendo que las productoras están separadas por comas
-            companies_list = companies_str.split(',')
-            companies_list = [comp.strip() for comp in companies_list if comp.strip()]
-            all_production_companies.update(companies_list)
+        # Total de productoras únicas (agrupación por ID entero)
+        if film_company is None or 'film_id' not in df.columns:
+            _, film_company = build_company_tables(df, prod_column)
+        else:
+            film_company = film_company[film_company['film_id'].isin(df['film_id'])]
         
-        kpis['total_production_companies'] = len(all_production_companies)
+        kpis['total_production_companies'] = film_company['company_id'].nunique()
     
     return kpis
@@ -0,0 +1,317 @@
+"""
+Servidor HTTP local que imita Wikipedia e IMDb para pruebas de carga del scraper.
+
+Sirve, con las mismas rutas que los sitios reales, las páginas de
+{año}_Cannes_Film_Festival, los artículos de las películas, la búsqueda
+/find/ de IMDb y las páginas /title/<id>/, /companycredits y /technical/.
+Las páginas pueden ser sintéticas (build_fixture_site, con los datos
+esperados para comprobar la extracción) o las grabadas en el archivo de
+páginas (fixtures_from_archive).
+
+Comportamiento configurable:
+    latency: distribución de la latencia por respuesta ("const:0.05",
+        "uniform:0.02:0.2", "lognormal:<mediana>:<sigma>")
+    error_rate: proporción de respuestas 429/503 inyectadas (con Retry-After)
+    bandwidth: límite de bytes/s por respuesta
+
+Uso:
+    python -m modules.mock_sites --port 8765 --latency lognormal:0.08:0.5 --error-rate 0.02
+    CANNES_MOCK_URL=http://127.0.0.1:8765 python cannes-scraper-unified.py
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, urlsplit
+
+from .page_archive import PageArchive
+
+WIKI_URL = "https://en.wikipedia.org/wiki/{}"
+IMDB_URL = "https://www.imdb.com"
+FIXTURE_YEARS = list(range(2015, 2024))
+
+_COUNTRIES = [
+    "France", "France", "France", "Belgium", "Germany", "Italy", "Spain", "United Kingdom",
+    "United States", "United States", "Japan", "South Korea", "Romania", "Denmark", "Brazil"
+]
+_TITLE_WORDS = ["Night", "Summer", "River", "Mother", "Silence", "Border", "Garden", "Winter", "Stranger", "Light"]
+_COMPANY_WORDS = ["Les Films", "Arte", "Wild Bunch", "Canal", "Pathé", "El Deseo", "Memento", "Komplizen", "Rai", "Film i Väst"]
+_COMPANY_SUFFIXES = ["", " Productions", " Films", " Cinéma", " Studio"]
+
+
+def mock_url(url, base_url):
+    """URL del servidor local equivalente a una URL de Wikipedia o IMDb"""
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    return base_url.rstrip("/") + path
+
+
+def _page_key(url):
+    """Ruta (con query) con la que el servidor busca una página"""
+    parts = urlsplit(url)
+    return parts.path + (f"?{parts.query}" if parts.query else "")
+
+
+def parse_latency(spec):
+    """
+    Convierte una especificación de latencia en una función rng -> segundos.
+
+    Args:
+        spec: "none", "const:<s>", "uniform:<min>:<max>" o "lognormal:<mediana>:<sigma>"
+    """
+    kind, *params = (spec or "none").split(":")
+    values = [float(p) for p in params]
+    if kind == "none":
+        return lambda rng: 0.0
+    if kind == "const":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Distribución de latencia desconocida: {spec}")
+
+
+def _filler(rng, size):
+    """Texto de relleno para que las páginas pesen como las reales"""
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(_TITLE_WORDS).lower()
+        words.append(word)
+        length += len(word) + 1
+    return f"<div class=\"mw-parser-output\"><p>{' '.join(words)}</p></div>"
+
+
+def build_fixture_site(films_per_year=20, years=FIXTURE_YEARS, page_padding=50_000, seed=0):
+    """
+    Genera un sitio sintético coherente (Wikipedia + IMDb) para el scraper.
+
+    Args:
+        films_per_year: Películas en la tabla de cada año
+        years: Años del festival
+        page_padding: Bytes de relleno por página (las páginas reales pesan cientos de KB)
+        seed: Semilla para que el sitio sea reproducible
+
+    Returns:
+        (pages, films): pages es {url: (estado HTTP, html)} con las URLs que
+        pide el scraper; films es la lista de películas con los datos que
+        deben extraerse (title, year, imdb_id, countries, companies)
+    """
+    rng = random.Random(seed)
+    pages = {}
+    films = []
+
+    for year in years:
+        rows = []
+        for k in range(films_per_year):
+            title = f"{rng.choice(_TITLE_WORDS)} {rng.choice(_TITLE_WORDS)} {year}-{k:03d}"
+            slug = title.replace(" ", "_")
+            imdb_id = f"tt{9000000 + len(films)}"
+            countries = list(dict.fromkeys(rng.choice(_COUNTRIES) for _ in range(rng.choice([1, 1, 2, 2, 3]))))
+            companies = list(dict.fromkeys(
+                rng.choice(_COMPANY_WORDS) + rng.choice(_COMPANY_SUFFIXES) for _ in range(rng.randint(1, 4))
+            ))
+            films.append({
+                "title": title, "year": year, "imdb_id": imdb_id,
+                "countries": countries, "companies": companies
+            })
+            rows.append(
+                f"<tr><td><i><a href=\"/wiki/{quote(slug)}\">{title}</a></i></td>"
+                f"<td>Director {len(films)}</td><td>{', '.join(countries)}</td></tr>"
+            )
+            filler = _filler(rng, page_padding)
+
+            company_rows = "".join(f"<a href=\"/wiki/{quote(c)}\">{c}</a><br>" for c in companies)
+            pages[WIKI_URL.format(quote(slug))] = (200, (
+                f"<html><body><table class=\"infobox vevent\"><tr><th>Directed by</th><td>Director {len(films)}</td></tr>"
+                f"<tr><th>Production companies</th><td>{company_rows}</td></tr></table>{filler}</body></html>"
+            ))
+
+            query = quote(f"{title} {year}")
+            pages[f"{IMDB_URL}/find/?q={query}&s=tt&exact=true&ref_=fn_tt_ex"] = (200, (
+                "<html><body><ul><li class=\"find-title-result\">"
+                f"<a class=\"ipc-metadata-list-summary-item__t\" href=\"/title/{imdb_id}/?ref_=fn_tt_tt_1\">{title}</a>"
+                f"<span>({year})</span></li></ul>{filler}</body></html>"
+            ))
+
+            next_data = {"props": {"pageProps": {
+                "aboveTheFoldData": {
+                    "titleText": {"text": title},
+                    "releaseYear": {"year": year},
+                    "production": {"edges": [{"node": {"company": {"companyText": {"text": c}}}} for c in companies]}
+                },
+                "mainColumnData": {"countriesOfOrigin": {"countries": [{"text": c} for c in countries]}}
+            }}}
+            pages[f"{IMDB_URL}/title/{imdb_id}/"] = (200, (
+                f"<html><head><script id=\"__NEXT_DATA__\" type=\"application/json\">{json.dumps(next_data)}</script>"
+                f"</head><body>{filler}</body></html>"
+            ))
+            pages[f"{IMDB_URL}/title/{imdb_id}/companycredits"] = (200, (
+                "<html><body><h3>Production Companies</h3><ul>"
+                + "".join(f"<li><a href=\"/company/co{i}\">{c}</a></li>" for i, c in enumerate(companies))
+                + f"</ul>{filler}</body></html>"
+            ))
+            pages[f"{IMDB_URL}/title/{imdb_id}/technical/"] = (200, (
+                "<html><body><ul class=\"technical-list\"><li><h4>Country</h4>"
+                f"<div>{', '.join(countries)}</div></li></ul>{filler}</body></html>"
+            ))
+
+        pages[WIKI_URL.format(f"{year}_Cannes_Film_Festival")] = (200, (
+            "<html><body><table class=\"wikitable\"><tr><th>English title</th><th>Director(s)</th>"
+            f"<th>Production country</th></tr>{''.join(rows)}</table></body></html>"
+        ))
+
+    return pages, films
+
+
+def fixtures_from_archive(archive=None):
+    """Páginas grabadas en el archivo de páginas: {url: (estado HTTP, html)}"""
+    archive = archive or PageArchive()
+    return {url: (record["status"], record["body"]) for url, record in archive.latest().items()}
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Sin Nagle: cabeceras y cuerpo van en escrituras separadas y, con
+    # keep-alive, el ACK retardado añadiría ~40 ms a cada respuesta
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.server.mock.handle(self)
+
+    def log_message(self, format, *args):
+        # Sin una línea por petición en la consola
+        pass
+
+
+class MockSiteServer:
+    """Servidor local (en un hilo) que sirve un diccionario de páginas."""
+
+    def __init__(self, pages, host="127.0.0.1", port=0, latency="none", error_rate=0.0,
+                 error_statuses=(429, 503), retry_after=0.1, bandwidth=None, seed=0):
+        self.pages = {_page_key(url): page for url, page in pages.items()}
+        self.latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.retry_after = retry_after
+        self.bandwidth = bandwidth
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _MockHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self._thread = None
+        self.stats = {"requests": 0, "injected_errors": 0, "not_found": 0, "bytes_sent": 0}
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _draw(self):
+        """Latencia y error inyectado de una respuesta (rng compartido entre hilos)"""
+        with self._lock:
+            delay = self.latency(self._rng)
+            error = self.error_rate and self._rng.random() < self.error_rate
+            status = self._rng.choice(self.error_statuses) if error else None
+        return delay, status
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def handle(self, request):
+        """Responde a un GET: latencia, error inyectado o la página (limitada en ancho de banda)"""
+        self._count("requests")
+        delay, error_status = self._draw()
+        if delay > 0:
+            time.sleep(delay)
+
+        if error_status:
+            self._count("injected_errors")
+            status, body = error_status, "<html>Too many requests</html>"
+            extra_headers = {"Retry-After": str(self.retry_after)}
+        else:
+            status, body = self.pages.get(request.path, (404, "<html>Not found</html>"))
+            extra_headers = {}
+            if request.path not in self.pages:
+                self._count("not_found")
+
+        data = body.encode("utf-8")
+        request.send_response(status)
+        request.send_header("Content-Type", "text/html; charset=utf-8")
+        request.send_header("Content-Length", str(len(data)))
+        for name, value in extra_headers.items():
+            request.send_header(name, value)
+        request.end_headers()
+
+        try:
+            if not self.bandwidth:
+                request.wfile.write(data)
+            else:
+                chunk = max(1024, int(self.bandwidth / 20))
+                for start in range(0, len(data), chunk):
+                    request.wfile.write(data[start:start + chunk])
+                    time.sleep(len(data[start:start + chunk]) / self.bandwidth)
+        except (BrokenPipeError, ConnectionResetError):
+            return
+        self._count("bytes_sent", len(data))
+
+    def start(self):
+        """Arranca el servidor en un hilo en segundo plano"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Sirve en el hilo actual hasta Ctrl+C"""
+        try:
+            self._httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._httpd.server_close()
+
+    def stop(self):
+        """Detiene el servidor"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que imita Wikipedia e IMDb")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--from-archive", action="store_true", help="Servir las páginas grabadas en el archivo de páginas")
+    parser.add_argument("--films-per-year", type=int, default=20, help="Películas por año del sitio sintético")
+    parser.add_argument("--latency", default="none", help="none | const:S | uniform:MIN:MAX | lognormal:MEDIANA:SIGMA")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Proporción de respuestas 429/503")
+    parser.add_argument("--bandwidth", type=float, default=None, help="Límite de bytes/s por respuesta")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.from_archive:
+        pages = fixtures_from_archive()
+    else:
+        pages, _ = build_fixture_site(args.films_per_year, seed=args.seed)
+
+    server = MockSiteServer(
+        pages, host=args.host, port=args.port, latency=args.latency,
+        error_rate=args.error_rate, bandwidth=args.bandwidth, seed=args.seed
+    )
+    print(f"🧪 Sirviendo {len(pages)} páginas en {server.base_url} (Ctrl+C para terminar)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Caché de resultados negativos del scraping (IMDb y Wikipedia).
+
+Las películas sin coincidencia en IMDb, sin infobox o sin bloque de países se
+volvían a intentar en cada ejecución, con toda su cadena de peticiones y
+pausas. Aquí se guarda cada búsqueda fallida con su motivo y un TTL distinto
+por motivo; el pipeline la consulta antes de programar la petición y se salta
+las que siguen "muertas".
+
+Motivos:
+    NOT_FOUND: la página se obtuvo pero no contiene el dato (sin resultados de búsqueda)
+    PARSE_FAILURE: la página no tiene la estructura esperada (puede arreglarse
+        mejorando el parser, así que caduca antes)
+    HTTP_404: la URL no existe
+"""
+import json
+import os
+import tempfile
+import time
+
+import requests
+
+NOT_FOUND = "not_found"
+PARSE_FAILURE = "parse_failure"
+HTTP_404 = "http_404"
+
+DAY = 24 * 60 * 60
+DEFAULT_TTLS = {
+    NOT_FOUND: 30 * DAY,
+    PARSE_FAILURE: 7 * DAY,
+    HTTP_404: 90 * DAY,
+}
+
+NEGATIVE_CACHE_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "datos_generados", "negative_cache.json"
+)
+
+
+def failure_reason(exc):
+    """
+    Motivo cacheable de una excepción de requests (HTTP_404 para 404/410).
+
+    Los errores transitorios (timeouts, 5xx, conexión) devuelven None: no se
+    cachean y se reintentan en la siguiente ejecución.
+    """
+    if isinstance(exc, requests.exceptions.HTTPError) and exc.response is not None:
+        if exc.response.status_code in (404, 410):
+            return HTTP_404
+    return None
+
+
+class NegativeCache:
+    """Búsquedas fallidas (tipo, clave) -> motivo y fecha, guardadas en JSON."""
+
+    def __init__(self, path=NEGATIVE_CACHE_FILE, ttls=None, clock=time.time):
+        self.path = path
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.clock = clock
+        self.entries = {}
+        self.skipped = 0
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    @staticmethod
+    def _key(kind, key):
+        return f"{kind}:{key}"
+
+    def is_dead(self, kind, key):
+        """
+        Motivo por el que (kind, key) falló si aún no ha caducado; None si hay que intentarlo.
+        """
+        entry = self.entries.get(self._key(kind, key))
+        if entry is None:
+            return None
+        if self.clock() - entry["at"] > self.ttls.get(entry["reason"], 0):
+            del self.entries[self._key(kind, key)]
+            return None
+        self.skipped += 1
+        return entry["reason"]
+
+    def record(self, kind, key, reason):
+        """Registra un fallo; reason=None (error transitorio) no se registra"""
+        if reason is None:
+            return
+        self.entries[self._key(kind, key)] = {"reason": reason, "at": self.clock()}
+
+    def forget(self, kind, key):
+        """Elimina una entrada (p. ej. cuando la búsqueda por fin tiene éxito)"""
+        self.entries.pop(self._key(kind, key), None)
+
+    def save(self):
+        """Guarda la caché de forma atómica (fichero temporal + os.replace)"""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def stats(self):
+        """Número de entradas por motivo y búsquedas saltadas en esta ejecución"""
+        counts = {}
+        for entry in self.entries.values():
+            counts[entry["reason"]] = counts.get(entry["reason"], 0) + 1
+        return {"entries": counts, "skipped": self.skipped}
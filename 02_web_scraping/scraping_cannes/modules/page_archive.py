@@ -0,0 +1,120 @@
+"""
+Archivo de páginas crudas del scraping (estilo WARC).
+
+Cada respuesta descargada (Wikipedia o IMDb) se añade a un segmento
+comprimido de datos_generados/archivo_paginas/. Cada registro es un miembro
+gzip independiente con una cabecera JSON (url, estado HTTP, fecha de
+descarga, hash del contenido y longitud) seguida del cuerpo. Los segmentos
+sólo se amplían, nunca se reescriben: cada ejecución abre el suyo.
+
+Con el archivo se pueden volver a ejecutar los extractores (p. ej. tras
+mejorar el parser del infobox o un cambio del HTML de IMDb) sin ninguna
+petición de red: ver el comando reextract de cannes-scraper-unified.py.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+PAGE_ARCHIVE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "datos_generados", "archivo_paginas"
+)
+SEGMENT_SUFFIX = ".pages.gz"
+
+
+def body_digest(body):
+    """Hash del contenido de una página (blake2b de 128 bits, en hexadecimal)"""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class PageArchive:
+    """Segmentos append-only con las respuestas crudas descargadas."""
+
+    def __init__(self, directory=PAGE_ARCHIVE_DIR):
+        self.directory = directory
+        self._segment = None
+        self._lock = threading.Lock()
+
+    def _segment_path(self):
+        """Segmento de esta ejecución (se crea con la primera página)"""
+        if self._segment is None:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory, exist_ok=True)
+                # Las páginas descargadas no deben acabar en el repositorio
+                with open(os.path.join(self.directory, ".gitignore"), "w") as f:
+                    f.write("*\n")
+            name = f"paginas-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}{SEGMENT_SUFFIX}"
+            self._segment = os.path.join(self.directory, name)
+        return self._segment
+
+    def append(self, url, body, status=200, fetched_at=None):
+        """
+        Añade una respuesta al archivo.
+
+        Args:
+            url: URL pedida
+            body: Cuerpo de la respuesta (str)
+            status: Código HTTP
+            fetched_at: Fecha de descarga (epoch; por defecto, ahora)
+
+        Returns:
+            str: Hash del contenido
+        """
+        data = body.encode("utf-8")
+        header = {
+            "url": url,
+            "status": int(status),
+            "fetched_at": fetched_at if fetched_at is not None else time.time(),
+            "digest": body_digest(data),
+            "length": len(data)
+        }
+        # Un miembro gzip por registro: se escribe de una vez y el segmento
+        # sigue siendo un .gz válido aunque la ejecución se interrumpa
+        member = gzip.compress(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n" + data + b"\n")
+        with self._lock:
+            with open(self._segment_path(), "ab") as f:
+                f.write(member)
+        return header["digest"]
+
+    def segments(self):
+        """Segmentos del archivo en orden cronológico"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory) if name.endswith(SEGMENT_SUFFIX)
+        )
+
+    def records(self):
+        """
+        Recorre todos los registros del archivo (del más antiguo al más reciente).
+
+        Yields:
+            dict: url, status, fetched_at, digest, length y body
+        """
+        for path in self.segments():
+            with gzip.open(path, "rb") as f:
+                try:
+                    while True:
+                        line = f.readline()
+                        if not line:
+                            break
+                        header = json.loads(line)
+                        body = f.read(header["length"])
+                        f.read(1)
+                        yield {**header, "body": body.decode("utf-8")}
+                except (EOFError, ValueError, OSError):
+                    # Registro final truncado (ejecución interrumpida): se ignora
+                    continue
+
+    def latest(self):
+        """Último registro de cada URL: {url: registro}"""
+        pages = {}
+        for record in self.records():
+            pages[record["url"]] = record
+        return pages
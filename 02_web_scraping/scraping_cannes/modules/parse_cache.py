@@ -0,0 +1,113 @@
+"""
+Caché persistente de los resultados de los extractores de páginas.
+
+Clave: (nombre del extractor, versión del extractor, hash del contenido de la
+página). Una página que no ha cambiado no se vuelve a parsear (ni se monta su
+árbol BeautifulSoup) en ejecuciones posteriores, y subir la versión de un
+extractor invalida sólo los resultados de ese extractor.
+
+Los resultados se guardan como JSON en una base SQLite
+(datos_generados/parse_cache.sqlite), con una copia en memoria para la
+ejecución en curso.
+"""
+import json
+import os
+import sqlite3
+
+PARSE_CACHE_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "datos_generados", "parse_cache.sqlite"
+)
+
+# Marca de "no está en la caché" (None es un resultado válido de un extractor)
+MISSING = object()
+
+
+class ParseCache:
+    """Resultados de extractores por (extractor, versión, hash del contenido)."""
+
+    def __init__(self, path=PARSE_CACHE_FILE):
+        # path=None: sólo en memoria
+        self.path = path
+        self._conn = None
+        self._memory = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _connection(self):
+        """Conexión SQLite (se abre, y se crea la tabla, con el primer uso)"""
+        if self._conn is None and self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS parsed ("
+                " extractor TEXT NOT NULL, version TEXT NOT NULL, digest TEXT NOT NULL,"
+                " result TEXT NOT NULL, PRIMARY KEY (extractor, version, digest))"
+            )
+        return self._conn
+
+    def get(self, extractor, version, digest):
+        """Resultado guardado o MISSING"""
+        key = (extractor, str(version), digest)
+        if key in self._memory:
+            self.hits += 1
+            return self._memory[key]
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT result FROM parsed WHERE extractor = ? AND version = ? AND digest = ?", key
+        ).fetchone() if conn else None
+        if row is None:
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        self._memory[key] = json.loads(row[0])
+        return self._memory[key]
+
+    def put_many(self, items):
+        """
+        Guarda varios resultados en una sola transacción.
+
+        Args:
+            items: Iterable de (extractor, versión, hash, resultado)
+        """
+        rows = []
+        for extractor, version, digest, result in items:
+            key = (extractor, str(version), digest)
+            self._memory[key] = result
+            rows.append(key + (json.dumps(result, ensure_ascii=False),))
+        conn = self._connection()
+        if conn and rows:
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO parsed VALUES (?, ?, ?, ?)", rows)
+
+    def put(self, extractor, version, digest, result):
+        """Guarda un resultado"""
+        self.put_many([(extractor, version, digest, result)])
+
+    def prune(self, versions):
+        """
+        Elimina los resultados de versiones antiguas de los extractores.
+
+        Args:
+            versions: dict extractor -> versión actual
+        """
+        conn = self._connection()
+        if not conn:
+            return
+        with conn:
+            for extractor, version in versions.items():
+                conn.execute(
+                    "DELETE FROM parsed WHERE extractor = ? AND version != ?", (extractor, str(version))
+                )
+
+    def close(self):
+        """Cierra la conexión (los datos ya están confirmados)"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def stats(self):
+        """Aciertos y fallos de la caché en esta ejecución"""
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,228 @@
+"""
+Logging estructurado del scraping, sin bloquear los bucles de descarga.
+
+Los módulos escriben con get_logger(__name__) y niveles normales (las líneas
+por película van en DEBUG). setup_logging cuelga del logger "cannes" un
+QueueHandler: el hilo que registra sólo encola el mensaje, y un QueueListener
+en otro hilo lo escribe en la consola (formato compacto) y, opcionalmente, en
+un fichero JSON Lines con los campos extra (película, año, imdb_id...).
+
+Progress muestra una línea de progreso en vivo (hechas/total, ritmo y tiempo
+restante) que los mensajes de log no rompen: la consola borra la línea,
+escribe el mensaje y la vuelve a dibujar.
+"""
+import copy
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+ROOT_LOGGER = "cannes"
+
+# Atributos estándar de un LogRecord: el resto son los campos extra del mensaje
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener = None
+
+
+def get_logger(name):
+    """Logger del pipeline (hijo de "cannes")"""
+    short = name.rsplit(".", 1)[-1].replace("-", "_")
+    return logging.getLogger(f"{ROOT_LOGGER}.{short}")
+
+
+class _Console:
+    """Salida de consola compartida por los mensajes y la línea de progreso."""
+
+    def __init__(self, stream=sys.stderr):
+        self.stream = stream
+        self.is_tty = hasattr(stream, "isatty") and stream.isatty()
+        self.status = ""
+        self._lock = threading.Lock()
+
+    def write_line(self, text):
+        """Escribe un mensaje sin romper la línea de progreso"""
+        with self._lock:
+            if self.status and self.is_tty:
+                self.stream.write("\r\033[K")
+            self.stream.write(text + "\n")
+            if self.status and self.is_tty:
+                self.stream.write(self.status)
+            self.stream.flush()
+
+    def set_status(self, text):
+        """Sustituye la línea de progreso"""
+        with self._lock:
+            self.status = text
+            if self.is_tty:
+                self.stream.write("\r\033[K" + text)
+                self.stream.flush()
+
+    def clear_status(self, final_text=None):
+        """Quita la línea de progreso (dejando opcionalmente su último estado)"""
+        with self._lock:
+            if self.status and self.is_tty:
+                self.stream.write("\r\033[K")
+            if final_text:
+                self.stream.write(final_text + "\n")
+            self.status = ""
+            self.stream.flush()
+
+
+CONSOLE = _Console()
+
+
+class _ConsoleHandler(logging.Handler):
+    """Handler de consola que respeta la línea de progreso"""
+
+    def emit(self, record):
+        try:
+            CONSOLE.write_line(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+class _QueueHandler(QueueHandler):
+    """
+    QueueHandler que conserva la traza de la excepción aparte del mensaje.
+
+    QueueHandler.prepare funde la traza en msg y borra exc_info/exc_text; aquí
+    msg queda como el mensaje con sus argumentos aplicados y la traza se guarda
+    ya formateada en exc_text (exc_info no se encola: retiene los frames).
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por mensaje, con los campos extra"""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(level="INFO", json_file=None):
+    """
+    Configura el logging del pipeline (una vez por proceso).
+
+    Args:
+        level: Nivel de la consola ("DEBUG" muestra las líneas por película)
+        json_file: Fichero JSON Lines donde registrar todos los mensajes
+            (incluidos los DEBUG); None para no guardarlos
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    console_level = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+    console = _ConsoleHandler()
+    console.setLevel(console_level)
+    console.setFormatter(logging.Formatter("%(message)s"))
+    handlers = [console]
+
+    if json_file:
+        file_handler = logging.FileHandler(json_file, encoding="utf-8")
+        file_handler.setLevel(logging.DEBUG)
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+
+    # Sin fichero JSON los mensajes DEBUG ni se crean
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.setLevel(logging.DEBUG if json_file else console_level)
+    logger.propagate = False
+    log_queue = queue.SimpleQueue()
+    logger.handlers = [_QueueHandler(log_queue)]
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging():
+    """Vacía la cola y detiene el hilo de escritura"""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+    logging.getLogger(ROOT_LOGGER).handlers = []
+
+
+class Progress:
+    """
+    Línea de progreso en vivo con ritmo y tiempo restante estimado.
+
+    En una terminal se redibuja como mucho cada `interval` segundos; si la
+    salida no es una terminal, el progreso se registra como mensaje INFO cada
+    `log_interval` segundos.
+    """
+
+    def __init__(self, total, desc, logger=None, unit="películas", interval=0.2, log_interval=15.0):
+        self.total = total
+        self.desc = desc
+        self.unit = unit
+        self.logger = logger or get_logger(ROOT_LOGGER)
+        self.interval = interval
+        self.log_interval = log_interval
+        self.done = 0
+        self.start = time.perf_counter()
+        self._last_draw = 0.0
+        self._last_log = self.start
+
+    def add_total(self, amount):
+        """Amplía el total (cuando se conoce por partes, p. ej. por año)"""
+        self.total += amount
+
+    def _line(self):
+        elapsed = time.perf_counter() - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = (self.total - self.done) / rate if rate > 0 and self.total else None
+        eta = time.strftime("%H:%M:%S", time.gmtime(remaining)) if remaining is not None else "--:--:--"
+        pct = 100 * self.done / self.total if self.total else 0
+        return f"⏳ {self.desc}: {self.done}/{self.total} {self.unit} ({pct:.0f}%) · {rate:.1f}/s · quedan {eta}"
+
+    def update(self, amount=1):
+        """Suma `amount` unidades hechas"""
+        self.done += amount
+        now = time.perf_counter()
+        if CONSOLE.is_tty:
+            if now - self._last_draw >= self.interval or self.done >= self.total:
+                self._last_draw = now
+                CONSOLE.set_status(self._line())
+        elif now - self._last_log >= self.log_interval:
+            self._last_log = now
+            self.logger.info(self._line())
+
+    def close(self):
+        """Termina la línea de progreso dejando el estado final"""
+        if CONSOLE.is_tty:
+            CONSOLE.clear_status(self._line())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,298 @@
+"""
+Caché de resultados del dashboard (DataFrame filtrado, KPIs y figuras).
+
+Streamlit vuelve a ejecutar todo el script con cada cambio de un widget. Los
+resultados se guardan por clave (tipo de resultado, versión del dataset, filtro
+normalizado), con expulsión LRU y un límite de memoria, de modo que volver a un
+estado de filtros ya visto no recalcula nada.
+
+Las figuras se guardan serializadas en JSON: ocupan menos que el objeto
+plotly y cada lectura devuelve una figura nueva que se puede modificar sin
+afectar a la copia guardada. Además se escriben en disco (FigureDiskCache),
+de modo que tras un despliegue las vistas precalculadas con
+warm_figure_cache.py se sirven sin reconstruir nada.
+"""
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_DISK_MAX_FILES = 2048
+DEFAULT_DISK_MAX_BYTES = 512 * 1024 * 1024
+
+FIGURE_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "datos_generados", "cache_figuras"
+)
+
+
+def estimate_size(value):
+    """Tamaño aproximado en bytes de un resultado guardado en la caché"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def normalize_filters(year_range, selected_section='Todas', countries=None):
+    """
+    Convierte los valores de los widgets en una tupla hashable y estable.
+
+    Los años se pasan a int (el slider puede devolver numpy.int64 o listas) y
+    la sección vacía equivale a 'Todas'. El orden de los países se respeta
+    porque determina el orden de los ejes en los gráficos.
+    """
+    filters = (int(year_range[0]), int(year_range[1]), selected_section or 'Todas')
+    if countries is not None:
+        filters += (tuple(dict.fromkeys(countries)),)
+    return filters
+
+
+def make_key(kind, dataset_version, filters, *extra):
+    """Clave de caché: (tipo de resultado, versión del dataset, filtro normalizado, extras)"""
+    return (kind, dataset_version, filters) + tuple(extra)
+
+
+class FigureDiskCache:
+    """
+    JSON de figuras plotly guardado en disco, un fichero por clave.
+
+    El nombre del fichero es <hash de la versión del dataset>-<hash de la
+    clave>: purge_versions() elimina las figuras de versiones anteriores de
+    los datos. Además el directorio está acotado (max_files, max_bytes): al
+    superarse se eliminan las figuras usadas hace más tiempo (cada lectura
+    actualiza la fecha de modificación del fichero).
+    """
+
+    def __init__(self, directory=FIGURE_CACHE_DIR, max_files=DEFAULT_DISK_MAX_FILES,
+                 max_bytes=DEFAULT_DISK_MAX_BYTES):
+        self.directory = directory
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self._purged_version = None
+
+    @staticmethod
+    def version_tag(dataset_version):
+        """Prefijo de los ficheros de una versión del dataset"""
+        return hashlib.sha1(repr(dataset_version).encode("utf-8")).hexdigest()[:12]
+
+    def path(self, key):
+        """Ruta del fichero de una clave (ver make_key: key[1] es la versión del dataset)"""
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        version = key[1] if isinstance(key, tuple) and len(key) > 1 else None
+        return os.path.join(self.directory, f"{self.version_tag(version)}-{digest}.json")
+
+    def _files(self):
+        """(ruta, tamaño, fecha de modificación) de las figuras guardadas"""
+        files = []
+        try:
+            entries = os.scandir(self.directory)
+        except OSError:
+            return files
+        with entries:
+            for entry in entries:
+                if entry.name.endswith(".json"):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    files.append((entry.path, stat.st_size, stat.st_mtime))
+        return files
+
+    def get(self, key):
+        """JSON guardado para la clave o None"""
+        path = self.path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                figure_json = f.read()
+        except OSError:
+            return None
+        try:
+            # Marca la figura como usada recientemente para la expulsión LRU
+            os.utime(path)
+        except OSError:
+            pass
+        return figure_json
+
+    def put(self, key, figure_json):
+        """Guarda el JSON de forma atómica (fichero temporal + os.replace)"""
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory, exist_ok=True)
+                # La caché no debe acabar en el repositorio
+                with open(os.path.join(self.directory, ".gitignore"), "w") as f:
+                    f.write("*\n")
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(figure_json)
+            os.replace(tmp_path, self.path(key))
+        except OSError:
+            # Sin permisos de escritura la caché en disco simplemente no se usa
+            return
+        self.evict()
+
+    def evict(self):
+        """
+        Elimina las figuras usadas hace más tiempo hasta cumplir max_files y max_bytes.
+
+        Returns:
+            int: Número de ficheros eliminados
+        """
+        files = self._files()
+        total_bytes = sum(size for _, size, _ in files)
+        if len(files) <= self.max_files and total_bytes <= self.max_bytes:
+            return 0
+        files.sort(key=lambda item: item[2])
+        removed = 0
+        for path, size, _ in files:
+            if len(files) - removed <= self.max_files and total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            removed += 1
+            total_bytes -= size
+        return removed
+
+    def purge_versions(self, dataset_version):
+        """
+        Elimina las figuras de cualquier otra versión del dataset (una vez por versión).
+
+        Returns:
+            int: Número de ficheros eliminados
+        """
+        if self._purged_version == dataset_version:
+            return 0
+        self._purged_version = dataset_version
+        prefix = self.version_tag(dataset_version) + "-"
+        removed = 0
+        for path, _, _ in self._files():
+            if not os.path.basename(path).startswith(prefix):
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def clear(self):
+        """Elimina todas las figuras guardadas"""
+        for path, _, _ in self._files():
+            os.remove(path)
+
+
+class ResultCache:
+    """Caché LRU de resultados con límite de entradas y de memoria."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES, disk=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # Segundo nivel opcional para el JSON de las figuras (FigureDiskCache)
+        self.disk = disk
+        self._entries = OrderedDict()  # clave -> (valor, tamaño)
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """Devuelve el valor guardado y lo marca como usado recientemente"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def put(self, key, value):
+        """Guarda un valor y expulsa los menos usados si se superan los límites"""
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)[1]
+            # Un resultado mayor que todo el límite no se guarda
+            if size > self.max_bytes:
+                return value
+            self._entries[key] = (value, size)
+            self.total_bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+        return value
+
+    def get_or_compute(self, key, compute):
+        """Devuelve el valor de la clave o lo calcula con compute() y lo guarda"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = self.put(key, compute())
+        return value
+
+    def get_figure_json(self, key, build):
+        """
+        JSON de una figura: de memoria, si no del disco y si no construyéndola
+        con build() (y guardándola en ambos niveles).
+        """
+        def compute():
+            figure_json = self.disk.get(key) if self.disk is not None else None
+            if figure_json is None:
+                figure_json = build().to_json()
+                if self.disk is not None:
+                    self.disk.put(key, figure_json)
+            return figure_json
+
+        return self.get_or_compute(key, compute)
+
+    def clear(self):
+        """Vacía la caché"""
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        """Resumen del uso de la caché"""
+        return {
+            'entries': len(self._entries),
+            'bytes': self.total_bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+@st.cache_resource
+def get_result_cache(max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES,
+                     figure_cache_dir=FIGURE_CACHE_DIR):
+    """
+    Caché de resultados compartida entre ejecuciones y sesiones del dashboard.
+
+    Las figuras se guardan también en figure_cache_dir (None = sólo en memoria).
+    """
+    disk = FigureDiskCache(figure_cache_dir) if figure_cache_dir else None
+    return ResultCache(max_entries=max_entries, max_bytes=max_bytes, disk=disk)
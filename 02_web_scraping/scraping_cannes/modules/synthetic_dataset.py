@@ -0,0 +1,396 @@
+"""
+Generador de datasets sintéticos del festival para pruebas de escala y benchmarks.
+
+El dataset real tiene unos cientos de películas por año, demasiado pocas para
+que se note si load_data, calculate_kpis, get_coproduction_matrix o
+ProductionCompanyNormalizer.cluster_similar_companies escalan mal. Este módulo
+genera datasets del mismo esquema que cannes_dataset_unificado.xlsx (year,
+title, director, section, countries / countries_for_analysis,
+productoras_normalizadas) con 1k, 10k, 100k o 1M películas:
+
+    - países: país principal según la frecuencia observada en el dataset real
+      (Francia a la cabeza), coproductores de la misma región con más
+      probabilidad y Francia como coproductor minoritario habitual
+      (≈50% de películas con Francia, como en los datos reales)
+    - productoras: 1 + binomial negativa por película (media ≈4.6), elegidas
+      de la bolsa de productoras de los países de la película con una
+      distribución de cola larga (unas pocas productoras aparecen en miles de
+      películas, como Arte o Canal+)
+    - ruido en los nombres de productoras: mayúsculas, acentos, sufijos
+      legales, erratas... La columna productoras_canonicas guarda los nombres
+      sin ruido, para medir la calidad del agrupamiento
+
+Todo es reproducible a partir de la semilla.
+
+Uso:
+    python -m modules.synthetic_dataset --sizes 1k 10k 100k
+    python -m modules.synthetic_dataset --sizes 1m --format parquet --seed 7
+    CANNES_DATA_FILE=datos_generados/sinteticos/cannes_sintetico_10k.xlsx streamlit run dashboard-cannes-mejorado.py
+    python benchmark_dashboard.py --sizes 1k 10k 100k
+
+Los tres formatos se pueden cargar en el dashboard con CANNES_DATA_FILE
+(modules.data_processing.read_dataset); Parquet necesita pyarrow.
+"""
+import argparse
+import os
+import time
+import unicodedata
+import zlib
+
+import numpy as np
+import pandas as pd
+
+SYNTHETIC_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "datos_generados", "sinteticos"
+)
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+LAST_YEAR = 2023
+
+# (país, peso como país principal, región); pesos a partir de las frecuencias
+# del dataset real (Francia ajustada para que sea el país principal de ≈35-40%
+# de las películas, ya que además se añade como coproductora)
+COUNTRIES = [
+    ("France", 500, "europa_oeste"), ("Italy", 58, "europa_oeste"), ("Belgium", 50, "europa_oeste"),
+    ("Germany", 47, "europa_oeste"), ("Japan", 38, "asia_este"), ("South Korea", 31, "asia_este"),
+    ("China", 29, "asia_este"), ("Switzerland", 26, "europa_oeste"), ("Argentina", 26, "latam"),
+    ("Portugal", 25, "europa_oeste"), ("Brazil", 25, "latam"), ("Spain", 25, "europa_oeste"),
+    ("Sweden", 21, "europa_norte"), ("United States", 17, "norteamerica"), ("Poland", 17, "europa_este"),
+    ("Netherlands", 14, "europa_oeste"), ("Russia", 14, "europa_este"), ("Hungary", 13, "europa_este"),
+    ("Iran", 13, "mena"), ("Denmark", 13, "europa_norte"), ("Romania", 12, "europa_este"),
+    ("Israel", 12, "mena"), ("Canada", 12, "norteamerica"), ("Chile", 11, "latam"),
+    ("Hong Kong", 10, "asia_este"), ("Luxembourg", 10, "europa_oeste"), ("Ukraine", 10, "europa_este"),
+    ("Mexico", 9, "latam"), ("Qatar", 9, "mena"), ("Colombia", 9, "latam"), ("Egypt", 9, "mena"),
+    ("United Kingdom", 8, "europa_oeste"), ("Iceland", 8, "europa_norte"), ("Turkey", 8, "mena"),
+    ("Serbia", 8, "europa_este"), ("Lebanon", 7, "mena"), ("Senegal", 7, "africa"),
+    ("Finland", 7, "europa_norte"), ("Tunisia", 7, "mena"), ("Norway", 6, "europa_norte"),
+    ("Austria", 6, "europa_oeste"), ("Greece", 6, "europa_este"), ("Taiwan", 6, "asia_este"),
+    ("Morocco", 6, "mena"), ("India", 5, "asia_sur"), ("Thailand", 5, "asia_este"),
+    ("Philippines", 5, "asia_este"), ("Czech Republic", 5, "europa_este"), ("Ireland", 5, "europa_oeste"),
+    ("Georgia", 4, "europa_este"), ("Bulgaria", 4, "europa_este"), ("Australia", 4, "oceania"),
+    ("Uruguay", 4, "latam"), ("Peru", 3, "latam"), ("Algeria", 3, "mena"), ("South Africa", 3, "africa"),
+    ("Nigeria", 2, "africa"), ("Burkina Faso", 2, "africa"), ("Kazakhstan", 2, "asia_sur"),
+    ("Pakistan", 2, "asia_sur"), ("New Zealand", 2, "oceania"), ("Cambodia", 2, "asia_este")
+]
+
+# Número de países por película (frecuencias del dataset real, 1..8)
+COUNTRIES_PER_FILM = np.array([514, 144, 63, 32, 9, 5, 1, 1], dtype=float)
+
+# Secciones del festival y sus pesos aproximados
+SECTIONS = {
+    "Competition": 0.20, "Un Certain Regard": 0.18, "Out of Competition": 0.07,
+    "Special Screenings": 0.06, "Midnight Screenings": 0.03, "Cannes Premiere": 0.05,
+    "Directors' Fortnight": 0.20, "Critics' Week": 0.11, "ACID": 0.05, "La Cinef": 0.05
+}
+
+# Productoras reales al principio de la bolsa de su país (las más frecuentes)
+KNOWN_COMPANIES = {
+    "France": ["France 3 Cinéma", "Arte France Cinéma", "Canal+", "France 2 Cinéma",
+               "Centre national du cinéma et de l'image animée", "Ciné+", "France Télévisions",
+               "Wild Bunch", "Why Not Productions", "Le Pacte", "Les Films du Losange", "Haut et Court",
+               "Memento Films Production", "La Région Île-de-France", "Pathé", "Gaumont"],
+    "Italy": ["Rai Cinema", "Fandango", "Tempesta", "Vivo Film"],
+    "Belgium": ["Les Films du Fleuve", "Wallimage", "Tax Shelter du Gouvernement Fédéral de Belgique", "Frakas Productions"],
+    "Germany": ["ZDF/Arte", "Komplizen Film", "The Match Factory", "Medienboard Berlin-Brandenburg"],
+    "Japan": ["Bitters End", "Bandai Visual", "Fuji Television Network"],
+    "South Korea": ["CJ Entertainment", "Barunson E&A", "Showbox"],
+    "Sweden": ["Film i Väst", "Plattform Produktion", "Swedish Film Institute"],
+    "United States": ["A24", "Neon", "Killer Films", "Annapurna Pictures"],
+    "United Kingdom": ["Film4", "BFI", "Element Pictures"],
+    "Spain": ["El Deseo", "Movistar Plus+", "Televisión Española"],
+    "Switzerland": ["Radio Télévision Suisse", "Box Productions"],
+    "Netherlands": ["Nederlands Filmfonds", "Lemming Film"],
+    "Denmark": ["Zentropa Entertainments", "Nimbus Film"],
+    "Argentina": ["Rei Pictures", "Instituto Nacional de Cine y Artes Audiovisuales"],
+    "Brazil": ["Vitrine Filmes", "RT Features"],
+    "Canada": ["Telefilm Canada", "Sodec"],
+    "Portugal": ["O Som e a Fúria", "Rosa Filmes"],
+    "Poland": ["Polish Film Institute", "Opus Film"],
+    "Romania": ["Mobra Films", "Centrul Național al Cinematografiei"]
+}
+
+# Plantillas de nombres de productora por región ({W} es una palabra inventada)
+COMPANY_TEMPLATES = {
+    "europa_oeste": ["Les Films du {W}", "{W} Productions", "{W} Films", "Studio {W}", "{W} Film",
+                     "Les Productions {W}", "{W} Cinematografica", "{W} Producciones", "{W} Filmproduktion"],
+    "europa_norte": ["{W} Film", "{W} Produktion", "{W} Pictures", "Nordisk {W}"],
+    "europa_este": ["{W} Film Studio", "{W} Production", "{W} Films", "Studio {W}"],
+    "latam": ["{W} Producciones", "{W} Cine", "Producciones {W}", "{W} Filmes"],
+    "asia_este": ["{W} Pictures", "{W} Entertainment", "{W} Film Company", "{W} Media"],
+    "asia_sur": ["{W} Pictures", "{W} Films", "{W} Motion Pictures"],
+    "mena": ["{W} Films", "{W} Productions", "{W} Film Institute", "{W} Pictures"],
+    "africa": ["{W} Productions", "{W} Films", "Cinéma {W}"],
+    "norteamerica": ["{W} Pictures", "{W} Entertainment", "{W} Films", "The {W} Company", "{W} Media"],
+    "oceania": ["{W} Pictures", "{W} Films", "{W} Productions"]
+}
+
+# Sufijos legales por región para el ruido
+LEGAL_SUFFIXES = {
+    "europa_oeste": "SAS", "europa_norte": "AB", "europa_este": "Ltd.", "latam": "S.A.",
+    "asia_este": "Co. Ltd.", "asia_sur": "Pvt. Ltd.", "mena": "LLC", "africa": "SARL",
+    "norteamerica": "Inc.", "oceania": "Pty Ltd"
+}
+
+_SYLLABLES = [
+    "ma", "lo", "ri", "ve", "sa", "to", "ne", "ka", "li", "do", "ra", "mi", "so", "be", "la",
+    "nu", "te", "vi", "co", "da", "ro", "fi", "lu", "me", "ta", "ni", "go", "pe", "sol", "mar",
+    "ber", "tan", "vel", "kor", "lin", "dor", "zan", "mon", "rel", "cas"
+]
+_FIRST_NAMES = [
+    "Agnès", "Jacques", "Claire", "Marco", "Alice", "Bong", "Hirokazu", "Ruben", "Céline", "Nuri",
+    "Asghar", "Jessica", "Kelly", "Pedro", "Lucrecia", "Mati", "Joachim", "Julia", "Ryusuke", "Kleber",
+    "Alina", "Radu", "Cristian", "Ladj", "Mia", "Sofia", "Andrea", "Lukas", "Hong", "Wim"
+]
+_TITLE_WORDS = [
+    "Night", "River", "Summer", "Mother", "Border", "Silence", "Road", "House", "Winter", "Island",
+    "Light", "Heart", "Paradise", "Sea", "Shadow", "Dream", "Storm", "Garden", "Stranger", "Child"
+]
+_TITLE_TEMPLATES = ["{W}", "The {T}", "{T} of {W}", "{T} {T}", "Le {W}", "La {W}", "{W} {T}"]
+
+NOISE_KINDS = ["upper", "lower", "no_accents", "legal_suffix", "generic_word", "typo", "punctuation"]
+
+
+def _pseudo_words(rng, count):
+    """Palabras inventadas distintas (2 a 4 sílabas) capitalizadas"""
+    words = {}
+    while len(words) < count:
+        needed = int((count - len(words)) * 1.2) + 10
+        lengths = rng.integers(2, 5, size=needed)
+        syllables = rng.integers(0, len(_SYLLABLES), size=(needed, 4))
+        for n, row in zip(lengths, syllables):
+            words["".join(_SYLLABLES[s] for s in row[:n]).capitalize()] = None
+    return list(words)[:count]
+
+
+def build_company_pool(rng, n_companies):
+    """
+    Bolsa de productoras: un rango contiguo de nombres por país.
+
+    Cada país recibe una parte proporcional a su peso (suavizado); sus
+    productoras reales conocidas ocupan las primeras posiciones (las más
+    frecuentes al muestrear con cola larga).
+
+    Returns:
+        (names, offsets, sizes): nombres canónicos y, por país (índice de
+        COUNTRIES), el inicio y tamaño de su rango
+    """
+    weights = np.array([w for _, w, _ in COUNTRIES], dtype=float) ** 0.8
+    sizes = np.maximum(5, np.round(n_companies * weights / weights.sum())).astype(np.int64)
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+    words = iter(_pseudo_words(rng, int(sizes.sum())))
+    names = []
+    for (country, _, region), size in zip(COUNTRIES, sizes):
+        known = KNOWN_COMPANIES.get(country, [])[:size]
+        templates = COMPANY_TEMPLATES[region]
+        template_ids = rng.integers(0, len(templates), size=size - len(known))
+        names.extend(known)
+        names.extend(templates[t].format(W=next(words)) for t in template_ids)
+    return names, offsets, sizes
+
+
+def _strip_accents(text):
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def noisy_company_name(name, kind, region):
+    """
+    Variante con ruido de un nombre de productora (determinista por nombre y tipo).
+
+    Imita las diferencias reales entre fuentes (Wikipedia, IMDb): mayúsculas,
+    acentos perdidos, sufijos legales, palabras genéricas, erratas y puntuación.
+    """
+    if kind == "upper":
+        return name.upper()
+    if kind == "lower":
+        return name.lower()
+    if kind == "no_accents":
+        stripped = _strip_accents(name)
+        return stripped if stripped != name else name.replace(" ", "  ", 1)
+    if kind == "legal_suffix":
+        return f"{name} {LEGAL_SUFFIXES[region]}"
+    if kind == "generic_word":
+        for word in (" Productions", " Films", " Film", " Pictures", " Entertainment"):
+            if name.endswith(word):
+                return name[:-len(word)]
+        return f"{name} Productions"
+    if kind == "typo":
+        if len(name) < 4:
+            return name + name[-1]
+        i = zlib.crc32(name.encode("utf-8")) % (len(name) - 1)
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    if kind == "punctuation":
+        return name.replace(" & ", " and ") if " & " in name else name.replace(" ", "-", 1) + "."
+    raise ValueError(f"Tipo de ruido desconocido: {kind}")
+
+
+def generate_dataset(n_films, seed=0, noise_rate=0.2, missing_countries=0.05, missing_companies=0.05,
+                     editions=None, companies_per_film=4.6, france_coproduction=0.35, same_region=0.5):
+    """
+    Genera un dataset sintético con el esquema del dataset unificado.
+
+    Args:
+        n_films: Número de películas
+        seed: Semilla (mismo valor -> mismo dataset)
+        noise_rate: Proporción de nombres de productora con ruido
+        missing_countries: Proporción de películas sin países
+        missing_companies: Proporción de películas sin productoras
+        editions: Número de ediciones (años) hasta 2023; por defecto ≈190
+            películas por año, entre 9 y 78 ediciones
+        companies_per_film: Media de productoras por película
+        france_coproduction: Probabilidad de que un coproductor adicional sea Francia
+        same_region: Probabilidad de que un coproductor adicional sea de la
+            región del país principal
+
+    Returns:
+        DataFrame con year, title, director, section, countries,
+        countries_for_analysis, productoras_normalizadas y productoras_canonicas
+    """
+    rng = np.random.default_rng(seed)
+    names = np.array([name for name, _, _ in COUNTRIES])
+    regions = [region for _, _, region in COUNTRIES]
+    weights = np.array([w for _, w, _ in COUNTRIES], dtype=float)
+    weights /= weights.sum()
+    france = int(np.flatnonzero(names == "France")[0])
+
+    # Años y secciones
+    if editions is None:
+        editions = int(np.clip(np.ceil(n_films / 190), 9, 78))
+    years = np.sort(rng.integers(LAST_YEAR - editions + 1, LAST_YEAR + 1, size=n_films))
+    section_names = list(SECTIONS)
+    section_p = np.array(list(SECTIONS.values()))
+    sections = np.array(section_names)[rng.choice(len(section_names), size=n_films, p=section_p / section_p.sum())]
+
+    # Países: principal + coproductores (misma región, Francia o según popularidad)
+    n_countries = rng.choice(len(COUNTRIES_PER_FILM), size=n_films, p=COUNTRIES_PER_FILM / COUNTRIES_PER_FILM.sum()) + 1
+    primary = rng.choice(len(COUNTRIES), size=n_films, p=weights)
+    region_ids = {region: i for i, region in enumerate(dict.fromkeys(regions))}
+    country_region = np.array([region_ids[r] for r in regions])
+    region_members = [np.flatnonzero(country_region == r) for r in range(len(region_ids))]
+
+    extra_film = np.repeat(np.arange(n_films), n_countries - 1)
+    n_extra = len(extra_film)
+    choice = rng.random(n_extra)
+    extras = rng.choice(len(COUNTRIES), size=n_extra, p=weights)
+    same = choice < same_region
+    extra_regions = country_region[primary[extra_film]]
+    for r, members in enumerate(region_members):
+        mask = same & (extra_regions == r)
+        extras[mask] = members[rng.integers(0, len(members), size=int(mask.sum()))]
+    extras[(choice >= same_region) & (choice < same_region + france_coproduction)] = france
+
+    extra_ptr = np.concatenate([[0], np.cumsum(n_countries - 1)])
+    film_countries = [
+        list(dict.fromkeys([primary[i], *extras[extra_ptr[i]:extra_ptr[i + 1]]])) for i in range(n_films)
+    ]
+
+    # Productoras: de la bolsa de los países de la película, con cola larga
+    company_names, offsets, sizes = build_company_pool(rng, int(1.5 * n_films) + 50)
+    p_nb = 2 / (2 + companies_per_film - 1)
+    n_companies = np.minimum(1 + rng.negative_binomial(2, p_nb, size=n_films), 30)
+    slot_ptr = np.concatenate([[0], np.cumsum(n_companies)])
+    slot_film = np.repeat(np.arange(n_films), n_companies)
+    slots = rng.random(len(slot_film))
+    # Cada productora es del país principal (60%) o de uno cualquiera de la película
+    film_n_countries = np.array([len(c) for c in film_countries])
+    pick = np.where(rng.random(len(slots)) < 0.6, 0, (slots * film_n_countries[slot_film]).astype(np.int64))
+    country_flat = np.concatenate([np.array(c, dtype=np.int64) for c in film_countries]) if n_films else np.array([], dtype=np.int64)
+    country_ptr = np.concatenate([[0], np.cumsum(film_n_countries)])
+    slot_country = country_flat[country_ptr[slot_film] + np.minimum(pick, film_n_countries[slot_film] - 1)]
+    rank = np.minimum((sizes[slot_country] * rng.random(len(slots)) ** 3).astype(np.int64), sizes[slot_country] - 1)
+    slot_company = offsets[slot_country] + rank
+
+    # Ruido: variante determinista por (productora, tipo) calculada una vez por par
+    noisy = rng.random(len(slots)) < noise_rate
+    kinds = rng.integers(0, len(NOISE_KINDS), size=len(slots))
+    company_region = np.repeat([regions[c] for c in range(len(COUNTRIES))], sizes)
+    variants = {}
+    for company, kind in set(zip(slot_company[noisy].tolist(), kinds[noisy].tolist())):
+        variants[(company, kind)] = noisy_company_name(company_names[company], NOISE_KINDS[kind], company_region[company])
+    observed = [
+        variants[(company, kind)] if is_noisy else company_names[company]
+        for company, kind, is_noisy in zip(slot_company.tolist(), kinds.tolist(), noisy.tolist())
+    ]
+
+    # Títulos y directores
+    words = _pseudo_words(rng, max(100, n_films // 20))
+    word_ids = rng.integers(0, len(words), size=(n_films, 2))
+    title_word_ids = rng.integers(0, len(_TITLE_WORDS), size=(n_films, 2))
+    template_ids = rng.integers(0, len(_TITLE_TEMPLATES), size=n_films)
+    first_ids = rng.integers(0, len(_FIRST_NAMES), size=n_films)
+
+    countries_col, observed_col, canonical_col, titles, directors = [], [], [], [], []
+    no_countries = rng.random(n_films) < missing_countries
+    no_companies = rng.random(n_films) < missing_companies
+    for i in range(n_films):
+        countries_col.append(None if no_countries[i] else ", ".join(names[film_countries[i]]))
+        start, end = slot_ptr[i], slot_ptr[i + 1]
+        if no_companies[i]:
+            observed_col.append(None)
+            canonical_col.append(None)
+        else:
+            observed_col.append(", ".join(dict.fromkeys(observed[start:end])))
+            canonical_col.append(", ".join(dict.fromkeys(company_names[c] for c in slot_company[start:end])))
+        titles.append(_TITLE_TEMPLATES[template_ids[i]].replace("{W}", words[word_ids[i, 0]], 1)
+                      .replace("{T}", _TITLE_WORDS[title_word_ids[i, 0]], 1)
+                      .replace("{T}", _TITLE_WORDS[title_word_ids[i, 1]], 1))
+        directors.append(f"{_FIRST_NAMES[first_ids[i]]} {words[word_ids[i, 1]]}")
+
+    return pd.DataFrame({
+        "year": years,
+        "title": titles,
+        "director": directors,
+        "section": sections,
+        "countries": countries_col,
+        "countries_for_analysis": countries_col,
+        "productoras_normalizadas": observed_col,
+        "productoras_canonicas": canonical_col
+    })
+
+
+def save_dataset(df, path):
+    """Guarda el dataset según la extensión (.xlsx como el dataset real, .csv o .parquet)"""
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory, exist_ok=True)
+        if os.path.abspath(directory) == SYNTHETIC_DIR:
+            with open(os.path.join(directory, ".gitignore"), "w") as f:
+                f.write("*\n")
+    if path.endswith(".xlsx"):
+        df.to_excel(path, index=False)
+    elif path.endswith(".csv"):
+        df.to_csv(path, index=False)
+    elif path.endswith(".parquet"):
+        df.to_parquet(path, index=False)
+    else:
+        raise ValueError(f"Formato no soportado: {path}")
+    return path
+
+
+def dataset_path(size_label, fmt="xlsx", directory=SYNTHETIC_DIR):
+    """Ruta del dataset sintético de un tamaño (datos_generados/sinteticos/cannes_sintetico_<tamaño>.<fmt>)"""
+    return os.path.join(directory, f"cannes_sintetico_{size_label}.{fmt}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera datasets sintéticos del festival de Cannes")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["1k", "10k", "100k"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=["xlsx", "csv", "parquet"], default="xlsx",
+                        help="Los tres los lee load_data (CANNES_DATA_FILE); xlsx con 1M de filas tarda varios minutos")
+    parser.add_argument("--noise-rate", type=float, default=0.2)
+    parser.add_argument("--directory", default=SYNTHETIC_DIR)
+    args = parser.parse_args()
+
+    for label in args.sizes:
+        start = time.perf_counter()
+        df = generate_dataset(SIZES[label], seed=args.seed, noise_rate=args.noise_rate)
+        generated = time.perf_counter() - start
+        path = save_dataset(df, dataset_path(label, args.format, args.directory))
+        print(f"✅ {label}: {len(df)} películas generadas en {generated:.1f}s, guardadas en {path} "
+              f"({time.perf_counter() - start:.1f}s en total)")
+
+
+if __name__ == "__main__":
+    main()
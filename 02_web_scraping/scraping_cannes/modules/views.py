@@ -0,0 +1,266 @@
+"""
+Vistas del dashboard: qué figura se dibuja para cada estado de filtros.
+
+Cada gráfico del dashboard tiene un nombre en FIGURE_VIEWS y su clave de caché
+es (nombre, versión del dataset, filtro normalizado, país de enfoque). El
+dashboard y warm_figure_cache.py piden las figuras a través de get_figure, así
+que las vistas precalculadas en disco son exactamente las que luego se leen.
+"""
+import pandas as pd
+import plotly.io as pio
+import streamlit as st
+
+from .data_processing import (
+    load_data, load_company_tables, load_country_tables, load_country_matrix, load_cube, load_year_index,
+    load_dataset_handle, filter_data, top_companies_for_country
+)
+from .kpis import calculate_kpis
+from .pipeline_logging import get_logger
+from .result_cache import get_result_cache, normalize_filters, make_key
+from .visualizations import (
+    create_country_evolution_chart,
+    create_country_proportion_chart,
+    create_coproduction_distribution_chart,
+    create_average_countries_chart,
+    create_top_companies_chart,
+    create_choropleth_map,
+    create_coproduction_heatmap,
+    create_network_graph,
+    compute_reference_layout
+)
+
+log = get_logger(__name__)
+
+# Vista por defecto del dashboard
+DEFAULT_COUNTRIES = ["Spain", "France", "United States", "Italy", "United Kingdom", "Germany"]
+DEFAULT_YEARS = 10
+DEFAULT_SECTION = "Todas"
+
+def default_year_range(min_year, max_year):
+    """Rango de años por defecto: los últimos DEFAULT_YEARS años"""
+    return (max(min_year, max_year - DEFAULT_YEARS), max_year)
+
+def load_view_data():
+    """Carga (desde los loaders cacheados) todo lo que necesitan las vistas"""
+    df, all_countries = load_data()
+    companies, film_company = load_company_tables()
+    countries, film_country = load_country_tables()
+    dataset = load_dataset_handle()
+    version = dataset.cache_key
+    cache = get_result_cache()
+    if cache.disk is not None:
+        # Las figuras de versiones anteriores de los datos ya no se leerán nunca
+        cache.disk.purge_versions(version)
+    return {
+        'df': df,
+        'all_countries': all_countries,
+        'companies': companies,
+        'film_company': film_company,
+        'countries': countries,
+        'film_country': film_country,
+        'country_matrix': load_country_matrix(),
+        'cube': load_cube(),
+        'year_index': load_year_index(),
+        # DatasetHandle para las funciones cacheadas con cache_by_handle (list_sections, search_films)
+        'dataset': dataset,
+        # Versión de los datos para las claves de caché (hash de contenido calculado una vez)
+        'version': version,
+        'cache': cache
+    }
+
+def make_view_context(data, year_range, selected_section=DEFAULT_SECTION, selected_countries=None):
+    """Datos + estado de los filtros de una ejecución del dashboard"""
+    selected_countries = list(selected_countries or [])
+    return {
+        **data,
+        'year_range': (int(year_range[0]), int(year_range[1])),
+        'selected_section': selected_section,
+        'selected_countries': selected_countries,
+        'filters': normalize_filters(year_range, selected_section),
+        'countries_filters': normalize_filters(year_range, selected_section, selected_countries)
+    }
+
+def get_filtered_df(ctx):
+    """DataFrame filtrado (cacheado por versión del dataset y filtro)"""
+    return ctx['cache'].get_or_compute(
+        make_key("filtered_df", ctx['version'], ctx['filters']),
+        lambda: filter_data(ctx['df'], ctx['year_range'], ctx['selected_section'])
+    )
+
+def country_data(ctx):
+    """Matriz película × país y dimensión de países cargadas, como argumentos de las vistas"""
+    return {'country_matrix': ctx['country_matrix'], 'country_table': ctx['countries']}
+
+def get_kpis(ctx, focus_country=None):
+    """KPIs de los países seleccionados o de un país de enfoque"""
+    countries = [focus_country] if focus_country else ctx['selected_countries']
+    filters = ctx['filters'] if focus_country else ctx['countries_filters']
+    return ctx['cache'].get_or_compute(
+        make_key("kpis", ctx['version'], filters, focus_country),
+        lambda: calculate_kpis(
+            get_filtered_df(ctx), countries, focus_country=focus_country,
+            year_index=ctx['year_index'], year_range=ctx['year_range'],
+            selected_section=ctx['selected_section'], **country_data(ctx)
+        )
+    )
+
+def _top_companies_chart(ctx, countries, focus_country):
+    """Principales productoras de focus_country consultadas del índice por año"""
+    country_ids = ctx['countries'].loc[ctx['countries']['name'] == focus_country, 'country_id']
+    if country_ids.empty:
+        top = ctx['companies'].head(0).assign(films=[])
+    else:
+        top = top_companies_for_country(
+            ctx['year_index'], ctx['companies'], ctx['year_range'], ctx['selected_section'], country_ids.iloc[0]
+        )
+    return create_top_companies_chart(
+        get_filtered_df(ctx), focus_country,
+        companies_df=pd.DataFrame({"Productora": top["name"], "Películas": top["films"]})
+    )
+
+def network_reference_layout(ctx):
+    """Layout de referencia de la red para la versión del dataset (se calcula una vez)"""
+    return ctx['cache'].get_or_compute(
+        make_key("network_reference_layout", ctx['version'], None),
+        lambda: compute_reference_layout(ctx['country_matrix'], ctx['countries'])
+    )
+
+def _network_chart(ctx, countries, focus_country):
+    """
+    Red de co-producciones con grafo y layout cacheados por filtro; el layout
+    parte del de referencia de la versión del dataset (warm start determinista).
+    """
+    filters = ctx['filters'] if focus_country else normalize_filters(
+        ctx['year_range'], ctx['selected_section'], countries
+    )
+    return create_network_graph(
+        get_filtered_df(ctx), countries=None if focus_country else countries, focus_country=focus_country,
+        cache=ctx['cache'], cache_key=make_key("network", ctx['version'], filters),
+        base_layout=network_reference_layout(ctx), **country_data(ctx)
+    )
+
+# nombre -> (depende de la lista de países, función (ctx, países, país de enfoque) -> figura)
+FIGURE_VIEWS = {
+    "choropleth_map": (False, lambda ctx, countries, focus: create_choropleth_map(
+        get_filtered_df(ctx), ctx['year_index'], ctx['year_range'], ctx['selected_section']
+    )),
+    "coproduction_heatmap": (True, lambda ctx, countries, focus: create_coproduction_heatmap(
+        get_filtered_df(ctx), countries, ctx['year_index'], ctx['year_range'], ctx['selected_section'],
+        **country_data(ctx)
+    )),
+    "country_evolution": (True, lambda ctx, countries, focus: create_country_evolution_chart(
+        get_filtered_df(ctx), countries, **country_data(ctx)
+    )),
+    "country_proportion": (True, lambda ctx, countries, focus: create_country_proportion_chart(
+        get_filtered_df(ctx), countries, **country_data(ctx)
+    )),
+    "coproduction_distribution": (False, lambda ctx, countries, focus: create_coproduction_distribution_chart(
+        get_filtered_df(ctx)
+    )),
+    "average_countries": (False, lambda ctx, countries, focus: create_average_countries_chart(
+        get_filtered_df(ctx)
+    )),
+    "network_graph": (True, _network_chart),
+    "top_companies": (False, _top_companies_chart),
+}
+
+def figure_key(ctx, name, countries=None, focus_country=None):
+    """Clave de caché de una figura para el estado de filtros de ctx"""
+    uses_countries, _ = FIGURE_VIEWS[name]
+    if uses_countries:
+        countries = ctx['selected_countries'] if countries is None else countries
+        filters = normalize_filters(ctx['year_range'], ctx['selected_section'], countries)
+    else:
+        filters = ctx['filters']
+    return make_key(name, ctx['version'], filters, focus_country)
+
+def get_figure_json(ctx, name, countries=None, focus_country=None):
+    """
+    JSON de la figura de una vista (desde la caché en memoria, la de disco o
+    construyéndola).
+
+    Args:
+        ctx: Contexto de make_view_context
+        name: Nombre de la vista en FIGURE_VIEWS
+        countries: Países de la figura (None = los seleccionados en los filtros)
+        focus_country: País de enfoque (red y productoras)
+    """
+    uses_countries, build = FIGURE_VIEWS[name]
+    if uses_countries and countries is None:
+        countries = ctx['selected_countries']
+    countries = list(countries or [])
+    return ctx['cache'].get_figure_json(
+        figure_key(ctx, name, countries, focus_country),
+        lambda: build(ctx, countries, focus_country)
+    )
+
+def get_figure(ctx, name, countries=None, focus_country=None):
+    """
+    Figura plotly de una vista (ver get_figure_json).
+
+    Dentro de una misma ejecución la figura se construye una sola vez aunque
+    se muestre en varias pestañas (p. ej. el mapa o el heatmap).
+    """
+    figures = ctx.setdefault('figures', {})
+    key = figure_key(ctx, name, countries, focus_country)
+    if key not in figures:
+        figures[key] = pio.from_json(get_figure_json(ctx, name, countries, focus_country), skip_invalid=True)
+    return figures[key]
+
+def lazy_tabs(labels, key):
+    """
+    st.tabs que sólo ejecuta el contenido de la pestaña visible.
+
+    Con on_change="rerun" (Streamlit >= 1.55) Streamlit vuelve a ejecutar el
+    script al cambiar de pestaña y cada pestaña sabe si está abierta (tab.open).
+    En versiones anteriores se usan pestañas normales, se ejecutan todas y se
+    avisa en el log.
+    """
+    try:
+        return st.tabs(labels, key=key, on_change="rerun")
+    except TypeError:
+        log.warning(
+            "Streamlit %s no admite st.tabs(on_change=...): se ejecutan todas las pestañas de '%s' "
+            "(requiere streamlit>=1.55.0)", st.__version__, key
+        )
+        return st.tabs(labels)
+
+def tab_is_open(tab):
+    """True si la pestaña está visible (o si Streamlit no informa del estado)"""
+    return getattr(tab, 'open', None) is not False
+
+def default_views(data):
+    """Vistas (nombre, países, país de enfoque) de la página inicial del dashboard"""
+    views = [
+        ("choropleth_map", None, None),
+        ("coproduction_heatmap", None, None),
+        ("country_evolution", None, None),
+        ("country_proportion", None, None),
+        ("coproduction_distribution", None, None),
+        ("average_countries", None, None),
+        ("network_graph", None, None),
+    ]
+    if "Spain" in data['all_countries']:
+        views += [
+            ("country_evolution", ["Spain"], None),
+            ("network_graph", [], "Spain"),
+            ("top_companies", None, "Spain"),
+        ]
+    return views
+
+def warm_default_views(data=None):
+    """
+    Precalcula las figuras de la vista por defecto (últimos DEFAULT_YEARS años,
+    DEFAULT_COUNTRIES) y las deja en la caché de disco.
+
+    Returns:
+        int: Número de figuras precalculadas
+    """
+    data = data or load_view_data()
+    df = data['df']
+    year_range = default_year_range(int(df['year'].min()), int(df['year'].max()))
+    ctx = make_view_context(data, year_range, DEFAULT_SECTION, DEFAULT_COUNTRIES)
+    views = default_views(data)
+    for name, countries, focus_country in views:
+        get_figure_json(ctx, name, countries, focus_country)
+    return len(views)
@@ -1,17 +1,45 @@
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import networkx as nx
-from .data_processing import get_countries_from_string, get_coproduction_matrix, get_country_production_companies
-import pycountry
+from .data_processing import (
+    get_countries_from_string, get_coproduction_matrix, get_country_production_companies, country_columns,
+    film_country_indicator,
+    year_range_total, year_range_coproductions
+)
+from .countries import resolve_country
+from .data_model import coproduction_matrix
 
-def create_country_evolution_chart(df, countries):
-    """Crea un gráfico de líneas para la evolución de países a lo largo del tiempo"""
+# Umbrales para figuras grandes (todas las secciones y décadas): a partir de
+# ellos se usa WebGL y se reduce lo que se dibuja para acotar el tamaño del JSON
+# enviado al navegador y el tiempo de renderizado
+WEBGL_MIN_POINTS = 1000        # nodos + aristas a partir de los que se usa Scattergl
+MAX_NETWORK_EDGES = 2000       # sólo se dibujan las aristas más fuertes
+LABEL_MAX_NODES = 40           # con más nodos sólo se rotulan los de mayor grado
+HEATMAP_MAX_COUNTRIES = 100    # con más países se muestran los de más co-producciones
+HEATMAP_TEXT_MAX_CELLS = 900   # con más celdas (30 × 30) no se escriben los valores
+
+def use_webgl(n_points, render_mode='auto'):
+    """Decide si una figura se dibuja con WebGL ('auto', 'svg' o 'webgl')"""
+    if render_mode == 'webgl':
+        return True
+    if render_mode == 'svg':
+        return False
+    return n_points >= WEBGL_MIN_POINTS
+
+def create_country_evolution_chart(df, countries, country_matrix=None, country_table=None):
+    """
+    Crea un gráfico de líneas para la evolución de países a lo largo del tiempo.
+    
+    country_matrix/country_table: matriz película × país ya construida (ver
+    film_country_indicator); sin ellas se usa la columna de países de df.
+    """
     if not countries:
         return go.Figure()
     
     # Preparar datos para evolución temporal
-    df_line = df.groupby("year")[countries].sum().reset_index()
+    df_line = country_columns(df, countries, country_matrix, country_table).groupby(df["year"]).sum().reset_index()
     
     fig = px.line(
         df_line, x="year", y=countries,
@@ -27,13 +55,13 @@ def create_country_evolution_chart(df, countries):
     
     return fig
 
-def create_country_proportion_chart(df, countries):
-    """Crea un gráfico de área para la proporción de países a lo largo del tiempo"""
+def create_country_proportion_chart(df, countries, country_matrix=None, country_table=None):
+    """Crea un gráfico de área para la proporción de países a lo largo del tiempo (ver create_country_evolution_chart)"""
     if not countries:
         return go.Figure()
     
     # Preparar datos para el gráfico de proporción
-    df_line = df.groupby("year")[countries].sum().reset_index()
+    df_line = country_columns(df, countries, country_matrix, country_table).groupby(df["year"]).sum().reset_index()
     
     # Calcular porcentajes
     df_percent = df_line.copy()
@@ -106,9 +134,18 @@ def create_average_countries_chart(df):
     
     return fig
 
-def create_top_companies_chart(df, country, top_n=10):
-    """Crea un gráfico de barras para las principales productoras de un país"""
-    companies_df = get_country_production_companies(df, country, top_n)
+def create_top_companies_chart(df, country, top_n=10, companies=None, film_company=None, companies_df=None,
+                               country_matrix=None, country_table=None):
+    """
+    Crea un gráfico de barras para las principales productoras de un país.
+    
+    Si se pasa companies_df (columnas Productora/Películas, p. ej. consultado del cubo)
+    se usa directamente en lugar de recalcularlo desde df.
+    """
+    if companies_df is None:
+        companies_df = get_country_production_companies(
+            df, country, top_n, companies, film_company, country_matrix, country_table
+        )
     
     if companies_df.empty:
         fig = go.Figure()
@@ -132,8 +169,23 @@ def create_top_companies_chart(df, country, top_n=10):
     
     return fig
 
-def create_choropleth_map(df):
-    """Crea un mapa coroplético mostrando la cantidad de películas por país"""
+def create_choropleth_map(df, year_index=None, year_range=None, selected_section='Todas'):
+    """
+    Crea un mapa coroplético mostrando la cantidad de películas por país.
+    
+    Con year_index y year_range el conteo sale de las sumas prefijas por año
+    (cum[hi] - cum[lo]) y los códigos ISO del propio índice, sin recorrer df.
+    """
+    if year_index is not None and year_range is not None:
+        counts = year_range_total(year_index, 'country_films', year_range, selected_section)
+        present = counts > 0
+        map_df = pd.DataFrame({
+            'country': [name for name, keep in zip(year_index['country_names'], present) if keep],
+            'count': counts[present],
+            'iso_alpha': [iso3 for iso3, keep in zip(year_index['country_iso3'], present) if keep]
+        }).sort_values('count', ascending=False, kind='stable')
+        return _choropleth_figure(map_df)
+    
     # Contar películas por país
     country_counts = df['countries_for_analysis'].apply(get_countries_from_string).explode().value_counts()
     
@@ -143,43 +195,17 @@ def create_choropleth_map(df):
         'count': country_counts.values
     })
     
-    # Mapear nombres de países a códigos ISO para el mapa
-    country_codes = {}
-    for country_name in map_df['country'].unique():
-        try:
-            # Intentar encontrar el país directamente
-            country = pycountry.countries.get(name=country_name)
-            if country:
-                country_codes[country_name] = country.alpha_3
-            else:
-                # Buscar por nombre parcial
-                found = False
-                for country in pycountry.countries:
-                    if country_name in country.name:
-                        country_codes[country_name] = country.alpha_3
-                        found = True
-                        break
-                
-                if not found:
-                    # Casos especiales
-                    special_cases = {
-                        'USA': 'USA',
-                        'United States': 'USA',
-                        'UK': 'GBR',
-                        'United Kingdom': 'GBR',
-                        'Russia': 'RUS',
-                        'Czech Republic': 'CZE',
-                    }
-                    if country_name in special_cases:
-                        country_codes[country_name] = special_cases[country_name]
-                    else:
-                        # No se encontró coincidencia
-                        country_codes[country_name] = 'UNK'
-        except Exception:
-            country_codes[country_name] = 'UNK'
-    
-    map_df['iso_alpha'] = map_df['country'].map(country_codes)
+    # Mapear nombres de países a códigos ISO con el índice de alias precalculado
+    # (nombres oficiales, comunes, traducciones al español y alias propios)
+    map_df['iso_alpha'] = map_df['country'].map(resolve_country)
     
+    # Los países que no se reconocen no se pueden situar en el mapa
+    map_df = map_df.dropna(subset=['iso_alpha'])
+    
+    return _choropleth_figure(map_df)
+
+def _choropleth_figure(map_df):
+    """Dibuja el mapa coroplético a partir de un DataFrame country/count/iso_alpha"""
     # Crear el mapa
     fig = px.choropleth(
         map_df,
@@ -200,8 +226,16 @@ def create_choropleth_map(df):
     
     return fig
 
-def create_coproduction_heatmap(df, countries):
-    """Crea un heatmap de co-producciones entre países"""
+def create_coproduction_heatmap(df, countries, year_index=None, year_range=None, selected_section='Todas',
+                                max_countries=HEATMAP_MAX_COUNTRIES, country_matrix=None, country_table=None):
+    """
+    Crea un heatmap de co-producciones entre países.
+    
+    Con year_index y year_range la matriz sale de las sumas prefijas por año
+    en lugar de recalcularse desde df. Con más de max_countries países sólo se
+    muestran los que tienen más co-producciones, y los valores de las celdas
+    sólo se escriben si caben (HEATMAP_TEXT_MAX_CELLS).
+    """
     if not countries or len(countries) < 2:
         fig = go.Figure()
         fig.update_layout(
@@ -211,7 +245,22 @@ def create_coproduction_heatmap(df, countries):
         return fig
     
     # Obtener matriz de co-producciones
-    coproduction_matrix = get_coproduction_matrix(df, countries)
+    if year_index is not None and year_range is not None:
+        ids = np.array([year_index['country_ids'].get(country, -1) for country in countries])
+        known = ids >= 0
+        pairs = year_range_coproductions(year_index, year_range, selected_section)
+        values = np.zeros((len(countries), len(countries)), dtype=pairs.dtype)
+        values[np.ix_(known, known)] = pairs[ids[known]][:, ids[known]].toarray()
+        coproduction_matrix = pd.DataFrame(values, index=countries, columns=countries)
+    else:
+        coproduction_matrix = get_coproduction_matrix(df, countries, country_matrix, country_table)
+    
+    # Reducir la matriz a los países con más co-producciones
+    if max_countries and len(countries) > max_countries:
+        totals = coproduction_matrix.sum(axis=1).to_numpy()
+        keep = np.sort(np.argsort(-totals, kind='stable')[:max_countries])
+        coproduction_matrix = coproduction_matrix.iloc[keep, keep]
+        countries = coproduction_matrix.index.tolist()
     
     # Crear heatmap
     fig = px.imshow(
@@ -220,7 +269,7 @@ def create_coproduction_heatmap(df, countries):
         y=countries,
         color_continuous_scale="Reds",
         title="Matriz de co-producciones",
-        text_auto=True
+        text_auto=len(countries) ** 2 <= HEATMAP_TEXT_MAX_CELLS
     )
     
     fig.update_layout(
@@ -231,40 +280,138 @@ def create_coproduction_heatmap(df, countries):
     
     return fig
 
-def create_network_graph(df, countries=None, focus_country=None):
+# Iteraciones del layout de resortes: completas o partiendo del layout de referencia
+NETWORK_LAYOUT_ITERATIONS = 50
+WARM_START_ITERATIONS = 15
+
+def get_focus_coproducers(df, focus_country, country_matrix=None, country_table=None):
+    """
+    Países que co-producen con focus_country en las películas de df, de más a
+    menos películas en común (sobre la matriz película × país, ver film_country_indicator).
+    """
+    indicator, names = film_country_indicator(df, country_matrix, country_table)
+    if focus_country not in names:
+        return []
+    focus = names.get_loc(focus_country)
+    films = indicator[:, focus].toarray().ravel()
+    shared = indicator[films].getnnz(axis=0)
+    shared[focus] = 0
+    order = np.argsort(-shared, kind='stable')
+    return list(names[order[shared[order] > 0]])
+
+def build_coproduction_graph(df, countries=None, focus_country=None, min_weight=1,
+                             country_matrix=None, country_table=None):
+    """
+    Construye el grafo de co-producciones (nodos = países, peso = películas en común).
+    
+    Sólo se añaden las aristas con peso >= min_weight; los países sin aristas
+    no forman parte del grafo.
+    
+    Returns:
+        nx.Graph (None si hay menos de 2 países para analizar)
+    """
+    # Si se especifica un país de enfoque, obtener los países con los que co-produce
+    if focus_country:
+        countries = [focus_country] + get_focus_coproducers(df, focus_country, country_matrix, country_table)
+    
+    if not countries or len(countries) < 2:
+        return None
+    
+    # Aristas = triángulo superior de la matriz de co-producciones
+    weights = get_coproduction_matrix(df, countries, country_matrix, country_table).to_numpy()
+    rows, cols = np.nonzero(np.triu(weights >= max(min_weight, 1), k=1))
+    
+    G = nx.Graph()
+    G.add_weighted_edges_from(
+        (countries[i], countries[j], int(weights[i, j])) for i, j in zip(rows, cols)
+    )
+    return G
+
+def compute_network_layout(G, initial_pos=None):
+    """
+    Posiciones de los nodos con el layout de resortes (Fruchterman-Reingold).
+    
+    Si se pasa un layout inicial se parte de él (warm start) y bastan unas pocas
+    iteraciones. Con 500 nodos o más networkx usa la variante dispersa sobre la
+    matriz de adyacencia de scipy.
+    """
+    warm_pos = {node: xy for node, xy in (initial_pos or {}).items() if node in G}
+    if warm_pos:
+        return nx.spring_layout(G, pos=warm_pos, iterations=WARM_START_ITERATIONS, seed=42)
+    return nx.spring_layout(G, iterations=NETWORK_LAYOUT_ITERATIONS, seed=42)
+
+def compute_reference_layout(country_matrix, country_table):
+    """
+    Layout de referencia: todos los países con co-producciones en el dataset
+    completo, calculado en frío con seed=42.
+    
+    Sólo depende de la versión del dataset; los layouts de cada filtro parten de
+    él, así que son deterministas (se pueden compartir entre sesiones y guardar
+    en disco) y cada país queda en posiciones parecidas al cambiar de filtro.
+    """
+    C = coproduction_matrix(country_matrix).tocoo()
+    names = country_table['name'].to_numpy()
+    upper = C.row < C.col
+    G = nx.Graph()
+    G.add_weighted_edges_from(zip(names[C.row[upper]], names[C.col[upper]], C.data[upper].tolist()))
+    return compute_network_layout(G)
+
+def get_network_graph_and_layout(df, countries=None, focus_country=None, min_weight=1,
+                                 cache=None, cache_key=None, base_layout=None,
+                                 country_matrix=None, country_table=None):
+    """
+    Grafo de co-producciones y su layout, cacheados por cache_key si se pasa una
+    ResultCache (ver modules/result_cache.py).
+    
+    cache_key debe identificar el filtro (versión del dataset, rango de años,
+    sección, países) y min_weight. base_layout es el layout de referencia de esa
+    versión del dataset (compute_reference_layout) del que parte el del filtro;
+    sin él se calcula en frío. En ambos casos el resultado sólo depende de la
+    clave, como exige la ResultCache compartida entre sesiones.
+    
+    Returns:
+        tuple: (grafo o None, posiciones {país: (x, y)})
+    """
+    def compute():
+        G = build_coproduction_graph(df, countries, focus_country, min_weight, country_matrix, country_table)
+        if G is None or G.number_of_edges() == 0:
+            return G, {}
+        return G, compute_network_layout(G, base_layout)
+    
+    if cache is None or cache_key is None:
+        return compute()
+    return cache.get_or_compute(("network_layout",) + tuple(cache_key) + (focus_country, min_weight), compute)
+
+def create_network_graph(df, countries=None, focus_country=None, min_weight=1, cache=None, cache_key=None,
+                         render_mode='auto', max_edges=MAX_NETWORK_EDGES, base_layout=None,
+                         country_matrix=None, country_table=None):
     """
     Crea un gráfico de red para visualizar co-producciones entre países.
     
+    Las aristas van en una sola traza separadas por None. En redes grandes se
+    dibujan sólo las max_edges aristas más fuertes, se rotulan sólo los
+    LABEL_MAX_NODES países con más conexiones y se usa Scattergl (WebGL).
+    
     Args:
         df: DataFrame con los datos de películas
         countries: Lista de países a incluir (opcional)
         focus_country: País para enfocar el análisis (opcional)
+        min_weight: Mínimo de co-producciones para dibujar una arista
+        cache, cache_key: ResultCache y clave del filtro para reutilizar grafo y layout (opcional)
+        base_layout: layout de referencia de la versión del dataset (ver compute_reference_layout)
+        country_matrix, country_table: matriz película × país ya construida (ver film_country_indicator)
+        render_mode: 'auto', 'svg' o 'webgl'
+        max_edges: Máximo de aristas a dibujar (None = todas)
     
     Returns:
         Figura de Plotly con el gráfico de red
     """
-    # Si se especifica un país de enfoque, obtener los países con los que co-produce
-    if focus_country:
-        # Filtrar películas que incluyen al país de enfoque
-        country_films = df[df[focus_country] == 1]
-        
-        # Obtener todos los países que co-producen con el país de enfoque
-        copr_countries = []
-        for _, row in country_films.iterrows():
-            countries_in_film = [c for c in df.columns if row[c] == 1 and c != focus_country]
-            copr_countries.extend(countries_in_film)
-        
-        # Mantener solo países que tienen al menos una co-producción
-        copr_countries = [c for c in set(copr_countries) if c in df.columns]
-        
-        # Establecer países a analizar
-        if copr_countries:
-            countries = [focus_country] + copr_countries
-        else:
-            countries = [focus_country]
+    G, pos = get_network_graph_and_layout(
+        df, countries, focus_country, min_weight, cache, cache_key, base_layout, country_matrix, country_table
+    )
     
     # Si no hay países especificados o son menos de 2, devolver figura vacía
-    if not countries or len(countries) < 2:
+    if G is None:
         fig = go.Figure()
         fig.update_layout(
             title="No hay suficientes países para crear la red",
@@ -272,26 +419,6 @@ def create_network_graph(df, countries=None, focus_country=None):
         )
         return fig
     
-    # Crear grafo dirigido
-    G = nx.Graph()
-    
-    # Obtener matriz de co-producciones
-    coproduction_matrix = get_coproduction_matrix(df, countries)
-    
-    # Añadir nodos y aristas al grafo
-    for i, country1 in enumerate(countries):
-        G.add_node(country1)
-        for j, country2 in enumerate(countries):
-            if i < j:  # Para evitar duplicados
-                weight = coproduction_matrix.iloc[i, j]
-                if weight > 0:
-                    G.add_edge(country1, country2, weight=weight)
-    
-    # Eliminar nodos sin conexiones
-    isolated_nodes = [node for node in G.nodes() if G.degree(node) == 0]
-    for node in isolated_nodes:
-        G.remove_node(node)
-    
     # Si no hay aristas, devolver un mensaje
     if len(G.edges()) == 0:
         fig = go.Figure()
@@ -301,64 +428,58 @@ def create_network_graph(df, countries=None, focus_country=None):
         )
         return fig
     
-    # Calcular posiciones de los nodos usando layout de resortes (spring layout)
-    pos = nx.spring_layout(G, seed=42)
-    
-    # Normalizar pesos de aristas para grosor de líneas
-    edge_weights = [G[u][v]['weight'] for u, v in G.edges()]
-    max_weight = max(edge_weights) if edge_weights else 1
-    edge_widths = [3 * (weight / max_weight) + 1 for weight in edge_weights]
-    
-    # Determinar tamaño de nodos según su grado
-    node_sizes = [30 * (G.degree(node) + 1) for node in G.nodes()]
-    
-    # Preparar datos para Plotly
-    edge_x = []
-    edge_y = []
-    edge_texts = []
-    
-    for edge in G.edges():
-        x0, y0 = pos[edge[0]]
-        x1, y1 = pos[edge[1]]
-        edge_x.extend([x0, x1, None])
-        edge_y.extend([y0, y1, None])
-        weight = G[edge[0]][edge[1]]['weight']
-        edge_texts.append(f"{edge[0]} - {edge[1]}: {weight} co-producciones")
+    # Quedarse con las aristas más fuertes (umbral de peso implícito)
+    edges = list(G.edges(data='weight'))
+    if max_edges and len(edges) > max_edges:
+        edges = sorted(edges, key=lambda edge: edge[2], reverse=True)[:max_edges]
+    nodes = list(dict.fromkeys(node for u, v, _ in edges for node in (u, v)))
+    degrees = np.array([G.degree(node) for node in nodes])
+    
+    webgl = use_webgl(len(nodes) + len(edges), render_mode)
+    scatter = go.Scattergl if webgl else go.Scatter
+    
+    # Determinar tamaño de nodos según su grado (acotado en redes grandes)
+    if webgl:
+        node_sizes = np.clip(8 + 2 * degrees, 8, 40)
+    else:
+        node_sizes = 30 * (degrees + 1)
+    
+    # Aristas en una sola traza: (x0, x1, None) por arista
+    xy = np.array([pos[node] for node in nodes]).reshape(-1, 2)
+    node_index = {node: i for i, node in enumerate(nodes)}
+    endpoints = np.array([(node_index[u], node_index[v]) for u, v, _ in edges])
+    edge_x = np.full((len(edges), 3), np.nan)
+    edge_y = np.full((len(edges), 3), np.nan)
+    edge_x[:, :2] = xy[endpoints, 0]
+    edge_y[:, :2] = xy[endpoints, 1]
+    edge_x = [None if np.isnan(v) else float(v) for v in edge_x.ravel()]
+    edge_y = [None if np.isnan(v) else float(v) for v in edge_y.ravel()]
     
     # Crear trazado de aristas
-    edge_trace = go.Scatter(
+    edge_trace = scatter(
         x=edge_x, y=edge_y,
         line=dict(width=1, color='rgba(150,150,150,0.7)'),
         hoverinfo='none',
         mode='lines'
     )
     
-    # Crear trazado de nodos
-    node_x = []
-    node_y = []
-    node_text = []
-    node_color = []
-    
-    for node in G.nodes():
-        x, y = pos[node]
-        node_x.append(x)
-        node_y.append(y)
-        node_text.append(f"{node}<br>Conexiones: {G.degree(node)}")
-        # Colorear nodo de enfoque de rojo
-        if focus_country and node == focus_country:
-            node_color.append('red')
-        else:
-            node_color.append('royalblue')
-    
-    node_trace = go.Scatter(
-        x=node_x, y=node_y,
+    # Rótulos sólo para los nodos con más conexiones
+    labelled = set(nodes)
+    if len(nodes) > LABEL_MAX_NODES:
+        labelled = {nodes[i] for i in np.argsort(-degrees, kind='stable')[:LABEL_MAX_NODES]}
+    if focus_country:
+        labelled.add(focus_country)
+    
+    # Crear trazado de nodos (el país de enfoque en rojo)
+    node_trace = scatter(
+        x=xy[:, 0], y=xy[:, 1],
         mode='markers+text',
         hoverinfo='text',
-        text=list(G.nodes()),
+        text=[node if node in labelled else "" for node in nodes],
         textposition="top center",
-        hovertext=node_text,
+        hovertext=[f"{node}<br>Conexiones: {degree}" for node, degree in zip(nodes, degrees)],
         marker=dict(
-            color=node_color,
+            color=['red' if focus_country and node == focus_country else 'royalblue' for node in nodes],
             size=node_sizes,
             line=dict(width=2, color='white')
         )
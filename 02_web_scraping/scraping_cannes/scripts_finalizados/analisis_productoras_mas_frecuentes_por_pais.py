@@ -1,5 +1,10 @@
+import os
+import sys
 import pandas as pd
-from collections import Counter
+
+# Añadir la carpeta del proyecto al path para importar el modelo de datos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.data_model import build_company_tables, top_companies
 
 # Cargar el Excel generado anteriormente
 df = pd.read_excel("datos_generados/datos_generados/cannes_oficial_wiki_con_productoras.xlsx")
@@ -17,19 +22,16 @@ df["pais"] = df["country_esp_fra_usa"].map({
 # Eliminamos entradas sin país relevante
 df = df[df["pais"].notna()]
 
-# Dividimos las productoras en listas
-df["productoras_lista"] = df["productoras"].str.split(",\\s*")
+# Tabla de productoras con ID entero y tabla puente película-productora
+companies, film_company = build_company_tables(df, "productoras")
 
 # Preparamos estructura para el conteo
 resultados = []
 
 for pais in ["España", "Francia", "EEUU"]:
-    todas = []
-    for items in df[df["pais"] == pais]["productoras_lista"]:
-        todas.extend(items)
-    
-    top = Counter(todas).most_common(10)
-    resultados.extend([{"País": pais, "Productora": p[0], "Apariciones": p[1]} for p in top])
+    top = top_companies(companies, film_company, df.index[df["pais"] == pais], top_n=10)
+    resultados.extend([{"País": pais, "Productora": nombre, "Apariciones": n}
+                       for nombre, n in zip(top["name"], top["films"])])
 
 # Crear DataFrame con el top por país
 df_top = pd.DataFrame(resultados)
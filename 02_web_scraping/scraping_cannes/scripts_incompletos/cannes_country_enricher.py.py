@@ -4,10 +4,17 @@ import pandas as pd
 import time
 import re
 import os
+import sys
 import json
-from tqdm import tqdm
 from urllib.parse import quote
 
+# Añadir la carpeta del proyecto al path para importar los módulos compartidos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.pipeline_logging import get_logger, setup_logging, shutdown_logging, Progress
+from modules.checkpoint_log import CheckpointLog
+
+log = get_logger("country_enricher")
+
 # Constantes
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/112.0.0.0 Safari/537.36",
@@ -41,7 +48,9 @@ COUNTRY_EMOJIS = {
 }
 
 # Nombre del archivo de checkpoint para guardar progreso
-CHECKPOINT_FILE = "datos_generados/country_enrichment_checkpoint.json"
+CHECKPOINT_FILE = "datos_generados/country_enrichment_checkpoint.jsonl"
+# Checkpoint antiguo (conjunto completo de IDs reescrito en cada guardado); se lee para reanudar
+LEGACY_CHECKPOINT_FILE = "datos_generados/country_enrichment_checkpoint.json"
 
 def scrape_imdb_for_countries(imdb_id):
     """Extrae información de los países de una película en IMDb."""
@@ -83,7 +92,7 @@ def scrape_imdb_for_countries(imdb_id):
                             for country in value.text.split(","):
                                 countries.append(country.strip())
             except Exception as e:
-                print(f"Error obteniendo detalles técnicos para {imdb_id}: {e}")
+                log.warning("Error obteniendo detalles técnicos para %s: %s", imdb_id, e, extra={"imdb_id": imdb_id})
         
         # Método 3: Buscar en la sección "Details" de la página principal
         if not countries:
@@ -98,27 +107,41 @@ def scrape_imdb_for_countries(imdb_id):
         return countries
         
     except Exception as e:
-        print(f"Error obteniendo países para {imdb_id}: {e}")
+        log.warning("Error obteniendo países para %s: %s", imdb_id, e, extra={"imdb_id": imdb_id})
         return []
 
-def save_checkpoint(processed_ids):
-    """Guarda un checkpoint de los IDs ya procesados."""
-    directory = os.path.dirname(CHECKPOINT_FILE)
-    if not os.path.exists(directory):
-        os.makedirs(directory)
-        
-    with open(CHECKPOINT_FILE, 'w') as f:
-        json.dump({"processed_ids": list(processed_ids)}, f)
-    
-    print(f"✅ Checkpoint guardado: {len(processed_ids)} películas procesadas")
+def load_checkpoint(checkpoint):
+    """
+    Carga los resultados ya registrados.
+
+    Returns:
+        tuple: (dict imdb_id -> registro, set de IDs del checkpoint antiguo)
+    """
+    results = checkpoint.load()
+    legacy_ids = set()
+    if os.path.exists(LEGACY_CHECKPOINT_FILE):
+        with open(LEGACY_CHECKPOINT_FILE, 'r') as f:
+            legacy_ids = set(json.load(f).get("processed_ids", [])) - set(results)
+    return results, legacy_ids
+
+def migrate_legacy_checkpoint(checkpoint, legacy_ids):
+    """
+    Incorpora al registro los IDs del checkpoint antiguo y lo compacta.
 
-def load_checkpoint():
-    """Carga el checkpoint de IDs procesados."""
-    if os.path.exists(CHECKPOINT_FILE):
-        with open(CHECKPOINT_FILE, 'r') as f:
-            data = json.load(f)
-            return set(data.get("processed_ids", []))
-    return set()
+    El checkpoint antiguo sólo guardaba los IDs, sin resultados: se añaden con
+    country_expanded None. Cuando la compactación termina, el fichero antiguo se
+    renombra a .migrated para no volver a leerlo.
+
+    Returns:
+        int: Número de películas en el registro compactado
+    """
+    for imdb_id in sorted(legacy_ids):
+        checkpoint.append({"imdb_id": imdb_id, "countries": None, "country_expanded": None})
+    compacted = checkpoint.compact()
+    if os.path.exists(LEGACY_CHECKPOINT_FILE):
+        os.replace(LEGACY_CHECKPOINT_FILE, LEGACY_CHECKPOINT_FILE + ".migrated")
+        log.info("📦 Checkpoint antiguo incorporado al registro (%d IDs sin resultado)", len(legacy_ids))
+    return compacted
 
 def enrich_countries(input_file, output_file):
     """
@@ -128,15 +151,24 @@ def enrich_countries(input_file, output_file):
         input_file (str): Ruta al archivo Excel con los datos de películas
         output_file (str): Ruta donde guardar el archivo Excel enriquecido
     """
-    print(f"📊 Cargando archivo '{input_file}'...")
+    log.info("📊 Cargando archivo '%s'...", input_file)
     df = pd.read_excel(input_file)
     
     # Crear columna country_expanded si no existe
     if 'country_expanded' not in df.columns:
         df['country_expanded'] = df['country_esp_fra_usa'].copy()
     
-    # Cargar checkpoint de IDs ya procesados
-    processed_ids = load_checkpoint()
+    # Cargar checkpoint: cada película procesada es una línea del registro con su resultado
+    checkpoint = CheckpointLog(CHECKPOINT_FILE, key="imdb_id")
+    results, legacy_ids = load_checkpoint(checkpoint)
+    processed_ids = set(results) | legacy_ids
+    
+    # El Excel ya no se reescribe durante el proceso: recuperar del registro
+    # los países de las películas procesadas en ejecuciones anteriores
+    for i, imdb_id in df['imdb_id'].items():
+        record = results.get(imdb_id)
+        if record and record.get("country_expanded"):
+            df.at[i, 'country_expanded'] = record["country_expanded"]
     
     # Contar películas que necesitan ser procesadas
     need_processing = df[
@@ -152,78 +184,79 @@ def enrich_countries(input_file, output_file):
     ]
     
     total_to_process = len(need_processing)
-    print(f"🎬 Total de películas a procesar: {total_to_process}")
-    print(f"📌 Películas ya procesadas anteriormente: {len(processed_ids)}")
+    log.info("🎬 Total de películas a procesar: %d", total_to_process)
+    log.info("📌 Películas ya procesadas anteriormente: %d", len(processed_ids))
     
     # Preguntar al usuario si quiere continuar
     if total_to_process > 0:
         # Procesar cada película con ID de IMDb pero sin datos completos de país
-        progress_bar = tqdm(total=total_to_process, desc="Procesando películas")
+        progress_bar = Progress(total_to_process, "Procesando películas", log)
         
-        save_interval = max(1, min(50, total_to_process // 10))  # Guardar cada 10% del progreso
-        count = 0
-        
-        for i, row in need_processing.iterrows():
-            imdb_id = row['imdb_id']
+        try:
+            for i, row in need_processing.iterrows():
+                imdb_id = row['imdb_id']
+                film_fields = {"film": row['title'], "year": row['year'], "imdb_id": imdb_id}
             
-            # Obtener países de IMDb
-            countries = scrape_imdb_for_countries(imdb_id)
+                # Obtener países de IMDb
+                countries = scrape_imdb_for_countries(imdb_id)
             
-            if countries:
-                # Convertir a formato con emoji
-                countries_with_emoji = []
-                for country in countries:
-                    for target, emoji_name in COUNTRY_EMOJIS.items():
-                        if target in country:
-                            countries_with_emoji.append(emoji_name)
-                            break
+                if countries:
+                    # Convertir a formato con emoji
+                    countries_with_emoji = []
+                    for country in countries:
+                        for target, emoji_name in COUNTRY_EMOJIS.items():
+                            if target in country:
+                                countries_with_emoji.append(emoji_name)
+                                break
                 
-                # Si encontramos países con emoji, actualizar
-                if countries_with_emoji:
-                    # Si ya había datos, combinar
-                    if pd.notna(df.at[i, 'country_expanded']) and df.at[i, 'country_expanded'] != "":
-                        existing = df.at[i, 'country_expanded'].split(', ')
-                        combined = list(set(existing + countries_with_emoji))
-                        df.at[i, 'country_expanded'] = ", ".join(combined)
-                    else:
-                        df.at[i, 'country_expanded'] = ", ".join(countries_with_emoji)
+                    # Si encontramos países con emoji, actualizar
+                    if countries_with_emoji:
+                        # Si ya había datos, combinar
+                        if pd.notna(df.at[i, 'country_expanded']) and df.at[i, 'country_expanded'] != "":
+                            existing = df.at[i, 'country_expanded'].split(', ')
+                            combined = list(set(existing + countries_with_emoji))
+                            df.at[i, 'country_expanded'] = ", ".join(combined)
+                        else:
+                            df.at[i, 'country_expanded'] = ", ".join(countries_with_emoji)
                     
-                    # Mostrar resultados
-                    tqdm.write(f"✅ {row['title']} ({row['year']}): {', '.join(countries)}")
-                    tqdm.write(f"   → Con emoji: {df.at[i, 'country_expanded']}")
+                        # Mostrar resultados
+                        log.debug("✅ %s (%s): %s", row['title'], row['year'], ', '.join(countries), extra=film_fields)
+                        log.debug("   → Con emoji: %s", df.at[i, 'country_expanded'], extra=film_fields)
+                    else:
+                        log.debug("⚠️ %s: No se encontraron coincidencias de países en la lista de países objetivo", row['title'], extra=film_fields)
                 else:
-                    tqdm.write(f"⚠️ {row['title']}: No se encontraron coincidencias de países en la lista de países objetivo")
-            else:
-                tqdm.write(f"❌ {row['title']}: No se encontraron datos de países")
-            
-            # Marcar como procesado
-            processed_ids.add(imdb_id)
+                    log.debug("❌ %s: No se encontraron datos de países", row['title'], extra=film_fields)
             
-            # Actualizar la barra de progreso
-            progress_bar.update(1)
-            count += 1
+                # Marcar como procesado: una línea en el registro (fsync por lotes)
+                processed_ids.add(imdb_id)
+                value = df.at[i, 'country_expanded']
+                checkpoint.append({
+                    "imdb_id": imdb_id,
+                    "countries": countries,
+                    "country_expanded": value if pd.notna(value) and value != "" else None
+                })
             
-            # Guardar checkpoint y datos intermedios
-            if count % save_interval == 0:
-                save_checkpoint(processed_ids)
-                df.to_excel(output_file, index=False)
-                tqdm.write(f"💾 Guardando progreso intermedio ({count}/{total_to_process})")
+                # Actualizar la barra de progreso
+                progress_bar.update(1)
             
-            # Pausa para no sobrecargar el servidor
-            time.sleep(1)
-        
-        progress_bar.close()
+                # Pausa para no sobrecargar el servidor
+                time.sleep(1)
+        finally:
+            # Volcar las líneas pendientes aunque el proceso se interrumpa
+            checkpoint.close()
+            progress_bar.close()
     
-    # Guardar resultados finales
-    save_checkpoint(processed_ids)
+    # Guardar resultados finales: el Excel se escribe una sola vez y el registro se compacta
     df.to_excel(output_file, index=False)
-    print(f"\n✅ Proceso completado. Datos guardados en '{output_file}'")
+    compacted = migrate_legacy_checkpoint(checkpoint, legacy_ids)
+    log.info("✅ Checkpoint compactado: %d películas procesadas", compacted)
+    log.info("✅ Proceso completado. Datos guardados en '%s'", output_file)
     
     # Mostrar estadísticas finales
     total_with_countries = df['country_expanded'].notna().sum()
-    print(f"\n📊 Estadísticas finales:")
-    print(f"   - Total de películas: {len(df)}")
-    print(f"   - Películas con datos de país: {total_with_countries} ({total_with_countries/len(df)*100:.1f}%)")
+    log.info("📊 Estadísticas finales:")
+    log.info("   - Total de películas: %d", len(df))
+    log.info("   - Películas con datos de país: %d (%.1f%%)", total_with_countries, total_with_countries / len(df) * 100)
     
     # Contar películas por país
     if total_with_countries > 0:
@@ -232,12 +265,14 @@ def enrich_countries(input_file, output_file):
             for country in country_list.split(', '):
                 country_counts[country] = country_counts.get(country, 0) + 1
         
-        print("\n🌍 Películas por país:")
+        log.info("🌍 Películas por país:")
         for country, count in sorted(country_counts.items(), key=lambda x: x[1], reverse=True):
-            print(f"   {country}: {count}")
+            log.info("   %s: %d", country, count)
 
 def main():
     """Función principal para enriquecer los datos de países."""
+    # Consola en INFO; con CANNES_LOG_JSON=<fichero> se guardan también los mensajes por película
+    setup_logging(os.environ.get("CANNES_LOG_LEVEL", "INFO"), os.environ.get("CANNES_LOG_JSON"))
     try:
         # Obtener la ruta del directorio donde está el script
         script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -250,7 +285,10 @@ def main():
         enrich_countries(input_file, output_file)
         
     except Exception as e:
-        print(f"\n❌ Error en el procesamiento: {e}")
+        log.exception("❌ Error en el procesamiento: %s", e)
+    
+    finally:
+        shutdown_logging()
 
 if __name__ == "__main__":
     main()
@@ -14,6 +14,11 @@ from datetime import datetime
 import logging
 from pathlib import Path
 import base64
+import sys
+
+# Añadir la carpeta del proyecto al path para importar los módulos compartidos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.dataset_handle import cache_by_handle
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -466,18 +471,20 @@ def generate_coproduction_heatmap_data(df, focus_country="Spain"):
     
     return heatmap_data, coprod_countries
 
-@st.cache_data
-def calculate_yearly_rankings(df, countries):
+@cache_by_handle
+def calculate_yearly_rankings(dataset, countries):
     """
     Calcula el ranking de países por año
     
     Args:
-        df (DataFrame): DataFrame con datos de películas
-        countries (list): Lista de países para incluir en el ranking
+        dataset (DatasetHandle): Manejador del DataFrame con datos de películas
+            (la clave de caché es su hash precalculado, no el DataFrame entero)
+        countries (tuple): Países para incluir en el ranking
         
     Returns:
         dict: Diccionario con rankings por año
     """
+    df = dataset.df
     rankings = {}
     
     # Para cada año en el dataset
@@ -497,17 +504,19 @@ def calculate_yearly_rankings(df, countries):
     
     return rankings
 
-def get_spain_yearly_metrics(df, countries):
+def get_spain_yearly_metrics(dataset, countries):
     """
     Obtiene métricas anuales para España
     
     Args:
-        df (DataFrame): DataFrame con datos de películas
+        dataset (DatasetHandle): Manejador creado una sola vez al cargar los datos
+            (p. ej. con load_dataset_handle), para no volver a hashear el DataFrame
         countries (list): Lista de países para comparar
         
     Returns:
         DataFrame: DataFrame con métricas anuales
     """
+    df = dataset.df
     years = sorted(df['year'].unique())
     metrics = {
         'year': years,
@@ -519,7 +528,7 @@ def get_spain_yearly_metrics(df, countries):
     }
     
     # Rankings anuales (cacheado para mejor rendimiento)
-    yearly_rankings = calculate_yearly_rankings(df, countries)
+    yearly_rankings = calculate_yearly_rankings(dataset, tuple(countries))
     
     for year in years:
         year_df = df[df['year'] == year]
@@ -1420,10 +1429,15 @@ if __name__ == "__main__":
 
 
 # Implementar caching para funciones pesadas que no cambian frecuentemente
-@st.cache_data(ttl=3600)  # Cache durante 1 hora
-def get_coproduction_network_data(df, min_weight=1):
-    """Genera datos para la red de co-producciones con cache"""
-    source, target, weight = get_coproduction_links(df, 'countries_for_analysis')
+@cache_by_handle(ttl=3600)  # Cache durante 1 hora
+def get_coproduction_network_data(dataset, min_weight=1):
+    """
+    Genera datos para la red de co-producciones con cache.
+    
+    Recibe un DatasetHandle (ver modules/dataset_handle.py): la clave de caché es
+    su hash precalculado y min_weight, sin hashear el DataFrame en cada llamada.
+    """
+    source, target, weight = get_coproduction_links(dataset.df, 'countries_for_analysis')
     
     # Filtrar por peso mínimo
     filtered_source = []
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from modules.data_model import build_country_matrix, build_country_tables, coproduction_matrix
+from modules.data_processing import (
+    country_columns, film_country_indicator, get_coproduction_matrix, get_country_production_companies
+)
+
+FILMS = pd.DataFrame({
+    "film_id": [0, 1, 2, 3],
+    "year": [2018, 2018, 2019, 2019],
+    "countries_for_analysis": ["France, Spain", "Spain, Italy, France", "Germany", None],
+    "productoras_consolidadas_normalized": ["Le Pacte", "El Deseo, Le Pacte", "X Filme", None],
+})
+
+
+def loaded_country_data(df):
+    """Matriz y dimensión de países como las de load_country_matrix/load_country_tables"""
+    countries, film_country = build_country_tables(df, "countries_for_analysis")
+    return build_country_matrix(film_country, len(df), len(countries)), countries
+
+
+def test_coproduction_engine_is_xtx_without_diagonal():
+    X = np.array([[1, 1, 0], [1, 1, 1], [0, 0, 1]], dtype=bool)
+    C = coproduction_matrix(X).toarray()
+    assert C.tolist() == [[0, 2, 1], [2, 0, 1], [1, 1, 0]]
+
+
+def test_plain_frame_without_film_id():
+    df = FILMS.drop(columns="film_id")
+    matrix = get_coproduction_matrix(df, ["Spain", "France", "Italy", "Atlantis"])
+    assert matrix.loc["Spain", "France"] == 2
+    assert matrix.loc["Spain", "Italy"] == 1
+    assert matrix.loc["France", "Italy"] == 1
+    assert matrix["Atlantis"].sum() == 0
+    assert np.diag(matrix.to_numpy()).sum() == 0
+
+
+def test_explicit_matrix_matches_frame():
+    country_matrix, country_table = loaded_country_data(FILMS)
+    # Subconjunto filtrado: las filas se toman por film_id, no por posición
+    subset = FILMS.iloc[[1, 2]]
+    countries = ["Spain", "France", "Germany"]
+    explicit = get_coproduction_matrix(subset, countries, country_matrix, country_table)
+    from_frame = get_coproduction_matrix(subset, countries)
+    assert explicit.equals(from_frame)
+    assert country_columns(subset, countries, country_matrix, country_table).equals(country_columns(subset, countries))
+
+
+def test_indicator_without_country_column():
+    indicator, names = film_country_indicator(FILMS[["year"]])
+    assert indicator.shape == (len(FILMS), 0)
+    assert len(names) == 0
+
+
+def test_country_production_companies():
+    top = get_country_production_companies(FILMS, "Spain")
+    assert top.set_index("Productora")["Películas"].to_dict() == {"Le Pacte": 2, "El Deseo": 1}
@@ -0,0 +1,46 @@
+import pytest
+
+from modules.countries import get_resolver
+
+
+@pytest.fixture(scope="module")
+def resolver():
+    return get_resolver()
+
+
+@pytest.mark.parametrize("name, iso3", [
+    ("Cape Verde", "CPV"),
+    ("Cabo Verde", "CPV"),
+    ("Macau", "MAC"),
+    ("Macao", "MAC"),
+    ("Holland", "NLD"),
+    ("Swaziland", "SWZ"),
+    ("Eswatini", "SWZ"),
+])
+def test_resolve_aliases(resolver, name, iso3):
+    assert resolver.resolve(name) == iso3
+    assert resolver.find_in_text(f"Shot in {name} in 2019") == [iso3]
+
+
+@pytest.mark.parametrize("text", [
+    "Filmed in New Jersey",
+    "A road movie across New Mexico",
+    "Set in the highlands of New Guinea",
+])
+def test_place_names_containing_a_country_are_not_countries(resolver, text):
+    assert resolver.find_in_text(text) == []
+
+
+def test_longer_country_name_still_wins(resolver):
+    assert resolver.find_in_text("Papua New Guinea, Jersey") == ["PNG", "JEY"]
+    assert resolver.find_in_text("Equatorial Guinea") == ["GNQ"]
+
+
+def test_mixed_free_text(resolver):
+    text = "Produced in New Jersey (United States) and Mexico, with support from Holland"
+    assert resolver.find_in_text(text) == ["USA", "MEX", "NLD"]
+
+
+def test_word_boundaries(resolver):
+    assert resolver.find_in_text("Ukraine") == ["UKR"]
+    assert resolver.resolve_list("France, Cape Verde / Macau") == ["FRA", "CPV", "MAC"]
@@ -0,0 +1,88 @@
+import gzip
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from modules.imdb_offline import ImdbIndex, build_imdb_index, resolve_imdb_ids_offline
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "imdb")
+
+
+@pytest.fixture(scope="module")
+def index_dir(tmp_path_factory):
+    out_dir = str(tmp_path_factory.mktemp("imdb_index"))
+    build_imdb_index(FIXTURE_DIR, out_dir)
+    return out_dir
+
+
+def resolve(index_dir, title, year=None, director=None):
+    df = pd.DataFrame({"title": [title], "year": [year], "director": [director]}, index=[7])
+    ids = resolve_imdb_ids_offline(df, index_dir)
+    assert list(ids.index) == [7]
+    return ids.iloc[0]
+
+
+def test_build_stats(tmp_path):
+    stats = build_imdb_index(FIXTURE_DIR, str(tmp_path))
+    # tvSeries y títulos alternativos de títulos desconocidos no se indexan
+    assert stats["titles"] == 9
+    assert stats["directors"] == 6
+    assert ImdbIndex.exists(str(tmp_path))
+
+
+def test_missing_index_returns_none(tmp_path):
+    df = pd.DataFrame({"title": ["Parasite"], "year": [2019]})
+    assert resolve_imdb_ids_offline(df, str(tmp_path)) is None
+
+
+@pytest.mark.parametrize("title, year", [
+    ("Parasite", 2019),
+    ("Gisaengchung", 2019),       # título original
+    ("Parásitos", 2019),          # título alternativo (title.akas)
+    ("Parasite (Gisaengchung)", 2020),  # texto entre paréntesis y año ±1
+])
+def test_unique_title(index_dir, title, year):
+    assert resolve(index_dir, title, year) == "tt9000001"
+
+
+def test_year_outside_tolerance(index_dir):
+    assert resolve(index_dir, "Parasite", 2015) is None
+
+
+def test_director_breaks_tie(index_dir):
+    assert resolve(index_dir, "The Square", 2017, "Ruben Ostlund") == "tt9000002"
+    assert resolve(index_dir, "The Square", 2017, "John Roe") == "tt9000003"
+    # Sin director (o con uno desconocido) los dos títulos siguen empatados
+    assert resolve(index_dir, "The Square", 2017) is None
+    assert resolve(index_dir, "The Square", 2017, "Someone Else") is None
+
+
+def test_exact_year_breaks_tie(index_dir):
+    assert resolve(index_dir, "Cold War", 2018) == "tt9000004"
+    assert resolve(index_dir, "Cold War", 2017) == "tt9000005"
+
+
+def test_movie_type_breaks_tie(index_dir):
+    assert resolve(index_dir, "Happy as Lazzaro", 2018) == "tt9000006"
+
+
+def test_ambiguous_and_unknown(index_dir):
+    assert resolve(index_dir, "Twins", 2018) is None
+    assert resolve(index_dir, "Twin Peaks", 2017) is None
+    assert resolve(index_dir, "Unknown Title", 2018) is None
+    assert resolve(index_dir, "", 2018) is None
+
+
+def test_gz_dump_takes_precedence_over_tsv(tmp_path):
+    dump_dir = tmp_path / "dumps"
+    shutil.copytree(FIXTURE_DIR, dump_dir)
+    with gzip.open(dump_dir / "title.basics.tsv.gz", "wt", encoding="utf-8") as f:
+        f.write("tconst\ttitleType\tprimaryTitle\toriginalTitle\tisAdult\tstartYear\tendYear\truntimeMinutes\tgenres\n")
+        f.write("tt9000099\tmovie\tParasite\tParasite\t0\t2019\t\\N\t132\tDrama\n")
+    out_dir = str(tmp_path / "index")
+    stats = build_imdb_index(str(dump_dir), out_dir)
+    assert stats["titles"] == 1
+    assert resolve(out_dir, "Parasite", 2019) == "tt9000099"
+    assert resolve(out_dir, "Cold War", 2018) is None
@@ -0,0 +1,23 @@
+import json
+
+from modules.pipeline_logging import get_logger, setup_logging, shutdown_logging
+
+
+def test_json_lines_keep_traceback_apart(tmp_path):
+    path = tmp_path / "log.jsonl"
+    setup_logging(json_file=str(path))
+    try:
+        log = get_logger("modules.test")
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            log.exception("Fallo en %s", 2019, extra={"year": 2019})
+        log.info("Sin excepción")
+    finally:
+        shutdown_logging()
+
+    failed, ok = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert failed["message"] == "Fallo en 2019"
+    assert failed["year"] == 2019
+    assert failed["exc"].startswith("Traceback") and "ZeroDivisionError" in failed["exc"]
+    assert ok["message"] == "Sin excepción" and "exc" not in ok
@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+
+import modules.data_processing as data_processing
+from modules.data_model import split_companies
+from modules.synthetic_dataset import generate_dataset, save_dataset
+
+COLUMNS = ["year", "title", "director", "section", "countries", "countries_for_analysis",
+           "productoras_normalizadas", "productoras_canonicas"]
+
+
+@pytest.fixture(scope="module")
+def films():
+    return generate_dataset(500, seed=3)
+
+
+def test_same_seed_same_dataset(films):
+    pd.testing.assert_frame_equal(films, generate_dataset(500, seed=3))
+    assert not films.equals(generate_dataset(500, seed=4))
+
+
+def test_schema(films):
+    assert list(films.columns) == COLUMNS
+    assert len(films) == 500
+    assert films["year"].is_monotonic_increasing
+    assert films["countries"].str.contains("France").mean() > 0.3
+    # Ruido sólo en los nombres observados: las películas sin productoras son las mismas
+    assert films["productoras_normalizadas"].isna().equals(films["productoras_canonicas"].isna())
+    both = films.dropna(subset=["productoras_canonicas"])
+    assert (both["productoras_normalizadas"] != both["productoras_canonicas"]).any()
+    assert all(split_companies(names) for names in both["productoras_normalizadas"])
+
+
+@pytest.mark.parametrize("fmt", ["xlsx", "csv", "parquet"])
+def test_round_trip_through_data_file(films, tmp_path, monkeypatch, fmt):
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+    path = save_dataset(films, str(tmp_path / f"films.{fmt}"))
+    monkeypatch.setattr(data_processing, "DATA_FILE", path)
+    pd.testing.assert_frame_equal(data_processing.read_dataset(path), films, check_dtype=False)
+    assert data_processing._read_extra_sheets("countries", "film_country") is None
@@ -0,0 +1,33 @@
+"""
+Precalcula las figuras de la vista por defecto del dashboard y las guarda en
+la caché de disco (datos_generados/cache_figuras), para que la primera carga
+de la página tras un despliegue no tenga que construir ningún gráfico.
+
+Uso:
+    python warm_figure_cache.py            # precalcula la vista por defecto
+    python warm_figure_cache.py --clear    # borra antes las figuras guardadas
+"""
+import argparse
+import time
+
+from modules.result_cache import FigureDiskCache
+from modules.views import load_view_data, warm_default_views
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precalcula la caché de figuras del dashboard")
+    parser.add_argument("--clear", action="store_true", help="Borrar las figuras guardadas antes de precalcular")
+    args = parser.parse_args()
+
+    data = load_view_data()
+    disk = data['cache'].disk or FigureDiskCache()
+    if args.clear:
+        disk.clear()
+
+    start = time.time()
+    count = warm_default_views(data)
+    print(f"✅ {count} figuras precalculadas en {time.time() - start:.1f}s -> {disk.directory}")
+
+
+if __name__ == "__main__":
+    main()